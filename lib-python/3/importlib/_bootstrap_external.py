@@ -1187,6 +1187,41 @@ class PathFinder:
         return spec.loader
 
 
+# PyPy change: a cache of the directory listings, shared by all the
+# FileFinders.  It maps a directory to its mtime and the set of its
+# entries.  It is cleared by invalidate_caches(), or when it reaches
+# _LISTDIR_CACHE_SIZE entries.
+_listdir_cache = {}
+_LISTDIR_CACHE_SIZE = 1024
+
+# PyPy change: the number of listdir() calls done, of listdir() calls
+# avoided thanks to _listdir_cache, and of stat() calls avoided by looking
+# for the __init__ files in the cached listings.  This list is updated in
+# place, and read by _imp.import_cache_stats().
+_import_cache_counts = [0, 0, 0]
+
+def _cached_listdir(path, mtime):
+    """Return the set of the entries of the directory 'path', listing it
+    only if 'mtime' changed since the last call."""
+    if mtime != -1:
+        cached = _listdir_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            _import_cache_counts[1] += 1
+            return cached[1]
+    try:
+        contents = set(_os.listdir(path))
+    except (FileNotFoundError, PermissionError, NotADirectoryError):
+        # Directory has either been removed, turned into a file, or made
+        # unreadable.
+        contents = set()
+    _import_cache_counts[0] += 1
+    if mtime != -1:
+        if len(_listdir_cache) >= _LISTDIR_CACHE_SIZE:
+            _listdir_cache.clear()
+        _listdir_cache[path] = (mtime, contents)
+    return contents
+
+
 class FileFinder:
 
     """File-based finder.
@@ -1213,6 +1248,7 @@ class FileFinder:
     def invalidate_caches(self):
         """Invalidate the directory mtime."""
         self._path_mtime = -1
+        _listdir_cache.clear()
 
     find_module = _find_module_shim
 
@@ -1243,7 +1279,7 @@ class FileFinder:
         except OSError:
             mtime = -1
         if mtime != self._path_mtime:
-            self._fill_cache()
+            self._fill_cache(mtime)
             self._path_mtime = mtime
         # tail_module keeps the original casing, for __file__ and friends
         if _relax_case():
@@ -1255,15 +1291,30 @@ class FileFinder:
         # Check if the module is the name of a directory (and thus a package).
         if cache_module in cache:
             base_path = _path_join(self.path, tail_module)
-            for suffix, loader_class in self._loaders:
-                init_filename = '__init__' + suffix
-                full_path = _path_join(base_path, init_filename)
-                if _path_isfile(full_path):
-                    return self._get_spec(loader_class, fullname, full_path, [base_path], target)
-            else:
-                # If a namespace package, return the path if we don't
-                #  find a module in the next section.
-                is_namespace = _path_isdir(base_path)
+            # PyPy change: look for the __init__ files in the cached
+            # listing of the directory, instead of one stat() per suffix
+            try:
+                st = _path_stat(base_path)
+            except OSError:
+                st = None
+            if st is not None and (st.st_mode & 0o170000) == 0o040000:
+                contents = _cached_listdir(base_path, st.st_mtime)
+                # the original code did one stat() per suffix tried, plus
+                # one to check for a directory if no __init__ was found;
+                # we did a single one
+                probes = 0
+                for suffix, loader_class in self._loaders:
+                    init_filename = '__init__' + suffix
+                    probes += 1
+                    if init_filename in contents:
+                        _import_cache_counts[2] += probes - 1
+                        full_path = _path_join(base_path, init_filename)
+                        return self._get_spec(loader_class, fullname, full_path, [base_path], target)
+                else:
+                    _import_cache_counts[2] += probes
+                    # If a namespace package, return the path if we don't
+                    #  find a module in the next section.
+                    is_namespace = True
         # Check for a file w/ a proper suffix exists.
         for suffix, loader_class in self._loaders:
             full_path = _path_join(self.path, tail_module + suffix)
@@ -1278,15 +1329,11 @@ class FileFinder:
             return spec
         return None
 
-    def _fill_cache(self):
+    def _fill_cache(self, mtime=-1):
         """Fill the cache of potential modules and packages for this directory."""
         path = self.path
-        try:
-            contents = _os.listdir(path or _os.getcwd())
-        except (FileNotFoundError, PermissionError, NotADirectoryError):
-            # Directory has either been removed, turned into a file, or made
-            # unreadable.
-            contents = []
+        # PyPy change: the listings are shared by all the FileFinders
+        contents = _cached_listdir(path or _os.getcwd(), mtime)
         # We store two cached versions, to handle runtime changes of the
         # PYTHONCASEOK environment variable.
         if not sys.platform.startswith('win'):
@@ -1429,6 +1476,8 @@ def _setup(_bootstrap_module):
     # Constants
     setattr(self_module, '_relax_case', _make_relax_case())
     EXTENSION_SUFFIXES.extend(_imp.extension_suffixes())
+    # PyPy change: the counters reported by _imp.import_cache_stats()
+    _imp._set_import_cache_counts(_import_cache_counts)
     if builtin_os == 'nt':
         SOURCE_SUFFIXES.append('.pyw')
         if '_d.pyd' in EXTENSION_SUFFIXES:
@@ -0,0 +1,115 @@
+"""Pack compiled modules into a bytecode bundle.
+
+    pypy3 -m _pypy_bundle OUTPUT [DIRECTORY...]
+
+compiles all the modules found in the DIRECTORYs (by default, the
+directories of the standard library and site-packages in sys.path) and
+writes their code objects in the single file OUTPUT.  Setting the
+environment variable PYPY_BUNDLE=OUTPUT makes pypy import these modules
+from the bundle instead of searching sys.path for them; see
+_imp.bundleimporter.  The bundled modules then take precedence over any
+module of the same name in sys.path, including the script's directory.
+
+The bundle must be rebuilt when the modules change: the timestamps of the
+source files are not checked at import time.
+"""
+
+import os
+import sys
+import marshal
+import struct
+
+BUNDLE_HEADER = b'PyPyBNDL'
+FLAG_PACKAGE = 1
+
+
+def find_modules(directory, prefix=''):
+    """Yields (dotted name, filename) for the .py files in 'directory' and
+    in its packages."""
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(directory, name)
+        if name.endswith('.py'):
+            modname = name[:-3]
+            if modname.isidentifier() and modname != '__init__':
+                yield prefix + modname, path
+        elif name.isidentifier() and os.path.isfile(
+                os.path.join(path, '__init__.py')):
+            yield prefix + name, os.path.join(path, '__init__.py')
+            for item in find_modules(path, prefix + name + '.'):
+                yield item
+
+
+def write_bundle(path, modules, optimize=-1):
+    """Compiles the (dotted name, filename) pairs in 'modules' and writes
+    them to the bundle 'path'.  Modules with syntax errors are skipped.
+    Returns the number of modules written."""
+    import _imp
+    index = []
+    blobs = []
+    seen = set()
+    for modname, filename in modules:
+        if modname in seen:
+            continue    # the first one wins, like on sys.path
+        try:
+            with open(filename, 'rb') as f:
+                source = f.read()
+            code = compile(source, filename, 'exec', dont_inherit=True,
+                           optimize=optimize)
+        except (OSError, SyntaxError, ValueError):
+            continue
+        seen.add(modname)
+        flags = 0
+        if os.path.basename(filename) == '__init__.py':
+            flags |= FLAG_PACKAGE
+        index.append((modname.encode('utf-8'), os.fsencode(filename), flags))
+        blobs.append(marshal.dumps(code))
+    offset = len(BUNDLE_HEADER) + 8
+    for name, filename, flags in index:
+        offset += 20 + len(name) + len(filename)
+    tmppath = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmppath, 'wb') as f:
+        f.write(BUNDLE_HEADER)
+        f.write(_imp.get_magic())
+        f.write(struct.pack('<I', len(index)))
+        for (name, filename, flags), blob in zip(index, blobs):
+            f.write(struct.pack('<IIIII', len(name), len(filename), flags,
+                                offset, len(blob)))
+            f.write(name)
+            f.write(filename)
+            offset += len(blob)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmppath, path)
+    return len(index)
+
+
+def default_directories():
+    result = []
+    stdlib = os.path.dirname(os.__file__)
+    for directory in sys.path:
+        if directory and os.path.isdir(directory) and (
+                directory.startswith(stdlib) or
+                os.path.basename(directory) in ('lib_pypy', 'site-packages')):
+            result.append(directory)
+    return result
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] in ('-h', '--help'):
+        print(__doc__.strip())
+        return 2
+    directories = argv[2:] or default_directories()
+    modules = []
+    for directory in directories:
+        modules.extend(find_modules(directory))
+    count = write_bundle(argv[1], modules)
+    print("%d modules written to %s" % (count, argv[1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -101,6 +101,7 @@ module_dependencies = {
     'cpyext': [('objspace.usemodules.array', True)],
     '_cppyy': [('objspace.usemodules.cpyext', True)],
     'faulthandler': [('objspace.usemodules._vmprof', True)],
+    '_tracemalloc': [('objspace.usemodules._vmprof', True)],
     }
 module_suggests = {
     # the reason you want _rawffi is for ctypes, which
@@ -126,6 +127,7 @@ module_import_dependencies = {
     "_continuation": ["rpython.rlib.rstacklet"],
     "_vmprof"      : ["pypy.module._vmprof.interp_vmprof"],
     "faulthandler" : ["pypy.module._vmprof.interp_vmprof"],
+    "_tracemalloc" : ["pypy.module._vmprof.interp_vmprof"],
     "_lzma"     : ["pypy.module._lzma.interp_lzma"],
     }
 
@@ -240,6 +242,21 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                    "enable optimized ways to store lists of primitives ",
                    default=True),
 
+        BoolOption("withnarrowintlists",
+                   "store lists of small ints in 8, 16 or 32 bits per item",
+                   default=False,
+                   requires=[("objspace.std.withliststrategies", True)]),
+
+        BoolOption("withasciidicts",
+                   "store the keys of dicts whose keys are all ASCII str "
+                   "objects as byte strings",
+                   default=False),
+
+        BoolOption("withunboxeddictvalues",
+                   "store the values of dicts with int or ASCII str keys "
+                   "unboxed if they are all ints or all floats",
+                   default=False),
+
         BoolOption("withmethodcachecounter",
                    "try to cache methods and provide a counter in __pypy__. "
                    "for testing purposes only.",
@@ -290,6 +307,9 @@ def set_pypy_opt_level(config, level):
     if level == 'mem':
         config.objspace.std.suggest(withprebuiltint=True)
         config.objspace.std.suggest(withliststrategies=True)
+        config.objspace.std.suggest(withnarrowintlists=True)
+        config.objspace.std.suggest(withasciidicts=True)
+        config.objspace.std.suggest(withunboxeddictvalues=True)
         if not IS_64_BITS:
             config.objspace.std.suggest(withsmalllong=True)
 
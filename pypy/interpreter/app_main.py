@@ -45,6 +45,13 @@ PYTHONIOENCODING: Encoding[:errors] used for stdin/stdout/stderr.
 PYPY_IRC_TOPIC: if set to a non-empty value, print a random #pypy IRC
                topic at startup of interactive mode.
 PYPYLOG: If set to a non-empty value, enable logging.
+PYPY_JIT_PARAMS: JIT parameters, in the same format as for --jit, e.g.
+               code_memory_limit=100000000 to cap the JIT machine code.
+PYPY_JIT_PROFILE: file from which the JIT warm-up profile is loaded at
+               startup, and to which it is saved at exit.
+PYPY_BUNDLE: bytecode bundle written by 'pypy3 -m _pypy_bundle', from
+               which the modules it contains are imported (they take
+               precedence over the modules of the same name in sys.path).
 """
 
 try:
@@ -245,6 +252,54 @@ def set_jit_option(options, jitparam, *args):
         import pypyjit
         pypyjit.set_param(jitparam)
 
+def setup_jit_profile(path):
+    import pypyjit, atexit
+    try:
+        pypyjit.load_profile(path)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print("Warning: cannot load the JIT profile: %s" % (e,),
+              file=sys.stderr)
+    pypyjit.record_profile(True)
+    atexit.register(pypyjit.save_profile, path)
+
+def setup_bundle(path):
+    import _imp
+    try:
+        importer = _imp.bundleimporter(path)
+    except (OSError, ImportError) as e:
+        print("Warning: cannot use the bytecode bundle: %s" % (e,),
+              file=sys.stderr)
+        return
+    # after the importers of the builtin modules, before the path search:
+    # the bundled modules shadow the ones of the same name in sys.path
+    for i, finder in enumerate(sys.meta_path):
+        if getattr(finder, '__name__', None) == 'PathFinder':
+            sys.meta_path.insert(i, importer)
+            break
+    else:
+        sys.meta_path.append(importer)
+
+def setup_tracemalloc(option, value):
+    # -X tracemalloc[=NFRAME] or PYTHONTRACEMALLOC=NFRAME
+    if '_tracemalloc' not in sys.builtin_module_names:
+        print("Warning: %s ignored, the _tracemalloc module is not "
+              "available" % (option,), file=sys.stderr)
+        return
+    if value is True:
+        nframe = 1
+    else:
+        try:
+            nframe = int(value)
+        except ValueError:
+            nframe = 0
+    import _tracemalloc
+    try:
+        _tracemalloc.start(nframe)
+    except ValueError as e:
+        print("Warning: invalid %s: %s" % (option, e), file=sys.stderr)
+
 class CommandLineError(Exception):
     pass
 
@@ -580,6 +635,28 @@ def run_command_line(interactive,
             except ValueError:
                 pass      # ignore "2 is not a valid file descriptor"
 
+    if 'tracemalloc' in sys._xoptions:
+        setup_tracemalloc('-X tracemalloc', sys._xoptions['tracemalloc'])
+    elif readenv and os.getenv('PYTHONTRACEMALLOC'):
+        setup_tracemalloc('PYTHONTRACEMALLOC', os.getenv('PYTHONTRACEMALLOC'))
+
+    bundle = readenv and os.getenv('PYPY_BUNDLE')
+    if bundle:
+        setup_bundle(bundle)
+
+    if readenv and 'pypyjit' in sys.builtin_module_names:
+        jit_params = os.getenv('PYPY_JIT_PARAMS')
+        if jit_params:
+            import pypyjit
+            try:
+                pypyjit.set_param(jit_params)
+            except ValueError:
+                print("Warning: invalid PYPY_JIT_PARAMS: %s" % (jit_params,),
+                      file=sys.stderr)
+        jit_profile = os.getenv('PYPY_JIT_PROFILE')
+        if jit_profile:
+            setup_jit_profile(jit_profile)
+
     mainmodule = type(sys)('__main__')
     mainmodule.__loader__ = sys.__loader__
     mainmodule.__builtins__ = os.__builtins__
@@ -6,7 +6,7 @@ from rpython.rlib.objectmodel import specialize, we_are_translated
 
 from pypy.interpreter.astcompiler import ast, consts, misc, symtable
 from pypy.interpreter.error import OperationError
-from pypy.interpreter.pycode import PyCode
+from pypy.interpreter.pycode import PyCode, LazyPyCode
 from pypy.interpreter.miscutils import string_sort
 from pypy.tool import stdlib_opcode as ops
 
@@ -297,7 +297,7 @@ class PythonCodeMaker(ast.ASTVisitor):
             for w_item in space.fixedview(obj):
                 result_w.append(self._make_key(w_item))
             w_key = space.newtuple(result_w[:])
-        elif isinstance(obj, PyCode):
+        elif isinstance(obj, PyCode) or isinstance(obj, LazyPyCode):
             w_key = space.newtuple([obj, w_type, space.id(obj)])
         else:
             w_key = space.newtuple([obj, w_type])
@@ -355,6 +355,24 @@ class PythonCodeMaker(ast.ASTVisitor):
                                     # we have to trigger another pass
                                     force_redo = True
                                     continue
+                        # Optimize a conditional jump going to an
+                        # unconditional jump: go directly to the final
+                        # target.  All the conditional jumps are absolute.
+                        # Only forward jumps are threaded: a backward
+                        # JUMP_ABSOLUTE is the loop's back-edge, which is
+                        # where the JIT and the periodic actions run.
+                        elif (op == ops.POP_JUMP_IF_FALSE or
+                              op == ops.POP_JUMP_IF_TRUE or
+                              op == ops.JUMP_IF_FALSE_OR_POP or
+                              op == ops.JUMP_IF_TRUE_OR_POP):
+                            if target.instructions:
+                                target_instr = target.instructions[0]
+                                target_op = target_instr.opcode
+                                if (target_op == ops.JUMP_FORWARD or
+                                    (target_op == ops.JUMP_ABSOLUTE and
+                                     target_instr.jump[0].offset > offset)):
+                                    target = target_instr.jump[0]
+                                    instr.jump = (target, absolute)
                         if absolute:
                             jump_arg = target.offset
                         else:
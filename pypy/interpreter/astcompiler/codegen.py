@@ -12,6 +12,8 @@ from rpython.rlib.objectmodel import specialize
 from pypy.interpreter.astcompiler import ast, assemble, symtable, consts, misc
 from pypy.interpreter.astcompiler import optimize # For side effects
 from pypy.interpreter.pyparser.error import SyntaxError
+from pypy.interpreter.pycode import PyCode, LazyPyCode
+from pypy.interpreter.miscutils import string_sort
 from pypy.tool import stdlib_opcode as ops
 
 C_INT_MAX = (2 ** (struct.calcsize('i') * 8)) / 2 - 1
@@ -19,7 +21,8 @@ C_INT_MAX = (2 ** (struct.calcsize('i') * 8)) / 2 - 1
 def compile_ast(space, module, info):
     """Generate a code object from AST."""
     symbols = symtable.SymtableBuilder(space, module, info)
-    return TopLevelCodeGenerator(space, module, symbols, info).assemble()
+    table = symtable.ScopeTable(symbols.scopes)
+    return TopLevelCodeGenerator(space, module, table, info).assemble()
 
 
 name_ops_default = misc.dict_to_switch({
@@ -209,18 +212,36 @@ class PythonCodeGenerator(assemble.PythonCodeMaker):
         assert self.scope.lookup(name) != symtable.SCOPE_UNKNOWN
         return name
 
-    def sub_scope(self, kind, name, node, lineno):
-        """Convenience function for compiling a sub scope."""
+    def _sub_scope_qualname(self, name):
         if self.scope.lookup(name) == symtable.SCOPE_GLOBAL_EXPLICIT:
-            qualname = name
+            return name
         elif self.qualname:
-            qualname = '%s.%s' % (self.qualname, name)
+            return '%s.%s' % (self.qualname, name)
         else:
-            qualname = name
+            return name
+
+    def sub_scope(self, kind, name, node, lineno):
+        """Convenience function for compiling a sub scope."""
+        qualname = self._sub_scope_qualname(name)
         generator = kind(self.space, name, node, lineno, self.symbols,
                          self.compile_info, qualname)
         return generator.assemble(), qualname
 
+    def lazy_sub_scope(self, lazy_kind, name, node, lineno):
+        """Like sub_scope(), but with PyCF_LAZY_FUNCTIONS: the code
+        generator of the function body only runs when it is first called."""
+        qualname = self._sub_scope_qualname(name)
+        free_vars = self.symbols.find_scope(node).free_vars[:]
+        string_sort(free_vars)    # same order as in assemble()
+        freevars = free_vars[:]   # not resizable, like PyCode.co_freevars
+        code = LazyPyCode(self.space, lazy_kind, name, node, lineno,
+                          self.symbols.sub_table(node), self.compile_info,
+                          qualname, freevars)
+        return code, qualname
+
+    def _lazy_functions(self):
+        return bool(self.compile_info.flags & consts.PyCF_LAZY_FUNCTIONS)
+
     def push_frame_block(self, kind, block):
         self.frame_blocks.append((kind, block))
 
@@ -314,9 +335,14 @@ class PythonCodeGenerator(assemble.PythonCodeMaker):
     def _make_function(self, code, num_defaults=0, qualname=None):
         """Emit the opcodes to turn a code object into a function."""
         w_qualname = self.space.newtext(qualname or code.co_name)
-        if code.co_freevars:
+        if isinstance(code, LazyPyCode):
+            freevars = code.lazy_freevars
+        else:
+            assert isinstance(code, PyCode)
+            freevars = code.co_freevars
+        if freevars:
             # Load cell and free vars to pass on.
-            for free in code.co_freevars:
+            for free in freevars:
                 free_scope = self.scope.lookup(free)
                 if free_scope in (symtable.SCOPE_CELL,
                                   symtable.SCOPE_CELL_CLASS):
@@ -324,7 +350,7 @@ class PythonCodeGenerator(assemble.PythonCodeMaker):
                 else:
                     index = self.free_vars[free]
                 self.emit_op_arg(ops.LOAD_CLOSURE, index)
-            self.emit_op_arg(ops.BUILD_TUPLE, len(code.co_freevars))
+            self.emit_op_arg(ops.BUILD_TUPLE, len(freevars))
             self.load_const(code)
             self.load_const(w_qualname)
             self.emit_op_arg(ops.MAKE_CLOSURE, num_defaults)
@@ -396,8 +422,16 @@ class PythonCodeGenerator(assemble.PythonCodeMaker):
         oparg = num_defaults
         oparg |= kw_default_count << 8
         oparg |= num_annotations << 16
-        code, qualname = self.sub_scope(function_code_generator, func.name,
-                                        func, func.lineno)
+        if self._lazy_functions():
+            if function_code_generator is AsyncFunctionCodeGenerator:
+                lazy_kind = LazyPyCode.ASYNC_FUNCTION
+            else:
+                lazy_kind = LazyPyCode.FUNCTION
+            code, qualname = self.lazy_sub_scope(lazy_kind, func.name,
+                                                 func, func.lineno)
+        else:
+            code, qualname = self.sub_scope(function_code_generator,
+                                            func.name, func, func.lineno)
         self._make_function(code, oparg, qualname=qualname)
         # Apply decorators.
         if func.decorator_list:
@@ -420,8 +454,12 @@ class PythonCodeGenerator(assemble.PythonCodeMaker):
         if args.kwonlyargs:
             kw_default_count = self._visit_kwonlydefaults(args)
         default_count = len(args.defaults) if args.defaults is not None else 0
-        code, qualname = self.sub_scope(
-            LambdaCodeGenerator, "<lambda>", lam, lam.lineno)
+        if self._lazy_functions():
+            code, qualname = self.lazy_sub_scope(
+                LazyPyCode.LAMBDA, "<lambda>", lam, lam.lineno)
+        else:
+            code, qualname = self.sub_scope(
+                LambdaCodeGenerator, "<lambda>", lam, lam.lineno)
         oparg = default_count
         oparg |= kw_default_count << 8
         self._make_function(code, oparg, qualname=qualname)
@@ -526,7 +564,12 @@ class PythonCodeGenerator(assemble.PythonCodeMaker):
                 otherwise = self.new_block()
             else:
                 otherwise = end
-            if_.test.accept_jump_if(self, False, otherwise)
+            if self._is_debug_name(if_.test):
+                # 'if __debug__:' with the optimization level only known
+                # at runtime, like the assert statement
+                self.emit_jump(ops.JUMP_IF_NOT_DEBUG, otherwise)
+            else:
+                if_.test.accept_jump_if(self, False, otherwise)
             self.visit_sequence(if_.body)
             self.emit_jump(ops.JUMP_FORWARD, end)
             if if_.orelse:
@@ -534,6 +577,10 @@ class PythonCodeGenerator(assemble.PythonCodeMaker):
                 self.visit_sequence(if_.orelse)
         self.use_next_block(end)
 
+    def _is_debug_name(self, node):
+        return (isinstance(node, ast.Name) and node.id == "__debug__" and
+                node.ctx == ast.Load)
+
     def visit_Break(self, br):
         self.update_position(br.lineno, True)
         for f_block in self.frame_blocks:
@@ -573,7 +620,8 @@ class PythonCodeGenerator(assemble.PythonCodeMaker):
         end = self.new_block()
         self.emit_jump(ops.SETUP_LOOP, end)
         self.push_frame_block(F_BLOCK_LOOP, start)
-        fr.iter.walkabout(self)
+        if not self._optimize_iterable(fr.iter):
+            fr.iter.walkabout(self)
         self.emit_op(ops.GET_ITER)
         self.use_next_block(start)
         # This adds another line, so each for iteration can be traced.
@@ -1111,6 +1159,11 @@ class PythonCodeGenerator(assemble.PythonCodeMaker):
                     return True
         return False
 
+    def _optimize_iterable(self, node):
+        """Fold lists/sets of constants iterated over by a for loop, like
+        _optimize_comparator() does for "in"."""
+        return self._optimize_comparator(ast.In, node)
+
     def _tuple_of_consts(self, elts):
         """Return a tuple of consts from elts if possible, or None"""
         count = len(elts) if elts is not None else 0
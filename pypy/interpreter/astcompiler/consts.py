@@ -33,6 +33,7 @@ PyCF_ONLY_AST = 0x0400
 PyCF_IGNORE_COOKIE = 0x0800
 PyCF_ACCEPT_NULL_BYTES = 0x10000000   # PyPy only, for compile()
 PyCF_FOUND_ENCODING = 0x20000000      # PyPy only, for pytokenizer
+PyCF_LAZY_FUNCTIONS = 0x40000000      # PyPy only, for compile()
 
 # Masks and values used by FORMAT_VALUE opcode
 FVC_MASK      = 0x3
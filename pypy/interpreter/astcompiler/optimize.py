@@ -269,7 +269,9 @@ class OptimizingVisitor(ast.ASTVisitor):
         return rep
 
     def visit_Name(self, name):
-        """Turn loading None, True, and False into a constant lookup."""
+        """Turn loading None, True, and False into a constant lookup.
+        __debug__ is turned into a constant too if the optimization level
+        is known at compile time."""
         if name.ctx == ast.Del:
             return name
         space = self.space
@@ -281,10 +283,21 @@ class OptimizingVisitor(ast.ASTVisitor):
             w_const = space.w_True
         elif iden == "False":
             w_const = space.w_False
+        elif iden == "__debug__" and self.compile_info.optimize >= 0:
+            w_const = space.newbool(self.compile_info.optimize == 0)
         if w_const is not None:
             return ast.Const(w_const, name.lineno, name.col_offset)
         return name
 
+    def visit_IfExp(self, ifexp):
+        """Drop the branch of 'a if test else b' which is never taken."""
+        truth = ifexp.test.as_constant_truth(self.space)
+        if truth == CONST_TRUE:
+            return ifexp.body
+        elif truth == CONST_FALSE:
+            return ifexp.orelse
+        return ifexp
+
     def visit_Tuple(self, tup):
         """Try to turn tuple building into a constant."""
         if tup.elts:
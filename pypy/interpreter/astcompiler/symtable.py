@@ -335,6 +335,36 @@ class ClassScope(Scope):
                 del free[name]
 
 
+class ScopeTable(object):
+    """The scopes found by SymtableBuilder, by AST node."""
+
+    def __init__(self, scopes):
+        self.scopes = scopes
+        self.nodes = None     # the reverse mapping, built by sub_table()
+
+    def find_scope(self, scope_node):
+        """Lookup the scope for a given AST node."""
+        return self.scopes[scope_node]
+
+    def sub_table(self, scope_node):
+        """Return a ScopeTable with only the scope of 'scope_node' and
+        the scopes nested inside it, which keeps only this part of the
+        AST alive."""
+        nodes = self.nodes
+        if nodes is None:
+            nodes = {}
+            for node, scope in self.scopes.iteritems():
+                nodes[scope] = node
+            self.nodes = nodes
+        scopes = {}
+        pending = [self.scopes[scope_node]]
+        while pending:
+            scope = pending.pop()
+            scopes[nodes[scope]] = scope
+            pending.extend(scope.children)
+        return ScopeTable(scopes)
+
+
 class SymtableBuilder(ast.GenericASTVisitor):
     """Find symbol information from AST."""
 
@@ -1457,6 +1457,118 @@ class TestOptimizations:
             assert ops.BUILD_SET not in counts
             assert ops.LOAD_CONST in counts
 
+    def test_folding_of_for_loop_constants(self):
+        for source in (
+            'for x in [1, 2, 3]: pass',
+            'for x in {"a", "b"}: pass',
+            ):
+            source = 'def f():\n    %s' % source
+            counts = self.count_instructions(source)
+            assert ops.BUILD_LIST not in counts
+            assert ops.BUILD_SET not in counts
+        counts = self.count_instructions(
+            'def f(y):\n    for x in [1, y]: pass')
+        assert ops.BUILD_LIST in counts
+
+    def test_fold_constant_ifexp(self):
+        source = """def f(x):
+            return 4 if 1 else x
+        """
+        counts = self.count_instructions(source)
+        assert counts == {ops.LOAD_CONST: 1, ops.RETURN_VALUE: 1}
+
+    def test_debug_name(self):
+        source = """def f(x):
+            if __debug__:
+                return x
+        """
+        counts = self.count_instructions(source)
+        assert counts[ops.JUMP_IF_NOT_DEBUG] == 1
+        assert ops.LOAD_GLOBAL not in counts
+
+    def get_conditional_jump_targets(self, source):
+        # the first opcode of the target of each POP_JUMP_IF_FALSE, or
+        # None for an empty block
+        code, blocks = generate_function_code(source, self.space)
+        targets = []
+        for block in blocks:
+            for instr in block.instructions:
+                if instr.opcode == ops.POP_JUMP_IF_FALSE:
+                    target = instr.jump[0]
+                    if target.instructions:
+                        targets.append(target.instructions[0].opcode)
+                    else:
+                        targets.append(None)
+        return targets
+
+    def test_jump_threading(self):
+        source = """def f(x, y):
+            if x:
+                if y:
+                    g()
+            else:
+                h()
+        """
+        targets = self.get_conditional_jump_targets(source)
+        assert len(targets) == 2
+        assert ops.JUMP_ABSOLUTE not in targets
+        assert ops.JUMP_FORWARD not in targets
+
+    def test_no_jump_threading_of_back_edge(self):
+        # the JUMP_ABSOLUTE back to the start of the loop must be kept:
+        # the JIT and the periodic actions only run there
+        source = """def f(x, y):
+            while x:
+                if y:
+                    g()
+        """
+        targets = self.get_conditional_jump_targets(source)
+        assert targets.count(ops.JUMP_ABSOLUTE) == 1
+
+    def test_lazy_functions(self):
+        from pypy.interpreter.astcompiler import consts
+        from pypy.interpreter.pycode import LazyPyCode
+        space = self.space
+        source = """def f(x):\n    return lambda: x\nclass A:\n    pass\n"""
+        p = pyparse.PythonParser(space)
+        info = pyparse.CompileInfo("<test>", 'exec',
+                                   consts.PyCF_LAZY_FUNCTIONS)
+        cst = p.parse_source(source, info)
+        tree = astbuilder.ast_from_node(space, cst, info, recursive_parser=p)
+        code = codegen.compile_ast(space, tree, info)
+        lazies = [w for w in code.co_consts_w if isinstance(w, LazyPyCode)]
+        assert len(lazies) == 1     # class bodies are compiled eagerly
+        lazy = lazies[0]
+        assert lazy.co_name == 'f'
+        assert lazy.w_code is None
+        # only the scopes of f and of the lambda are kept, not the
+        # module's, which would keep the whole AST alive
+        assert len(lazy.symbols.scopes) == 2
+        assert tree not in lazy.symbols.scopes
+        code_f = lazy.materialize()
+        assert isinstance(code_f, PyCode)
+        assert lazy.materialize() is code_f
+        assert lazy.node is None
+        assert isinstance(code_f.co_consts_w[1], LazyPyCode)
+        assert code_f.co_consts_w[1].lazy_freevars == ['x']
+        # co_consts_w is immutable: get_consts_w() returns a new list
+        consts_w = code.get_consts_w()
+        assert code_f in consts_w
+        assert lazy in code.co_consts_w
+        assert code_f not in code.co_consts_w
+        # the nested code objects are only hashed by name, which doesn't
+        # force them; equal code objects, lazy or not, have equal hashes
+        w_hash = space.hash(code_f)
+        assert space.eq_w(space.hash(code_f), w_hash)
+        eager_info = pyparse.CompileInfo("<test>", 'exec')
+        cst = p.parse_source(source, eager_info)
+        eager_tree = astbuilder.ast_from_node(space, cst, eager_info,
+                                              recursive_parser=p)
+        eager_code = codegen.compile_ast(space, eager_tree, eager_info)
+        assert not isinstance(eager_code.co_consts_w[0], LazyPyCode)
+        assert space.eq_w(eager_code, code)
+        assert space.eq_w(space.hash(eager_code), space.hash(code))
+
     def test_dont_fold_huge_powers(self):
         for source in (
             "2 ** 3000",         # not constant-folded: too big
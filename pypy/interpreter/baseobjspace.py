@@ -1140,7 +1140,7 @@ class ObjSpace(object):
         if isinstance(w_func, Method):
             w_func = w_func.w_function
         if isinstance(w_func, Function):
-            return w_func.code
+            return w_func.materialize_code()
         return None
 
     def call_function(self, w_func, *args_w):
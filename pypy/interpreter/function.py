@@ -85,6 +85,17 @@ class Function(W_Root):
             return jit.promote(self.code)
         return self.code
 
+    def materialize_code(self):
+        """Like getcode(), but if the code is a LazyPyCode, compile it
+        and return the real code object.  To be used whenever the code
+        object escapes or is inspected."""
+        from pypy.interpreter.pycode import LazyPyCode
+        code = self.code
+        if isinstance(code, LazyPyCode):
+            code = code.materialize()
+            self.code = code
+        return code
+
     def funccall(self, *args_w): # speed hack
         from pypy.interpreter import gateway
         from pypy.interpreter.pycode import PyCode
@@ -459,7 +470,7 @@ class Function(W_Root):
         self.w_module = space.w_None
 
     def fget_func_code(self, space):
-        return self.code
+        return self.materialize_code()
 
     def fset_func_code(self, space, w_code):
         from pypy.interpreter.pycode import PyCode
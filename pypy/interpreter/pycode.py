@@ -18,6 +18,7 @@ from pypy.tool import dis3
 from pypy.tool.stdlib_opcode import opcodedesc, HAVE_ARGUMENT
 from rpython.rlib.rarithmetic import intmask
 from rpython.rlib.objectmodel import compute_hash, we_are_translated
+from rpython.rlib.debug import make_sure_not_resized
 from rpython.rlib import jit, rstring
 
 
@@ -76,6 +77,7 @@ def cpython_code_signature(code):
 class CodeHookCache(object):
     def __init__(self, space):
         self._code_hook = None
+        self._jit_profile = None    # set by pypyjit.preload_profile()
 
 class PyCode(eval.Code):
     "CPython-style code objects."
@@ -86,6 +88,8 @@ class PyCode(eval.Code):
                           "co_stacksize", "co_varnames[*]",
                           "_args_as_cellvars[*]", "w_globals?"]
 
+    jit_hints = None     # a JitHints instance, set by pypyjit.hint()
+
     def __init__(self, space,  argcount, kwonlyargcount, nlocals, stacksize, flags,
                      code, consts, names, varnames, filename,
                      name, firstlineno, lnotab, freevars, cellvars,
@@ -135,7 +139,10 @@ class PyCode(eval.Code):
         return True
 
     def new_code_hook(self):
-        code_hook = self.space.fromcache(CodeHookCache)._code_hook
+        cache = self.space.fromcache(CodeHookCache)
+        if cache._jit_profile is not None:
+            cache._jit_profile.code_created(self)
+        code_hook = cache._code_hook
         if code_hook is not None:
             try:
                 self.space.call_function(code_hook, self)
@@ -296,7 +303,7 @@ class PyCode(eval.Code):
     def remove_docstrings(self, space):
         if self.co_flags & CO_KILL_DOCSTRING:
             self.co_consts_w[0] = space.w_None
-        for w_co in self.co_consts_w:
+        for w_co in self.get_consts_w():
             if isinstance(w_co, PyCode):
                 w_co.remove_docstrings(space)
 
@@ -314,8 +321,28 @@ class PyCode(eval.Code):
                               for w in self.co_consts_w]
         dis3.dis(self)
 
+    def get_consts_w(self):
+        """Returns co_consts_w, or a copy of it in which the LazyPyCode
+        instances are replaced with the code objects they stand for.  Use
+        this instead of co_consts_w whenever the constants escape to
+        app-level.  co_consts_w itself is never changed: it is immutable
+        for the JIT, and LOAD_CONST must keep pushing the LazyPyCode, whose
+        current_code() is used by MAKE_FUNCTION."""
+        consts_w = self.co_consts_w
+        for i in range(len(consts_w)):
+            if isinstance(consts_w[i], LazyPyCode):
+                break
+        else:
+            return consts_w
+        result_w = consts_w[:]
+        for i in range(len(result_w)):
+            w_const = result_w[i]
+            if isinstance(w_const, LazyPyCode):
+                result_w[i] = w_const.materialize()
+        return result_w
+
     def fget_co_consts(self, space):
-        return space.newtuple(self.co_consts_w)
+        return space.newtuple(self.get_consts_w())
 
     def fget_co_names(self, space):
         return space.newtuple(self.co_names_w)
@@ -333,6 +360,8 @@ class PyCode(eval.Code):
         space = self.space
         if not isinstance(w_other, PyCode):
             return space.w_False
+        consts_w = self.get_consts_w()
+        other_consts_w = w_other.get_consts_w()
         areEqual = (self.co_name == w_other.co_name and
                     self.co_argcount == w_other.co_argcount and
                     self.co_kwonlyargcount == w_other.co_kwonlyargcount and
@@ -340,7 +369,7 @@ class PyCode(eval.Code):
                     self.co_flags == w_other.co_flags and
                     self.co_firstlineno == w_other.co_firstlineno and
                     self.co_code == w_other.co_code and
-                    len(self.co_consts_w) == len(w_other.co_consts_w) and
+                    len(consts_w) == len(other_consts_w) and
                     len(self.co_names_w) == len(w_other.co_names_w) and
                     self.co_varnames == w_other.co_varnames and
                     self.co_freevars == w_other.co_freevars and
@@ -352,8 +381,8 @@ class PyCode(eval.Code):
             if not space.eq_w(self.co_names_w[i], w_other.co_names_w[i]):
                 return space.w_False
 
-        for i in range(len(self.co_consts_w)):
-            if not space.eq_w(self.co_consts_w[i], w_other.co_consts_w[i]):
+        for i in range(len(consts_w)):
+            if not space.eq_w(consts_w[i], other_consts_w[i]):
                 return space.w_False
 
         return space.w_True
@@ -374,6 +403,14 @@ class PyCode(eval.Code):
         for w_name in self.co_names_w:
             w_result = space.xor(w_result, space.hash(w_name))
         for w_const in self.co_consts_w:
+            if isinstance(w_const, eval.Code):
+                # only the name of a nested code object is hashed: the
+                # compiler hashes the code objects that it stores as
+                # constants, which must not force LazyPyCodes, and __eq__
+                # considers a LazyPyCode equal to the code it stands for
+                result = compute_hash(w_const.co_name)
+                w_result = space.xor(w_result, space.newint(result))
+                continue
             w_result = space.xor(w_result, space.hash(w_const))
         return w_result
 
@@ -426,7 +463,7 @@ class PyCode(eval.Code):
             space.newint(self.co_stacksize),
             space.newint(self.co_flags),
             space.newbytes(self.co_code),
-            space.newtuple(self.co_consts_w),
+            space.newtuple(self.get_consts_w()),
             space.newtuple(self.co_names_w),
             space.newtuple([space.newtext(v) for v in self.co_varnames]),
             self.w_filename,
@@ -457,3 +494,86 @@ class PyCode(eval.Code):
         return space.newunicode(u'<code object %s at 0x%s, file "%s", line %d>' % (
             name, unicode(self.getaddrstring(space)), fn,
             -1 if self.co_firstlineno == 0 else self.co_firstlineno))
+
+
+class LazyPyCode(eval.Code):
+    """Stands for the code object of a function body that was not compiled
+    yet; see PyCF_LAZY_FUNCTIONS.  It keeps the AST of the body and the
+    scopes found in it (not the AST and the symbol table of the whole
+    module), and runs the code generator when the function is called
+    for the first time or when the code object is needed for some other
+    reason (e.g. __code__, co_consts or marshal).  Only the attributes
+    needed by MAKE_FUNCTION are available before that.
+    """
+    _immutable_fields_ = ['lazy_freevars[*]']
+
+    FUNCTION = 0
+    ASYNC_FUNCTION = 1
+    LAMBDA = 2
+
+    def __init__(self, space, kind, name, node, lineno, symbols,
+                 compile_info, qualname, freevars):
+        eval.Code.__init__(self, name)
+        self.space = space
+        self.kind = kind
+        self.node = node
+        self.lineno = lineno
+        self.symbols = symbols
+        self.compile_info = compile_info
+        self.qualname = qualname
+        # the co_freevars of the future code object, for MAKE_CLOSURE
+        self.lazy_freevars = make_sure_not_resized(freevars)
+        self.w_code = None
+
+    def current_code(self):
+        """The real code object if it was already built, else self."""
+        if self.w_code is not None:
+            return self.w_code
+        return self
+
+    @jit.dont_look_inside
+    def materialize(self):
+        if self.w_code is not None:
+            return self.w_code
+        from pypy.interpreter.astcompiler import codegen
+        from pypy.interpreter.pyparser.error import SyntaxError
+        space = self.space
+        if self.kind == self.FUNCTION:
+            kind = codegen.FunctionCodeGenerator
+        elif self.kind == self.ASYNC_FUNCTION:
+            kind = codegen.AsyncFunctionCodeGenerator
+        else:
+            kind = codegen.LambdaCodeGenerator
+        try:
+            generator = kind(space, self.co_name, self.node, self.lineno,
+                             self.symbols, self.compile_info, self.qualname)
+            w_code = generator.assemble()
+        except SyntaxError as e:
+            raise OperationError(space.w_SyntaxError, e.wrap_info(space))
+        self.w_code = w_code
+        # the AST and the symbol table are not needed any more
+        self.node = None
+        self.symbols = None
+        self.compile_info = None
+        return w_code
+
+    def _materialize_for(self, func):
+        code = self.materialize()
+        if func.code is self:
+            func.code = code
+        return code
+
+    def funcrun(self, func, args):
+        return self._materialize_for(func).funcrun(func, args)
+
+    def funcrun_obj(self, func, w_obj, args):
+        return self._materialize_for(func).funcrun_obj(func, w_obj, args)
+
+    def signature(self):
+        return self.materialize().signature()
+
+    def getvarnames(self):
+        return self.materialize().getvarnames()
+
+    def getdocstring(self, space):
+        return self.materialize().getdocstring(space)
@@ -17,7 +17,7 @@ from pypy.interpreter import (
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.error import OperationError, oefmt
 from pypy.interpreter.nestedscope import Cell
-from pypy.interpreter.pycode import PyCode, BytecodeCorruption
+from pypy.interpreter.pycode import PyCode, LazyPyCode, BytecodeCorruption
 from pypy.tool.stdlib_opcode import bytecode_spec
 
 CANNOT_CATCH_MSG = ("catching classes that don't inherit from BaseException "
@@ -1335,7 +1335,10 @@ class __extend__(pyframe.PyFrame):
         w_qualname = self.popvalue()
         qualname = self.space.unicode_w(w_qualname)
         w_codeobj = self.popvalue()
-        codeobj = self.space.interp_w(PyCode, w_codeobj)
+        if isinstance(w_codeobj, LazyPyCode):
+            codeobj = w_codeobj.current_code()
+        else:
+            codeobj = self.space.interp_w(PyCode, w_codeobj)
         if freevars is not None:
             # Pop freevars
             self.popvalue()
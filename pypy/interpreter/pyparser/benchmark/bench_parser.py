@@ -0,0 +1,70 @@
+"""Measures the speed of the parser and of the bytecode compiler on the
+standard library.
+
+    pypy3 bench_parser.py [DIRECTORY...] [--repeat=N]
+
+All the .py files in the DIRECTORYs (by default, the directory of the
+standard library) are read once; then they are parsed to ASTs and
+compiled to code objects N times.  The throughput is printed in lines
+per second.  See also bench_tokenizer.py for the tokenizer alone.
+"""
+
+import os
+import sys
+import time
+import warnings
+import _ast
+
+
+def collect(directories):
+    sources = []
+    for directory in directories:
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [name for name in dirnames
+                           if name not in ('__pycache__', 'site-packages')]
+            for name in sorted(filenames):
+                if not name.endswith('.py'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    with open(path, 'rb') as f:
+                        source = f.read()
+                    compile(source, path, 'exec', dont_inherit=True)
+                except (OSError, SyntaxError, ValueError):
+                    continue
+                sources.append((path, source))
+    return sources
+
+
+def bench(name, sources, repeat, flags):
+    nlines = sum(source.count(b'\n') for path, source in sources) * repeat
+    t0 = time.time()
+    for i in range(repeat):
+        for path, source in sources:
+            compile(source, path, 'exec', flags, dont_inherit=True)
+    seconds = time.time() - t0
+    print("%-12s %8.3f s  %10.0f lines/s" % (name, seconds,
+                                              nlines / seconds))
+
+
+def main(argv):
+    repeat = 3
+    directories = []
+    for arg in argv[1:]:
+        if arg.startswith('--repeat='):
+            repeat = int(arg[len('--repeat='):])
+        else:
+            directories.append(arg)
+    if not directories:
+        directories = [os.path.dirname(os.__file__)]
+    warnings.simplefilter('ignore')
+    sources = collect(directories)
+    print("%d files, %d lines, %d runs" % (
+        len(sources), sum(source.count(b'\n') for path, source in sources),
+        repeat))
+    bench("parse", sources, repeat, _ast.PyCF_ONLY_AST)
+    bench("compile", sources, repeat, 0)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,61 @@
+"""Measures the speed of the untranslated tokenizer, i.e. of
+pytokenizer.generate_tokens() running on top of the host Python.
+
+    python2 bench_tokenizer.py [DIRECTORY...] [--repeat=N]
+
+The absolute numbers say little about a translated pypy, but the ratio
+between two versions of the tokenizer is a good first estimate.  By
+default, the files of lib-python/3 are tokenized.
+"""
+
+import os
+import sys
+import time
+
+pypydir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       '..', '..', '..', '..')
+sys.path.insert(0, os.path.normpath(pypydir))
+
+from pypy.interpreter.pyparser import pytokenizer
+from pypy.interpreter.pyparser.error import TokenError
+
+
+def collect(directories):
+    sources = []
+    for directory in directories:
+        for dirpath, dirnames, filenames in os.walk(directory):
+            for name in sorted(filenames):
+                if name.endswith('.py'):
+                    with open(os.path.join(dirpath, name), 'rb') as f:
+                        sources.append(f.read().splitlines(True))
+    return sources
+
+
+def main(argv):
+    repeat = 3
+    directories = []
+    for arg in argv[1:]:
+        if arg.startswith('--repeat='):
+            repeat = int(arg[len('--repeat='):])
+        else:
+            directories.append(arg)
+    if not directories:
+        directories = [os.path.join(pypydir, 'lib-python', '3')]
+    sources = collect(directories)
+    nlines = sum(len(lines) for lines in sources)
+    ntokens = 0
+    t0 = time.time()
+    for i in range(repeat):
+        for lines in sources:
+            try:
+                ntokens += len(pytokenizer.generate_tokens(list(lines), 0))
+            except TokenError:
+                pass
+    seconds = time.time() - t0
+    print "%d files, %d lines, %d runs" % (len(sources), nlines, repeat)
+    print "%.3f s  %.0f lines/s  %.0f tokens/s" % (
+        seconds, nlines * repeat / seconds, ntokens / seconds)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
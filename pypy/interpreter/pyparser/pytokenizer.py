@@ -3,7 +3,7 @@ from pypy.interpreter.pyparser.parser import Token
 from pypy.interpreter.pyparser.pygram import tokens
 from pypy.interpreter.pyparser.pytoken import python_opmap
 from pypy.interpreter.pyparser.error import TokenError, TokenIndentationError, TabError
-from pypy.interpreter.pyparser.pytokenize import tabsize, alttabsize, whiteSpaceDFA, \
+from pypy.interpreter.pyparser.pytokenize import tabsize, alttabsize, \
     triple_quoted, endDFAs, single_quoted, pseudoDFA
 from pypy.interpreter.astcompiler import consts
 
@@ -82,6 +82,87 @@ def verify_identifier(token):
     return _isidentifier(u)
 
 
+# Character classes for the fast path of the tokenizer, which handles the
+# most common tokens with table lookups instead of running pseudoDFA.
+_CLS_OTHER = 'x'      # needs pseudoDFA (including all non-ASCII bytes)
+_CLS_NAME = 'a'       # can start a name
+_CLS_DIGIT = '0'
+_CLS_PUNCT = 'p'      # a token on its own, whatever follows
+_CLS_DOT = '.'
+_CLS_SPACE = ' '
+_CLS_QUOTE = 'q'
+
+def _make_char_classes():
+    classes = [_CLS_OTHER] * 256
+    for c in NAMECHARS:
+        classes[ord(c)] = _CLS_NAME
+    for c in NUMCHARS:
+        classes[ord(c)] = _CLS_DIGIT
+    for c in '()[]{},;:~\n':
+        classes[ord(c)] = _CLS_PUNCT
+    for c in ' \t\f':
+        classes[ord(c)] = _CLS_SPACE
+    classes[ord('.')] = _CLS_DOT
+    classes[ord("'")] = _CLS_QUOTE
+    classes[ord('"')] = _CLS_QUOTE
+    return ''.join(classes)
+CHAR_CLASSES = _make_char_classes()
+
+def skip_whitespace(line, pos, max):
+    while pos < max and CHAR_CLASSES[ord(line[pos])] == _CLS_SPACE:
+        pos += 1
+    return pos
+
+def match_simple_token(line, start, max):
+    """Returns the end of the token starting at 'start' if it is an ASCII
+    name, a decimal integer or a single-character punctuation, and -1 for
+    all other tokens, which must be matched with pseudoDFA."""
+    if start >= max:
+        return -1
+    cls = CHAR_CLASSES[ord(line[start])]
+    if cls == _CLS_PUNCT:
+        return start + 1
+    if cls == _CLS_NAME or (cls == _CLS_DIGIT and line[start] != '0'):
+        end = start + 1
+        while end < max:
+            nextcls = CHAR_CLASSES[ord(line[end])]
+            if nextcls == _CLS_DIGIT or (nextcls == _CLS_NAME and
+                                         cls == _CLS_NAME):
+                end += 1
+            elif nextcls == _CLS_SPACE or nextcls == _CLS_PUNCT:
+                return end
+            elif cls == _CLS_NAME:
+                # a string prefix, or a non-ASCII identifier
+                if nextcls == _CLS_QUOTE or nextcls == _CLS_OTHER:
+                    return -1
+                return end
+            else:
+                return -1     # a float, an imaginary number, etc.
+        return end
+    if cls == _CLS_DOT:
+        if start + 1 < max:
+            nextcls = CHAR_CLASSES[ord(line[start + 1])]
+            if nextcls == _CLS_DIGIT or nextcls == _CLS_DOT:
+                return -1     # a float or '...'
+        return start + 1
+    return -1
+
+
+def match_string_end(endDFA, endquote, line, pos):
+    """Returns the end of the string literal whose remaining part starts
+    at 'pos', or -1 if it does not end on this line.  Unless there are
+    backslashes, it is found with a plain search for 'endquote' instead
+    of running endDFA."""
+    if endquote:
+        end = line.find(endquote, pos)
+        if end < 0:
+            if line.find('\\', pos) < 0:
+                return -1
+        elif line.find('\\', pos, end) < 0:
+            return end + len(endquote)
+    return endDFA.recognize(line, pos)
+
+
 DUMMY_DFA = automata.DFA([], [])
 
 def generate_tokens(lines, flags):
@@ -114,8 +195,8 @@ def generate_tokens(lines, flags):
     lnum = continued = 0
     namechars = NAMECHARS
     numchars = NUMCHARS
-    contstr, needcont = '', 0
-    contline = None
+    contstr, needcont = [], 0
+    endquote = ''
     indents = [0]
     altindents = [0]
     last_comment = ''
@@ -142,27 +223,26 @@ def generate_tokens(lines, flags):
                     "end of file (EOF) while scanning triple-quoted string literal",
                     strstart[2], strstart[0], strstart[1]+1,
                     token_list, lnum-1)
-            endmatch = endDFA.recognize(line)
+            endmatch = match_string_end(endDFA, endquote, line, 0)
             if endmatch >= 0:
                 pos = end = endmatch
-                tok = Token(tokens.STRING, contstr + line[:end], strstart[0],
+                contstr.append(line[:end])
+                tok = Token(tokens.STRING, ''.join(contstr), strstart[0],
                        strstart[1], line)
                 token_list.append(tok)
                 last_comment = ''
-                contstr, needcont = '', 0
-                contline = None
+                contstr, needcont = [], 0
             elif (needcont and not line.endswith('\\\n') and
                                not line.endswith('\\\r\n')):
-                tok = Token(tokens.ERRORTOKEN, contstr + line, strstart[0],
+                contstr.append(line)
+                tok = Token(tokens.ERRORTOKEN, ''.join(contstr), strstart[0],
                        strstart[1], line)
                 token_list.append(tok)
                 last_comment = ''
-                contstr = ''
-                contline = None
+                contstr = []
                 continue
             else:
-                contstr = contstr + line
-                contline = contline + line
+                contstr.append(line)
                 continue
 
         elif not parenstack and not continued:  # new statement
@@ -230,12 +310,11 @@ def generate_tokens(lines, flags):
             continued = 0
 
         while pos < max:
-            pseudomatch = pseudoDFA.recognize(line, pos)
+            start = skip_whitespace(line, pos, max)
+            pseudomatch = match_simple_token(line, start, max)
+            if pseudomatch < 0:
+                pseudomatch = pseudoDFA.recognize(line, pos)
             if pseudomatch >= 0:                            # scan for tokens
-                # JDR: Modified
-                start = whiteSpaceDFA.recognize(line, pos)
-                if start < 0:
-                    start = pos
                 end = pseudomatch
 
                 if start == end:
@@ -244,6 +323,7 @@ def generate_tokens(lines, flags):
 
                 pos = end
                 token, initial = line[start:end], line[start]
+                last = line[end - 1]
                 if (initial in numchars or \
                    (initial == '.' and token != '.' and token != '...')):
                     # ordinary number
@@ -262,36 +342,9 @@ def generate_tokens(lines, flags):
                         raise bad_utf8("comment",
                                        line, lnum, start, token_list, flags)
                     last_comment = token
-                elif token in triple_quoted:
-                    endDFA = endDFAs[token]
-                    endmatch = endDFA.recognize(line, pos)
-                    if endmatch >= 0:                     # all on one line
-                        pos = endmatch
-                        token = line[start:pos]
-                        tok = Token(tokens.STRING, token, lnum, start, line)
-                        token_list.append(tok)
-                        last_comment = ''
-                    else:
-                        strstart = (lnum, start, line)
-                        contstr = line[start:]
-                        contline = line
-                        break
-                elif initial in single_quoted or \
-                    token[:2] in single_quoted or \
-                    token[:3] in single_quoted:
-                    if token[-1] == '\n':                  # continued string
-                        strstart = (lnum, start, line)
-                        endDFA = (endDFAs[initial] or endDFAs[token[1]] or
-                                   endDFAs[token[2]])
-                        contstr, needcont = line[start:], 1
-                        contline = line
-                        break
-                    else:                                  # ordinary string
-                        tok = Token(tokens.STRING, token, lnum, start, line)
-                        token_list.append(tok)
-                        last_comment = ''
-                elif (initial in namechars or              # ordinary name
-                      ord(initial) >= 0x80):               # unicode identifier
+                elif ((initial in namechars or             # ordinary name
+                       ord(initial) >= 0x80) and           # unicode identifier
+                      last not in '\'"\n'):                # not a string
                     valid = verify_identifier(token)
                     if valid <= 0:
                         if valid == -1:
@@ -328,6 +381,36 @@ def generate_tokens(lines, flags):
                     else:
                         token_list.append(Token(tokens.NAME, token, lnum, start, line))
                     last_comment = ''
+                elif last in '\'"' and token in triple_quoted:
+                    endDFA = endDFAs[token]
+                    quote_start = len(token) - 3
+                    assert quote_start >= 0
+                    endquote = token[quote_start:]
+                    endmatch = match_string_end(endDFA, endquote, line, pos)
+                    if endmatch >= 0:                     # all on one line
+                        pos = endmatch
+                        token = line[start:pos]
+                        tok = Token(tokens.STRING, token, lnum, start, line)
+                        token_list.append(tok)
+                        last_comment = ''
+                    else:
+                        strstart = (lnum, start, line)
+                        contstr = [line[start:]]
+                        break
+                elif last in '\'"\n' and (initial in single_quoted or
+                                           token[:2] in single_quoted or
+                                           token[:3] in single_quoted):
+                    if token[-1] == '\n':                  # continued string
+                        strstart = (lnum, start, line)
+                        endDFA = (endDFAs[initial] or endDFAs[token[1]] or
+                                   endDFAs[token[2]])
+                        endquote = ''
+                        contstr, needcont = [line[start:]], 1
+                        break
+                    else:                                  # ordinary string
+                        tok = Token(tokens.STRING, token, lnum, start, line)
+                        token_list.append(tok)
+                        last_comment = ''
                 elif initial == '\\':                      # continued stmt
                     continued = 1
                 elif initial == '$':
@@ -359,9 +442,6 @@ def generate_tokens(lines, flags):
                     token_list.append(Token(punct, token, lnum, start, line))
                     last_comment = ''
             else:
-                start = whiteSpaceDFA.recognize(line, pos)
-                if start < 0:
-                    start = pos
                 if start<max and line[start] in single_quoted:
                     raise TokenError("end of line (EOL) while scanning string literal",
                              line, lnum, start+1, token_list)
@@ -65,3 +65,35 @@ class TestTokenizer(object):
 
     def test_eof_triple_quoted(self):
         check_token_error("'''", pos=1, line=1)
+
+    def test_fast_path_same_as_dfa(self):
+        from pypy.interpreter.pyparser.pytokenize import pseudoDFA
+        for line in ["abc.def(x1, 23)\n", "x = 1if y else 2\n", "a.b\n",
+                     "x = 12.5 + 3j + 1e5 + 0x1F + 00\n", "b'x' + rb'y'\n",
+                     "f(*a, **k)[1:2, ...]\n", "abc\xc3\xa9 = 1\n",
+                     "x = 1_000\n", "  x\t;\x0cy ~z\n"]:
+            pos = 0
+            while pos < len(line):
+                start = pytokenizer.skip_whitespace(line, pos, len(line))
+                end = pytokenizer.match_simple_token(line, start, len(line))
+                dfa_end = pseudoDFA.recognize(line, pos)
+                assert dfa_end > pos
+                if end >= 0:
+                    assert end == dfa_end
+                pos = dfa_end
+
+    def test_string_end(self):
+        from pypy.interpreter.pyparser.pytokenize import endDFAs
+        for line, quote in [("abc'''x", "'''"), ("a\\'''b'''c", "'''"),
+                            ('a""b"""', '"""'), ("abc\n", "'''"),
+                            ("ab\\\n", "'''"), ("ab'c", "'")]:
+            endDFA = endDFAs[quote]
+            assert (pytokenizer.match_string_end(endDFA, quote, line, 0) ==
+                    endDFA.recognize(line, 0))
+
+    def test_multiline_strings(self):
+        line = "x = '''a\nb\\'''\nc'''\n"
+        tks = tokenize(line)
+        assert tks[2].token_type == tokens.STRING
+        assert tks[2].value == "'''a\nb\\'''\nc'''"
+        assert (tks[2].lineno, tks[2].column) == (1, 4)
@@ -783,6 +783,17 @@ class TestNonInteractive:
                     "('quux', 'cdrom.com=FreeBSD'), ('x', 'X,d=e')]")
         assert expected in data
 
+    def test_xoption_tracemalloc(self):
+        data = self.run('-X tracemalloc=5 -c "import _tracemalloc;'
+                        'print(_tracemalloc.get_traceback_limit())"')
+        if 'ignored' in data:
+            assert ('Warning: -X tracemalloc ignored, the _tracemalloc '
+                    'module is not available') in data
+        else:
+            assert data == '5\n'
+            data = self.run('-X tracemalloc=0 -c "pass"')
+            assert 'Warning: invalid -X tracemalloc:' in data
+
     def test_pythoninspect_doesnt_override_isatty(self):
         os.environ['PYTHONINSPECT_'] = '1'
         try:
@@ -1312,6 +1312,22 @@ class AppTestOptimizer(object):
         assert i > -1
         assert isinstance(co.co_consts[i], frozenset)
 
+    def test_fold_debug(self):
+        source = """if __debug__:
+    x = 1
+else:
+    x = 2
+y = 3 if __debug__ else 4
+"""
+        for optimize, expected in [(-1, (1, 3)), (0, (1, 3)), (1, (2, 4)),
+                                   (2, (2, 4))]:
+            co = compile(source, '', 'exec', optimize=optimize)
+            ns = {}
+            exec(co, ns)
+            assert (ns['x'], ns['y']) == expected
+            if optimize >= 0:
+                assert '__debug__' not in co.co_names
+
     def test_call_method_kwargs(self):
         if not self.is_pypy():
             skip("CALL_METHOD exists only on pypy")
@@ -1341,6 +1357,77 @@ class AppTestOptimizer(object):
         assert ns['y'] is ns['z']
 
 
+class AppTestLazyFunctions:
+    def test_call(self):
+        from _ast import PyCF_LAZY_FUNCTIONS
+        source = """def f(a, b=2, *args, c=3, **kw):
+    "doc"
+    return (a, b, args, c, kw)
+g = lambda x: x * 2
+async def h():
+    pass
+"""
+        ns = {}
+        exec(compile(source, '<lazy>', 'exec', PyCF_LAZY_FUNCTIONS), ns)
+        assert ns['f'](1) == (1, 2, (), 3, {})
+        assert ns['f'](1, 5, 6, c=7, d=8) == (1, 5, (6,), 7, {'d': 8})
+        assert ns['f'].__doc__ == "doc"
+        assert ns['g'](21) == 42
+        assert ns['h'].__code__.co_flags & 0x80     # CO_COROUTINE
+        assert ns['f'].__qualname__ == 'f'
+        assert ns['g'].__name__ == '<lambda>'
+
+    def test_closures(self):
+        from _ast import PyCF_LAZY_FUNCTIONS
+        source = """def outer(x):
+    y = x + 1
+    def inner(z):
+        return x + y + z
+    return inner
+class A:
+    def m(self):
+        return __class__
+"""
+        ns = {}
+        exec(compile(source, '<lazy>', 'exec', PyCF_LAZY_FUNCTIONS), ns)
+        inner = ns['outer'](10)
+        assert inner(100) == 121
+        assert inner.__code__.co_freevars == ('x', 'y')
+        assert inner.__qualname__ == 'outer.<locals>.inner'
+        assert ns['A']().m() is ns['A']
+
+    def test_code_objects(self):
+        from _ast import PyCF_LAZY_FUNCTIONS
+        import marshal, types
+        source = """def f(x):
+    def g():
+        return x
+    return g
+"""
+        lazy = compile(source, '<lazy>', 'exec', PyCF_LAZY_FUNCTIONS)
+        eager = compile(source, '<lazy>', 'exec')
+        code_f = [c for c in lazy.co_consts if isinstance(c, types.CodeType)]
+        assert len(code_f) == 1
+        assert code_f[0].co_name == 'f'
+        assert lazy == eager
+        assert marshal.loads(marshal.dumps(lazy)) == eager
+        ns = {}
+        exec(marshal.loads(marshal.dumps(lazy)), ns)
+        assert ns['f'](5)() == 5
+
+    def test_error_deferred(self):
+        from _ast import PyCF_LAZY_FUNCTIONS
+        source = """def f():
+    break
+"""
+        raises(SyntaxError, compile, source, '<lazy>', 'exec')
+        ns = {}
+        exec(compile(source, '<lazy>', 'exec', PyCF_LAZY_FUNCTIONS), ns)
+        exc = raises(SyntaxError, ns['f'])
+        assert exc.value.lineno == 2
+        raises(SyntaxError, getattr, ns['f'], '__code__')
+
+
 class AppTestExceptions:
     def test_indentation_error(self):
         source = """if 1:
@@ -30,7 +30,7 @@ in addition to any features explicitly specified.
     ec = space.getexecutioncontext()
     if flags & ~(ec.compiler.compiler_flags | consts.PyCF_ONLY_AST |
                  consts.PyCF_DONT_IMPLY_DEDENT | consts.PyCF_SOURCE_IS_UTF8 |
-                 consts.PyCF_ACCEPT_NULL_BYTES):
+                 consts.PyCF_ACCEPT_NULL_BYTES | consts.PyCF_LAZY_FUNCTIONS):
         raise oefmt(space.w_ValueError, "compile() unrecognized flags")
 
     if not dont_inherit:
@@ -125,7 +125,7 @@ def build_class(space, w_func, w_name, __args__):
                          keywords=keywords,
                          keywords_w=kwds_w.values())
         w_namespace = space.call_args(w_prep, args)
-    code = w_func.getcode()
+    code = w_func.materialize_code()
     frame = space.createframe(code, w_func.w_func_globals, w_func)
     frame.setdictscope(w_namespace)
     w_cell = frame.run()
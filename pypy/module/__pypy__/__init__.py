@@ -71,6 +71,7 @@ class Module(MixedModule):
     """ PyPy specific "magic" functions. A lot of them are experimental and
     subject to change, many are internal. """
     appleveldefs = {
+        'sorteddict'                : 'app_sorteddict.sorteddict',
     }
 
     interpleveldefs = {
@@ -99,6 +100,8 @@ class Module(MixedModule):
         'delitem_if_value_is'       : 'interp_dict.delitem_if_value_is',
         'move_to_end'               : 'interp_dict.move_to_end',
         'strategy'                  : 'interp_magic.strategy',  # dict,set,list
+        'mapdict_stats'             : 'interp_magic.mapdict_stats',
+        'type_version_tag_bumps'    : 'interp_magic.type_version_tag_bumps',
         'set_debug'                 : 'interp_magic.set_debug',
         'locals_to_fast'            : 'interp_magic.locals_to_fast',
         'set_code_callback'         : 'interp_magic.set_code_callback',
@@ -129,8 +132,12 @@ class Module(MixedModule):
                                  'interp_magic.method_cache_counter')
             self.extra_interpdef('reset_method_cache_counter',
                                  'interp_magic.reset_method_cache_counter')
+            self.extra_interpdef('method_cache_stats',
+                                 'interp_magic.method_cache_stats')
             self.extra_interpdef('mapdict_cache_counter',
                                  'interp_magic.mapdict_cache_counter')
+            self.extra_interpdef('mapdict_code_cache_counter',
+                                 'interp_magic.mapdict_code_cache_counter')
         PYC_MAGIC = get_pyc_magic(self.space)
         self.extra_interpdef('PYC_MAGIC', 'space.wrap(%d)' % PYC_MAGIC)
         try:
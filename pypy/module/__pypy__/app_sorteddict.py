@@ -0,0 +1,298 @@
+
+def _bisect_left(a, x, lo=0):
+    hi = len(a)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if a[mid] < x:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def _bisect_right(a, x, lo=0):
+    hi = len(a)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if x < a[mid]:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+class sorteddict(dict):
+    """A dict that iterates over its keys in sorted order.
+
+    Lookups, assignments and deletions are done by the underlying dict,
+    so they use the usual dict strategies (e.g. for int keys) and are
+    traced by the JIT as usual.  In addition, the keys are kept in a
+    two-level sorted index (a list of sorted blocks of at most a few
+    hundred keys), which gives insertion and deletion in O(log n)
+    comparisons plus a short memmove, and the order-statistics methods
+    bisect_left(), bisect_right(), index(), keyat(), peekitem() and
+    irange().  The positions are found with a Fenwick tree over the
+    sizes of the blocks, so they take O(log n) too.
+
+    All keys must be mutually comparable with '<'.  Changing the dict
+    through dict methods called explicitly, e.g.
+    dict.__setitem__(d, k, v), bypasses the index and is not supported.
+    """
+
+    _LOAD = 256
+
+    def __init__(self, *args, **kwds):
+        dict.__init__(self)
+        self._blocks = []    # sorted lists of keys, each non-empty
+        self._maxes = []     # the last key of each block
+        self._tree = None    # Fenwick tree over the sizes of the blocks
+        self.update(*args, **kwds)
+
+    # ---------- the sorted index ----------
+
+    def _index_insert(self, key):
+        maxes = self._maxes
+        if not maxes:
+            self._blocks.append([key])
+            maxes.append(key)
+            self._tree = None
+            return
+        pos = _bisect_right(maxes, key)
+        if pos == len(maxes):
+            pos -= 1
+            self._blocks[pos].append(key)
+            maxes[pos] = key
+        else:
+            block = self._blocks[pos]
+            block.insert(_bisect_right(block, key), key)
+        block = self._blocks[pos]
+        if len(block) > 2 * self._LOAD:
+            half = block[self._LOAD:]
+            del block[self._LOAD:]
+            maxes[pos] = block[-1]
+            self._blocks.insert(pos + 1, half)
+            maxes.insert(pos + 1, half[-1])
+            self._tree = None    # once every _LOAD insertions at most
+        else:
+            self._tree_add(pos, 1)
+
+    def _index_remove(self, key):
+        maxes = self._maxes
+        pos = _bisect_left(maxes, key)
+        block = self._blocks[pos]
+        del block[_bisect_left(block, key)]
+        if not block:
+            del self._blocks[pos]
+            del maxes[pos]
+            self._tree = None
+        else:
+            maxes[pos] = block[-1]
+            self._tree_add(pos, -1)
+
+    def _get_tree(self):
+        """Returns the Fenwick tree: tree[i] is the total size of the
+        blocks i & (i + 1) to i.  It is rebuilt in O(number of blocks)
+        only after a block is added or removed, and otherwise updated
+        in place by _tree_add()."""
+        tree = self._tree
+        if tree is None:
+            tree = [len(block) for block in self._blocks]
+            n = len(tree)
+            for i in range(n):
+                j = i | (i + 1)
+                if j < n:
+                    tree[j] += tree[i]
+            self._tree = tree
+        return tree
+
+    def _tree_add(self, pos, delta):
+        tree = self._tree
+        if tree is not None:
+            n = len(tree)
+            while pos < n:
+                tree[pos] += delta
+                pos |= pos + 1
+
+    def _offset(self, pos):
+        """Returns the position of the first key of block 'pos'."""
+        tree = self._get_tree()
+        total = 0
+        pos -= 1
+        while pos >= 0:
+            total += tree[pos]
+            pos = (pos & (pos + 1)) - 1
+        return total
+
+    def _locate(self, index):
+        """Returns (block number, index in block) of the key at 'index'."""
+        length = dict.__len__(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("sorteddict index out of range")
+        tree = self._get_tree()
+        n = len(tree)
+        pos = 0
+        bit = 1 << (n.bit_length() - 1)
+        while bit:
+            end = pos + bit
+            if end <= n and tree[end - 1] <= index:
+                index -= tree[end - 1]
+                pos = end
+            bit >>= 1
+        return pos, index
+
+    # ---------- the dict interface ----------
+
+    def __setitem__(self, key, value):
+        if not dict.__contains__(self, key):
+            self._index_insert(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._index_remove(key)
+
+    def __iter__(self):
+        for block in self._blocks:
+            for key in block:
+                yield key
+
+    def __reversed__(self):
+        for block in reversed(self._blocks):
+            for key in reversed(block):
+                yield key
+
+    def __repr__(self):
+        return '%s({%s})' % (self.__class__.__name__, ', '.join(
+            ['%r: %r' % (key, self[key]) for key in self]))
+
+    def keys(self):
+        from _collections_abc import KeysView
+        return KeysView(self)
+
+    def values(self):
+        from _collections_abc import ValuesView
+        return ValuesView(self)
+
+    def items(self):
+        from _collections_abc import ItemsView
+        return ItemsView(self)
+
+    def setdefault(self, key, default=None):
+        if not dict.__contains__(self, key):
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def pop(self, key, *default):
+        if dict.__contains__(self, key):
+            self._index_remove(key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self, index=-1):
+        """Removes and returns the (key, value) pair at 'index' in the
+        sorted order, the largest key by default."""
+        if not self:
+            raise KeyError('popitem(): dictionary is empty')
+        key = self.keyat(index)
+        return key, self.pop(key)
+
+    def update(self, *args, **kwds):
+        if len(args) > 1:
+            raise TypeError('update expected at most 1 arguments, got %d'
+                            % len(args))
+        if args:
+            other = args[0]
+            if hasattr(other, 'keys'):
+                for key in other.keys():
+                    self[key] = other[key]
+            else:
+                for key, value in other:
+                    self[key] = value
+        for key in kwds:
+            self[key] = kwds[key]
+
+    def clear(self):
+        dict.clear(self)
+        del self._blocks[:]
+        del self._maxes[:]
+        self._tree = None
+
+    def copy(self):
+        return self.__class__(self)
+
+    @classmethod
+    def fromkeys(cls, iterable, value=None):
+        d = cls()
+        for key in iterable:
+            d[key] = value
+        return d
+
+    def __reduce__(self):
+        return (self.__class__, (list(self.items()),))
+
+    # ---------- order statistics ----------
+
+    def bisect_left(self, key):
+        """Returns the number of keys smaller than 'key'."""
+        pos = _bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return dict.__len__(self)
+        return self._offset(pos) + _bisect_left(self._blocks[pos], key)
+
+    def bisect_right(self, key):
+        """Returns the number of keys smaller than or equal to 'key'."""
+        pos = _bisect_right(self._maxes, key)
+        if pos == len(self._maxes):
+            return dict.__len__(self)
+        return self._offset(pos) + _bisect_right(self._blocks[pos], key)
+
+    def index(self, key):
+        """Returns the position of 'key' in the sorted order."""
+        if not dict.__contains__(self, key):
+            raise KeyError(key)
+        return self.bisect_left(key)
+
+    def keyat(self, index):
+        """Returns the key at position 'index' in the sorted order."""
+        pos, i = self._locate(index)
+        return self._blocks[pos][i]
+
+    def peekitem(self, index=-1):
+        """Returns the (key, value) pair at position 'index' in the sorted
+        order, the largest key by default."""
+        key = self.keyat(index)
+        return key, dict.__getitem__(self, key)
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, False)):
+        """Iterates in sorted order over the keys between 'minimum' and
+        'maximum'.  None means unbounded; 'inclusive' tells whether each
+        of the bounds is included."""
+        if not self._blocks:
+            return
+        if minimum is None:
+            pos, i = 0, 0
+        else:
+            if inclusive[0]:
+                pos = _bisect_left(self._maxes, minimum)
+            else:
+                pos = _bisect_right(self._maxes, minimum)
+            if pos == len(self._maxes):
+                return
+            block = self._blocks[pos]
+            if inclusive[0]:
+                i = _bisect_left(block, minimum)
+            else:
+                i = _bisect_right(block, minimum)
+        blocks = self._blocks
+        while pos < len(blocks):
+            block = blocks[pos]
+            while i < len(block):
+                key = block[i]
+                if maximum is not None:
+                    if maximum < key or (maximum == key and
+                                         not inclusive[1]):
+                        return
+                yield key
+                i += 1
+            pos += 1
+            i = 0
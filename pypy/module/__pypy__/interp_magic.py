@@ -45,10 +45,41 @@ def reset_method_cache_counter(space):
     cache = space.fromcache(MethodCache)
     cache.misses = {}
     cache.hits = {}
+    cache.invalidations = 0
     cache = space.fromcache(MapAttrCache)
     cache.misses = {}
     cache.hits = {}
 
+def method_cache_stats(space):
+    """Return a dict with the 'size' of the method cache, the total number
+    of 'hits' and 'misses' for all method names, and the number of
+    'invalidations', i.e. of changes to the version tag of a type."""
+    assert space.config.objspace.std.withmethodcachecounter
+    cache = space.fromcache(MethodCache)
+    hits = 0
+    for count in cache.hits.values():
+        hits += count
+    misses = 0
+    for count in cache.misses.values():
+        misses += count
+    w_result = space.newdict()
+    space.setitem_str(w_result, "size", space.newint(len(cache.versions)))
+    space.setitem_str(w_result, "hits", space.newint(hits))
+    space.setitem_str(w_result, "misses", space.newint(misses))
+    space.setitem_str(w_result, "invalidations",
+                      space.newint(cache.invalidations))
+    return w_result
+
+def type_version_tag_bumps(space, w_type):
+    """Return how many times the given type was changed in a way that
+    invalidates the method cache entries for it, e.g. by setting or
+    deleting one of its attributes.  Changes to a base class count too.
+    Run with PYPYLOG=version-tag:file to see every change."""
+    from pypy.objspace.std.typeobject import W_TypeObject
+    if not isinstance(w_type, W_TypeObject):
+        raise oefmt(space.w_TypeError, "expecting a type object")
+    return space.newint(w_type.version_tag_bumps)
+
 @unwrap_spec(name='text')
 def mapdict_cache_counter(space, name):
     """Return a tuple (index_cache_hits, index_cache_misses) for lookups
@@ -73,7 +104,7 @@ def hidden_applevel(space, w_func):
     """Decorator that hides a function's frame from app-level"""
     from pypy.interpreter.function import Function
     func = space.interp_w(Function, w_func)
-    func.getcode().hidden_applevel = True
+    func.materialize_code().hidden_applevel = True
     return w_func
 
 @unwrap_spec(meth='text')
@@ -105,6 +136,53 @@ def strategy(space, w_obj):
         raise oefmt(space.w_TypeError, "expecting dict or list or set object")
     return space.newtext(name)
 
+def mapdict_stats(space, w_type):
+    """ mapdict_stats(type)
+
+    Return a dict describing the maps (hidden classes) of the instances of
+    the given class: 'maps' is the number of maps, 'max_fanout' the largest
+    number of different attributes added to instances with the same map,
+    'max_length' the largest number of attributes in one map, and
+    'split_keys' the number of keys shared by the dicts of instances with
+    too many attributes.  Many maps or a large fan-out mean that the
+    attributes are added in varying orders, which makes the attribute
+    caches miss.
+    """
+    from pypy.objspace.std.typeobject import W_TypeObject
+    from pypy.objspace.std.mapdict import DictTerminator, map_tree_stats
+    if not isinstance(w_type, W_TypeObject):
+        raise oefmt(space.w_TypeError, "expecting a type object")
+    terminator = w_type.terminator
+    num_maps, max_fanout, max_length = map_tree_stats(terminator)
+    split_keys = 0
+    if isinstance(terminator, DictTerminator):
+        split_keys = len(terminator.shared_keys.keys)
+    w_result = space.newdict()
+    space.setitem_str(w_result, "maps", space.newint(num_maps))
+    space.setitem_str(w_result, "max_fanout", space.newint(max_fanout))
+    space.setitem_str(w_result, "max_length", space.newint(max_length))
+    space.setitem_str(w_result, "split_keys", space.newint(split_keys))
+    return w_result
+
+def mapdict_code_cache_counter(space, w_code):
+    """Return a list of (name, hits, misses) for the attribute caches of the
+    given code object, one per name that was looked up on an instance.
+    Sites with many misses are megamorphic: they see instances with many
+    different maps."""
+    from pypy.interpreter.pycode import PyCode
+    from pypy.objspace.std.mapdict import INVALID_CACHE_ENTRY
+    assert space.config.objspace.std.withmethodcachecounter
+    code = space.interp_w(PyCode, w_code)
+    result_w = []
+    for i in range(len(code._mapdict_caches)):
+        entry = code._mapdict_caches[i]
+        if entry is INVALID_CACHE_ENTRY:
+            continue
+        result_w.append(space.newtuple([code.co_names_w[i],
+                                        space.newint(entry.success_counter),
+                                        space.newint(entry.failure_counter)]))
+    return space.newlist(result_w)
+
 @unwrap_spec(sizehint=int)
 def resizelist_hint(space, w_list, sizehint):
     """ Reallocate the underlying storage of the argument list to sizehint """
@@ -0,0 +1,124 @@
+class AppTestSortedDict:
+    spaceconfig = dict(usemodules=['__pypy__'])
+
+    def test_basic(self):
+        from __pypy__ import sorteddict
+        d = sorteddict()
+        d[3] = 'c'
+        d[1] = 'a'
+        d[2] = 'b'
+        d[1] = 'A'
+        assert len(d) == 3
+        assert list(d) == [1, 2, 3]
+        assert list(d.keys()) == [1, 2, 3]
+        assert list(d.values()) == ['A', 'b', 'c']
+        assert list(d.items()) == [(1, 'A'), (2, 'b'), (3, 'c')]
+        assert list(reversed(d)) == [3, 2, 1]
+        assert d == {1: 'A', 2: 'b', 3: 'c'}
+        assert repr(d) == "sorteddict({1: 'A', 2: 'b', 3: 'c'})"
+        del d[2]
+        assert list(d) == [1, 3]
+        assert d.pop(1) == 'A'
+        assert d.pop(1, 42) == 42
+        raises(KeyError, d.pop, 1)
+        assert d.setdefault(0, 'z') == 'z'
+        assert d.setdefault(0, 'y') == 'z'
+        assert list(d) == [0, 3]
+        assert d.popitem() == (3, 'c')
+        d.clear()
+        assert list(d) == []
+        raises(KeyError, d.popitem)
+
+    def test_init_and_copy(self):
+        from __pypy__ import sorteddict
+        d = sorteddict([(5, 1), (-1, 2)])
+        assert list(d) == [-1, 5]
+        d2 = d.copy()
+        assert type(d2) is sorteddict
+        d2[0] = 0
+        assert list(d2) == [-1, 0, 5]
+        assert list(d) == [-1, 5]
+        d3 = sorteddict.fromkeys([3, 1, 2])
+        assert list(d3.items()) == [(1, None), (2, None), (3, None)]
+        d3.update({0: 1})
+        assert list(d3) == [0, 1, 2, 3]
+        raises(TypeError, "d3['x'] = 5")
+        assert 'x' not in d3
+        assert list(d3) == [0, 1, 2, 3]
+
+    def test_order_statistics(self):
+        from __pypy__ import sorteddict
+        d = sorteddict()
+        d._LOAD = 4     # exercise the block splitting
+        keys = list(range(0, 200, 2))
+        import random
+        random.seed(42)
+        shuffled = keys[:]
+        random.shuffle(shuffled)
+        for k in shuffled:
+            d[k] = k * 10
+        assert list(d) == keys
+        assert len(d._blocks) > 1
+        assert d.bisect_left(10) == 5
+        assert d.bisect_right(10) == 6
+        assert d.bisect_left(11) == 6
+        assert d.bisect_left(-5) == 0
+        assert d.bisect_left(1000) == 100
+        assert d.index(50) == 25
+        raises(KeyError, d.index, 51)
+        assert d.keyat(0) == 0
+        assert d.keyat(-1) == 198
+        assert d.keyat(37) == 74
+        raises(IndexError, d.keyat, 100)
+        assert d.peekitem(3) == (6, 60)
+        assert list(d.irange(10, 20)) == [10, 12, 14, 16, 18]
+        assert list(d.irange(11, 20, (True, True))) == [12, 14, 16, 18, 20]
+        assert list(d.irange(10, 14, (False, True))) == [12, 14]
+        assert list(d.irange(maximum=5)) == [0, 2, 4]
+        assert list(d.irange(195)) == [196, 198]
+        assert list(d.irange(500)) == []
+        for k in shuffled[:60]:
+            del d[k]
+        remaining = sorted(shuffled[60:])
+        assert list(d) == remaining
+        assert [d.keyat(i) for i in range(len(d))] == remaining
+        assert d.popitem(0) == (remaining[0], remaining[0] * 10)
+
+    def test_mixed_updates_and_positions(self):
+        from __pypy__ import sorteddict
+        import random
+        random.seed(12)
+        d = sorteddict()
+        d._LOAD = 4
+        keys = []
+        for i in range(300):
+            k = random.randrange(100)
+            if k in d:
+                del d[k]
+                keys.remove(k)
+            else:
+                d[k] = None
+                keys.append(k)
+                keys.sort()
+            if keys:
+                j = random.randrange(len(keys))
+                assert d.keyat(j) == keys[j]
+                assert d.index(keys[j]) == j
+        # the tree is updated in place, not rebuilt, by most changes
+        k = d.keyat(0)
+        tree = d._get_tree()
+        if len(d._blocks[0]) > 1:
+            del d[k]
+            assert d._tree is tree
+            d[k] = None
+            assert d._tree is tree
+
+    def test_uses_dict_strategy(self):
+        from __pypy__ import sorteddict, strategy
+        d = sorteddict()
+        d[1] = 'a'
+        d[2] = 'b'
+        assert strategy(d) == "IntDictStrategy"
+        assert isinstance(d, dict)
+        assert d.get(2) == 'b'
+        assert 1 in d
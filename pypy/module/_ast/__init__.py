@@ -8,6 +8,8 @@ class Module(MixedModule):
         "PyCF_ONLY_AST" : "space.wrap(%s)" % consts.PyCF_ONLY_AST,
         "PyCF_ACCEPT_NULL_BYTES":
                           "space.wrap(%s)" % consts.PyCF_ACCEPT_NULL_BYTES,
+        "PyCF_LAZY_FUNCTIONS":
+                          "space.wrap(%s)" % consts.PyCF_LAZY_FUNCTIONS,
         "__version__"   : "space.wrap('82160')",  # from CPython's svn.
         }
     appleveldefs = {}
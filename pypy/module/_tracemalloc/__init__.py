@@ -0,0 +1,23 @@
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """
+    Debug module to trace memory blocks allocated by Python.  On PyPy,
+    this is built on the allocation sampling of the GC: only one
+    allocation every few hundred KB is traced.
+    """
+    appleveldefs = {
+    }
+
+    interpleveldefs = {
+        'start': 'interp_tracemalloc.start',
+        'stop': 'interp_tracemalloc.stop',
+        'is_tracing': 'interp_tracemalloc.is_tracing',
+        'clear_traces': 'interp_tracemalloc.clear_traces',
+        'get_traceback_limit': 'interp_tracemalloc.get_traceback_limit',
+        'get_traced_memory': 'interp_tracemalloc.get_traced_memory',
+        'get_tracemalloc_memory': 'interp_tracemalloc.get_tracemalloc_memory',
+        '_get_traces': 'interp_tracemalloc.get_traces',
+        '_get_object_traceback': 'interp_tracemalloc.get_object_traceback',
+    }
@@ -0,0 +1,83 @@
+"""
+The interface of CPython's _tracemalloc module, on top of the sampling
+allocation profiler of pypy/module/gc/allocsample.py.  Instead of every
+memory block, one allocation every DEFAULT_INTERVAL bytes on average is
+traced, and its size is counted as the number of bytes that it stands
+for.  The sizes are thus estimates, which converge for the places that
+allocate a lot of memory.  The traces are shared with
+gc.start_alloc_sampling().
+"""
+
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.module.gc.allocsample import AllocSampler, DEFAULT_INTERVAL
+
+MAX_NFRAME = 256
+
+
+@unwrap_spec(nframe=int)
+def start(space, nframe=1):
+    """Start tracing Python memory allocations.  Also set the maximum
+    number of frames stored in the traceback of a trace to nframe."""
+    if nframe < 1 or nframe > MAX_NFRAME:
+        raise oefmt(space.w_ValueError,
+                    "the number of frames must be in range [1; %d]",
+                    MAX_NFRAME)
+    space.fromcache(AllocSampler).start(DEFAULT_INTERVAL, nframe)
+
+def stop(space):
+    """Stop tracing Python memory allocations and clear traces of memory
+    blocks allocated by Python."""
+    space.fromcache(AllocSampler).stop()
+
+def is_tracing(space):
+    """True if the tracemalloc module is tracing Python memory
+    allocations, False otherwise."""
+    return space.newbool(space.fromcache(AllocSampler).is_enabled())
+
+def clear_traces(space):
+    """Clear traces of memory blocks allocated by Python."""
+    space.fromcache(AllocSampler).clear()
+
+def get_traceback_limit(space):
+    """Get the maximum number of frames stored in the traceback of a
+    trace."""
+    return space.newint(space.fromcache(AllocSampler).nframes)
+
+def get_traced_memory(space):
+    """Get the current size and peak size of memory blocks traced by the
+    tracemalloc module as a tuple: (current: int, peak: int)."""
+    sampler = space.fromcache(AllocSampler)
+    sampler.flush()
+    return space.newtuple([space.newint(sampler.live_size),
+                           space.newint(sampler.peak_size)])
+
+def get_tracemalloc_memory(space):
+    """Get the memory usage in bytes of the tracemalloc module used
+    internally to trace memory allocations."""
+    return space.newint(space.fromcache(AllocSampler).get_memory_usage())
+
+def get_traces(space):
+    """Get traces of all memory blocks allocated by Python.  Return a list
+    of (size: int, traceback: tuple) tuples.  traceback is a tuple of
+    (filename: str, lineno: int) tuples."""
+    sampler = space.fromcache(AllocSampler)
+    sampler.flush()
+    frames_cache = {}    # AllocSite -> wrapped tuple of frames
+    result_w = []
+    for site, size in sampler.samples.values():
+        w_frames = frames_cache.get(site, None)
+        if w_frames is None:
+            w_frames = space.newtuple([
+                space.newtuple([space.newtext(filename),
+                                space.newint(lineno)])
+                for filename, lineno in site.frames])
+            frames_cache[site] = w_frames
+        result_w.append(space.newtuple([space.newint(size), w_frames]))
+    return space.newlist(result_w)
+
+def get_object_traceback(space, w_obj):
+    """Get the traceback where the Python object obj was allocated.
+    Always None on PyPy: the GC moves the objects, and the samples are
+    not attached to them."""
+    return space.w_None
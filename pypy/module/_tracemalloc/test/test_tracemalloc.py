@@ -0,0 +1,100 @@
+import pytest
+from pypy.module.gc.hook import LowLevelGcHooks
+from pypy.interpreter.baseobjspace import ObjSpace
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+
+
+class AppTestTracemalloc(object):
+    spaceconfig = {"usemodules": ["_tracemalloc", "_vmprof"]}
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            pytest.skip("these tests cannot work with -A")
+        space = cls.space
+        gchooks = space.fromcache(LowLevelGcHooks)
+
+        # the untranslated GC does not sample anything: the tests
+        # fake the hooks that the GC calls
+        @unwrap_spec(ObjSpace, int, int)
+        def fire_gc_alloc_sample(space, sample, size):
+            gchooks.fire_gc_alloc_sample(sample, size)
+
+        @unwrap_spec(ObjSpace, int)
+        def fire_gc_alloc_sample_free(space, sample):
+            gchooks.fire_gc_alloc_sample_free(sample)
+
+        cls.w_fire_gc_alloc_sample = space.wrap(
+            interp2app(fire_gc_alloc_sample))
+        cls.w_fire_gc_alloc_sample_free = space.wrap(
+            interp2app(fire_gc_alloc_sample_free))
+
+    def teardown_method(self, meth):
+        self.space.appexec([], """():
+            import _tracemalloc
+            _tracemalloc.stop()
+        """)
+
+    def test_start_stop(self):
+        import _tracemalloc
+        assert not _tracemalloc.is_tracing()
+        _tracemalloc.start()
+        assert _tracemalloc.is_tracing()
+        assert _tracemalloc.get_traceback_limit() == 1
+        assert _tracemalloc.get_tracemalloc_memory() > 0
+        _tracemalloc.start(5)
+        assert _tracemalloc.get_traceback_limit() == 5
+        _tracemalloc.stop()
+        assert not _tracemalloc.is_tracing()
+        assert _tracemalloc.get_tracemalloc_memory() == 0
+        raises(ValueError, _tracemalloc.start, 0)
+        raises(ValueError, _tracemalloc.start, 100000)
+
+    def test_traces(self):
+        import _tracemalloc
+        _tracemalloc.start()
+        assert _tracemalloc._get_traces() == []
+        assert _tracemalloc.get_traced_memory() == (0, 0)
+        self.fire_gc_alloc_sample(1, 100)
+        self.fire_gc_alloc_sample(2, 10**7)
+        traces = _tracemalloc._get_traces()
+        assert len(traces) == 2
+        sizes = sorted([size for size, frames in traces])
+        interval = sizes[0]
+        assert interval > 100
+        assert sizes[1] == 10**7
+        [(filename, lineno)] = traces[0][1]
+        assert 'test_tracemalloc.py' in filename
+        assert traces[0][1] == traces[1][1]
+        assert _tracemalloc.get_traced_memory() == (interval + 10**7,
+                                                     interval + 10**7)
+        #
+        self.fire_gc_alloc_sample_free(2)
+        [(size, frames)] = _tracemalloc._get_traces()
+        assert size == interval
+        assert _tracemalloc.get_traced_memory() == (interval,
+                                                     interval + 10**7)
+        #
+        _tracemalloc.clear_traces()
+        assert _tracemalloc.is_tracing()
+        assert _tracemalloc._get_traces() == []
+        assert _tracemalloc.get_traced_memory() == (0, 0)
+        self.fire_gc_alloc_sample_free(1)     # ignored
+
+    def test_object_traceback(self):
+        import _tracemalloc
+        _tracemalloc.start()
+        assert _tracemalloc._get_object_traceback([]) is None
+
+    def test_snapshot(self):
+        import tracemalloc
+        tracemalloc.start()
+        self.fire_gc_alloc_sample(1, 10**7)
+        self.fire_gc_alloc_sample(2, 10**7)
+        snapshot = tracemalloc.take_snapshot()
+        assert snapshot.traceback_limit == 1
+        [stat] = snapshot.statistics('lineno')
+        assert stat.count == 2
+        assert stat.size == 2 * 10**7
+        assert 'test_tracemalloc.py' in stat.traceback[0].filename
+        tracemalloc.stop()
+        raises(RuntimeError, tracemalloc.take_snapshot)
@@ -0,0 +1,5 @@
+from pypy.objspace.fake.checkmodule import checkmodule
+
+def test_tracemalloc_translates():
+    import pypy.module._vmprof.interp_vmprof   # register_code_object_class()
+    checkmodule('_tracemalloc')
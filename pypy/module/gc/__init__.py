@@ -37,5 +37,11 @@ class Module(MixedModule):
                 'GcRef': 'referents.W_GcRef',
                 'hooks': 'space.fromcache(hook.W_AppLevelHooks)',
                 'GcCollectStepStats': 'hook.W_GcCollectStepStats',
+                'start_alloc_sampling': 'allocsample.start_alloc_sampling',
+                'stop_alloc_sampling': 'allocsample.stop_alloc_sampling',
+                'is_alloc_sampling': 'allocsample.is_alloc_sampling',
+                'get_alloc_samples': 'allocsample.get_alloc_samples',
+                'get_alloc_sampled_memory':
+                    'allocsample.get_alloc_sampled_memory',
                 })
         MixedModule.__init__(self, space, w_name)
@@ -0,0 +1,284 @@
+"""
+Sampling allocation profiler.
+
+When the profiler is started, the GC reports one allocation every
+'interval' bytes on average, and later the death of the sampled object
+(see "Allocation sampling" in rpython/memory/gc/incminimark.py).  The
+reports arrive in LowLevelGcHooks, which forwards them to AllocSampler.
+From there we cannot allocate anything: we only copy the vmprof stack
+of the allocation into a raw buffer.  The buffer is turned into
+per-traceback statistics later, by an AsyncAction or when the
+statistics are asked for.
+
+The vmprof stack gives code objects, not the current line: a frame is
+reported as the filename and the first line number of its code object.
+"""
+
+from rpython.rlib import rgc
+from rpython.rlib.objectmodel import specialize
+from rpython.rlib.rvmprof import rvmprof, traceback
+from rpython.rtyper.lltypesystem import lltype, rffi
+
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.executioncontext import AsyncAction
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.pycode import PyCode
+
+DEFAULT_INTERVAL = 512 * 1024
+MIN_BUFFER_SIZE = 4096
+
+EVENT_FREE = -1     # allocations are recorded with a sample number > 0
+
+UNKNOWN_FRAME = ("<unknown>", 0)
+
+
+@specialize.memo()
+def _get_code_weak_list():
+    # only there if the _vmprof module is enabled
+    return getattr(PyCode, '_vmprof_weak_list', None)
+
+
+class AllocSite(object):
+    """Statistics about the sampled allocations with the same traceback.
+    The sizes are estimates of the real number of bytes allocated."""
+
+    def __init__(self, frames):
+        self.frames = frames    # list of (filename, lineno), most recent first
+        self.count = 0
+        self.size = 0
+        self.live_count = 0
+        self.live_size = 0
+
+
+class AllocSampler(object):
+    """Singleton, created by space.fromcache()."""
+
+    def __init__(self, space):
+        self.space = space
+        self.interval = 0
+        self.nframes = 1
+        self.buffer = lltype.nullptr(rffi.SIGNEDP.TO)
+        self.buffer_size = 0
+        self.buffer_used = 0
+        self.reserved = 0      # room kept in the buffer for the frees
+        self.lost = 0
+        self.action = AllocSampleAction(space, self)
+        self.code_locations = {}    # vmprof code id -> (filename, lineno)
+        self.reset()
+
+    def reset(self):
+        self.sites = {}        # key made from the code ids -> AllocSite
+        self.samples = {}      # sample number -> (AllocSite, size)
+        self.live_size = 0
+        self.peak_size = 0
+
+    def is_enabled(self):
+        return self.interval > 0
+
+    def start(self, interval, nframes):
+        if self.is_enabled():
+            # already sampling: process the pending events first, because
+            # _resize_buffer() below may free the buffer
+            self.flush()
+        else:
+            self.reset()
+            self.lost = 0
+            self.buffer_used = 0
+            self.reserved = 0
+        self.interval = interval
+        self.nframes = nframes
+        self._resize_buffer()
+        # the GC sees the new interval at the next minor collection
+        rgc.collect(0)
+
+    def stop(self):
+        self.interval = 0
+        self.reset()
+        if self.buffer:
+            lltype.free(self.buffer, flavor='raw', track_allocation=False)
+            self.buffer = lltype.nullptr(rffi.SIGNEDP.TO)
+        self.buffer_size = 0
+        self.buffer_used = 0
+        self.reserved = 0
+
+    def clear(self):
+        """Forget the statistics, but continue sampling."""
+        self.flush()
+        self.reset()
+        self.reserved = 0
+
+    def get_memory_usage(self):
+        """Approximate number of bytes used by the raw buffer."""
+        return self.buffer_size * rffi.sizeof(lltype.Signed)
+
+    def _resize_buffer(self):
+        # room for the frees of all the live samples, and for many
+        # allocations; called only when the buffer is empty
+        size = (self.reserved * 2 + (self.nframes * 2 + 7) * 256)
+        size = max(size, MIN_BUFFER_SIZE)
+        if size > self.buffer_size or size * 4 < self.buffer_size:
+            if self.buffer:
+                lltype.free(self.buffer, flavor='raw', track_allocation=False)
+            self.buffer = lltype.malloc(rffi.SIGNEDP.TO, size, flavor='raw',
+                                        track_allocation=False)
+            self.buffer_size = size
+
+    # ----------
+    # called from the GC hooks: must not allocate
+
+    def record_alloc(self, sample, size):
+        room = self.nframes * 2 + 4
+        pos = self.buffer_used
+        if pos + 3 + room + self.reserved * 2 > self.buffer_size:
+            self.lost += 1      # full: the free will be ignored too
+            return
+        n = traceback.traceback_into(rffi.ptradd(self.buffer, pos + 3), room)
+        self.buffer[pos] = sample
+        self.buffer[pos + 1] = size
+        self.buffer[pos + 2] = n
+        self.buffer_used = pos + 3 + n
+        self.reserved += 1
+        self.action.fire()
+
+    def record_free(self, sample):
+        pos = self.buffer_used
+        if pos + 2 > self.buffer_size:
+            return      # the sample was lost
+        self.buffer[pos] = EVENT_FREE
+        self.buffer[pos + 1] = sample
+        self.buffer_used = pos + 2
+        if self.reserved > 0:
+            self.reserved -= 1
+        self.action.fire()
+
+    # ----------
+
+    def flush(self):
+        """Turn the events of the buffer into statistics."""
+        i = 0
+        # new events may be added while we are running
+        while i < self.buffer_used:
+            sample = self.buffer[i]
+            if sample == EVENT_FREE:
+                self._free(self.buffer[i + 1])
+                i += 2
+            else:
+                size = self.buffer[i + 1]
+                n = self.buffer[i + 2]
+                self._alloc(sample, size, i + 3, n)
+                i += 3 + n
+        self.buffer_used = 0
+        self.reserved = len(self.samples)
+        if self.is_enabled():
+            self._resize_buffer()
+
+    def _alloc(self, sample, size, start, n):
+        code_ids = []
+        i = start
+        while i < start + n - 1 and len(code_ids) < self.nframes:
+            tag = self.buffer[i]
+            if (tag == rvmprof.VMPROF_CODE_TAG or
+                    tag == rvmprof.VMPROF_JITTED_TAG):
+                code_ids.append(self.buffer[i + 1])
+            i += 2
+        key = ','.join([str(code_id) for code_id in code_ids])
+        site = self.sites.get(key, None)
+        if site is None:
+            frames = [self._code_location(code_id) for code_id in code_ids]
+            if not frames:
+                frames.append(UNKNOWN_FRAME)
+            site = AllocSite(frames)
+            self.sites[key] = site
+        # an allocation of 'size' bytes is sampled with a probability
+        # of about size/interval
+        size = max(size, self.interval)
+        site.count += 1
+        site.size += size
+        site.live_count += 1
+        site.live_size += size
+        self.samples[sample] = (site, size)
+        self.live_size += size
+        self.peak_size = max(self.peak_size, self.live_size)
+
+    def _free(self, sample):
+        try:
+            site, size = self.samples.pop(sample)
+        except KeyError:
+            return      # lost, or from before the last reset()
+        site.live_count -= 1
+        site.live_size -= size
+        self.live_size -= size
+
+    def _code_location(self, code_id):
+        try:
+            return self.code_locations[code_id]
+        except KeyError:
+            pass
+        weak_list = _get_code_weak_list()
+        if weak_list is not None:
+            for wref in weak_list.get_all_handles():
+                code = wref()
+                if code is not None and code._vmprof_unique_id != 0:
+                    self.code_locations[code._vmprof_unique_id] = (
+                        code.co_filename, code.co_firstlineno)
+        location = self.code_locations.get(code_id, UNKNOWN_FRAME)
+        self.code_locations[code_id] = location
+        return location
+
+
+class AllocSampleAction(AsyncAction):
+    def __init__(self, space, sampler):
+        AsyncAction.__init__(self, space)
+        self.sampler = sampler
+
+    def perform(self, ec, frame):
+        self.sampler.flush()
+
+
+@unwrap_spec(interval=int, nframes=int)
+def start_alloc_sampling(space, interval=DEFAULT_INTERVAL, nframes=1):
+    """Start sampling the allocations: on average, one allocation every
+    'interval' bytes is recorded, with the 'nframes' most recent frames
+    of its traceback."""
+    if not space.config.objspace.usemodules._vmprof:
+        raise oefmt(space.w_RuntimeError,
+                    "allocation sampling requires the _vmprof module")
+    if interval <= 0:
+        raise oefmt(space.w_ValueError, "the interval must be positive")
+    if nframes < 1:
+        raise oefmt(space.w_ValueError, "the number of frames must be >= 1")
+    space.fromcache(AllocSampler).start(interval, nframes)
+
+def stop_alloc_sampling(space):
+    """Stop sampling the allocations, and clear the statistics."""
+    space.fromcache(AllocSampler).stop()
+
+def is_alloc_sampling(space):
+    return space.newbool(space.fromcache(AllocSampler).is_enabled())
+
+def get_alloc_samples(space):
+    """Return a list of tuples (traceback, count, size, live_count,
+    live_size), one per traceback of the sampled allocations.  The
+    traceback is a tuple of (filename, lineno), most recent frame first.
+    The sizes are estimates, in bytes."""
+    sampler = space.fromcache(AllocSampler)
+    sampler.flush()
+    result_w = []
+    for site in sampler.sites.values():
+        frames_w = [space.newtuple([space.newtext(filename),
+                                    space.newint(lineno)])
+                    for filename, lineno in site.frames]
+        result_w.append(space.newtuple([space.newtuple(frames_w),
+                                        space.newint(site.count),
+                                        space.newint(site.size),
+                                        space.newint(site.live_count),
+                                        space.newint(site.live_size)]))
+    return space.newlist(result_w)
+
+def get_alloc_sampled_memory(space):
+    """Return the estimated (current, peak) size of the live objects
+    from the sampled allocations."""
+    sampler = space.fromcache(AllocSampler)
+    sampler.flush()
+    return space.newtuple([space.newint(sampler.live_size),
+                           space.newint(sampler.peak_size)])
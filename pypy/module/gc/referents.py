@@ -190,6 +190,7 @@ class W_GcStats(W_Root):
         self.peak_rawmalloced_memory = rgc.get_stats(rgc.PEAK_RAWMALLOCED_MEMORY)
         self.nursery_size = rgc.get_stats(rgc.NURSERY_SIZE)
         self.total_gc_time = rgc.get_stats(rgc.TOTAL_GC_TIME)
+        self.pause_target_misses = rgc.get_stats(rgc.PAUSE_TARGET_MISSES)
 
 W_GcStats.typedef = TypeDef("GcStats",
     total_memory_pressure=interp_attrproperty("total_memory_pressure",
@@ -218,6 +219,8 @@ W_GcStats.typedef = TypeDef("GcStats",
         cls=W_GcStats, wrapfn="newint"),
     total_gc_time=interp_attrproperty("total_gc_time",
         cls=W_GcStats, wrapfn="newint"),
+    pause_target_misses=interp_attrproperty("pause_target_misses",
+        cls=W_GcStats, wrapfn="newint"),
 )
 
 @unwrap_spec(memory_pressure=bool)
@@ -0,0 +1,125 @@
+import pytest
+from pypy.module.gc.hook import LowLevelGcHooks
+from pypy.interpreter.baseobjspace import ObjSpace
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+
+
+class TestAllocSampler(object):
+    spaceconfig = {"usemodules": ["_vmprof"]}
+
+    def test_restart_keeps_pending_events(self):
+        from pypy.module.gc.allocsample import AllocSampler
+        sampler = self.space.fromcache(AllocSampler)
+        sampler.start(1000, 1)
+        try:
+            sampler.record_alloc(1, 100)
+            sampler.record_alloc(2, 100)
+            assert sampler.buffer_used > 0
+            # more frames: the buffer is reallocated, so the pending
+            # events must be processed first
+            sampler.start(1000, 200)
+            assert sampler.buffer_used == 0
+            sampler.record_alloc(3, 100)
+            sampler.record_free(1)
+            sampler.flush()
+            [site] = sampler.sites.values()
+            assert (site.count, site.size) == (3, 3000)
+            assert (site.live_count, site.live_size) == (2, 2000)
+        finally:
+            sampler.stop()
+
+
+class AppTestAllocSample(object):
+    spaceconfig = {"usemodules": ["_vmprof"]}
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            pytest.skip("these tests cannot work with -A")
+        space = cls.space
+        gchooks = space.fromcache(LowLevelGcHooks)
+
+        @unwrap_spec(ObjSpace, int, int)
+        def fire_gc_alloc_sample(space, sample, size):
+            gchooks.fire_gc_alloc_sample(sample, size)
+
+        @unwrap_spec(ObjSpace, int)
+        def fire_gc_alloc_sample_free(space, sample):
+            gchooks.fire_gc_alloc_sample_free(sample)
+
+        cls.w_fire_gc_alloc_sample = space.wrap(
+            interp2app(fire_gc_alloc_sample))
+        cls.w_fire_gc_alloc_sample_free = space.wrap(
+            interp2app(fire_gc_alloc_sample_free))
+
+    def teardown_method(self, meth):
+        self.space.appexec([], """():
+            import gc
+            gc.stop_alloc_sampling()
+        """)
+
+    def test_start_stop(self):
+        import gc
+        assert not gc.is_alloc_sampling()
+        gc.start_alloc_sampling()
+        assert gc.is_alloc_sampling()
+        gc.stop_alloc_sampling()
+        assert not gc.is_alloc_sampling()
+        raises(ValueError, gc.start_alloc_sampling, 0)
+        raises(ValueError, gc.start_alloc_sampling, 1000, 0)
+
+    def test_disabled(self):
+        import gc
+        self.fire_gc_alloc_sample(1, 100)
+        gc.start_alloc_sampling(1000)
+        assert gc.get_alloc_samples() == []
+        assert gc.get_alloc_sampled_memory() == (0, 0)
+
+    def test_samples(self):
+        import gc
+        gc.start_alloc_sampling(1000)
+        self.fire_gc_alloc_sample(1, 100)
+        self.fire_gc_alloc_sample(2, 100)
+        self.fire_gc_alloc_sample(3, 5000)
+        [(traceback, count, size, live_count, live_size)] = (
+            gc.get_alloc_samples())
+        assert len(traceback) == 1
+        filename, lineno = traceback[0]
+        assert 'test_allocsample.py' in filename
+        assert isinstance(lineno, int)
+        # small allocations count for 'interval' bytes
+        assert (count, size, live_count, live_size) == (3, 7000, 3, 7000)
+        assert gc.get_alloc_sampled_memory() == (7000, 7000)
+        #
+        self.fire_gc_alloc_sample_free(3)
+        self.fire_gc_alloc_sample_free(42)    # unknown: ignored
+        [(traceback, count, size, live_count, live_size)] = (
+            gc.get_alloc_samples())
+        assert (count, size, live_count, live_size) == (3, 7000, 2, 2000)
+        assert gc.get_alloc_sampled_memory() == (2000, 7000)
+
+    def test_stop_clears(self):
+        import gc
+        gc.start_alloc_sampling(1000)
+        self.fire_gc_alloc_sample(1, 100)
+        gc.stop_alloc_sampling()
+        self.fire_gc_alloc_sample(2, 100)
+        gc.start_alloc_sampling(1000)
+        self.fire_gc_alloc_sample_free(1)
+        assert gc.get_alloc_samples() == []
+        assert gc.get_alloc_sampled_memory() == (0, 0)
+
+    def test_many_samples(self):
+        import gc
+        gc.start_alloc_sampling(10)
+        for i in range(1, 1001):
+            self.fire_gc_alloc_sample(i, 8)
+        for i in range(1, 1001, 2):
+            self.fire_gc_alloc_sample_free(i)
+        total = 0
+        live = 0
+        for traceback, count, size, live_count, live_size in (
+                gc.get_alloc_samples()):
+            total += count
+            live += live_count
+        assert total == 1000
+        assert live == 500
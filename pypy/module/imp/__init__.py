@@ -26,6 +26,9 @@ class Module(MixedModule):
         'release_lock':    'interp_imp.release_lock',
 
         '_fix_co_filename': 'interp_imp.fix_co_filename',
+        'bundleimporter':  'interp_bundle.W_BundleImporter',
+        'import_cache_stats': 'interp_imp.import_cache_stats',
+        '_set_import_cache_counts': 'interp_imp.set_import_cache_counts',
         }
 
     appleveldefs = {
@@ -67,6 +67,18 @@ def has_so_extension(space):
     return (space.config.objspace.usemodules.cpyext or
             space.config.objspace.usemodules._cffi_backend)
 
+class ImportCacheStats(object):
+    """Counters of the file system calls that the importers avoided thanks
+    to their caches: the directory listings shared by the FileFinders of
+    importlib, and the central directories of the zip files."""
+
+    def __init__(self, space):
+        # the list [listdirs, listdirs_saved, stats_saved], updated in
+        # place by importlib
+        self.w_counts = None
+        self.zip_reads = 0
+        self.zip_reads_saved = 0
+
 def check_sys_modules(space, w_modulename):
     return space.finditem(space.sys.get('modules'), w_modulename)
 
@@ -354,7 +366,7 @@ def update_code_filenames(space, code_w, pathname, oldname=None):
 
     code_w.co_filename = pathname
     code_w.w_filename = space.newfilename(pathname)
-    constants = code_w.co_consts_w
+    constants = code_w.get_consts_w()
     for const in constants:
         if const is not None and isinstance(const, PyCode):
             update_code_filenames(space, const, pathname, oldname)
@@ -0,0 +1,228 @@
+"""An importer for bytecode bundles.
+
+A bundle is a single file containing the marshalled code objects of many
+modules, written by lib_pypy/_pypy_bundle.py.  The file is mmapped and
+its index is read when the importer is created; the code objects are
+only unmarshalled when the corresponding module is imported.  Put in
+sys.meta_path, the importer finds the bundled modules with a dict lookup,
+without any stat() or open() of the normal path search.
+
+PYPY_BUNDLE puts the importer in sys.meta_path before the PathFinder, so
+that the path search is skipped for all the bundled modules.  As a
+consequence, a bundled module shadows the modules of the same name in
+all the sys.path entries, including the directory of the script and the
+entries added at run time: don't bundle modules that must be overridable
+this way.
+
+Format (all integers are 32-bit little-endian):
+
+    'PyPyBNDL' magic count
+    count * (namelen filenamelen flags offset size name filename)
+    marshalled code objects
+
+'magic' is the pyc magic number, and bundles with a different magic are
+ignored.  'flags' is 1 for packages.  'offset' is from the start of the
+file.
+"""
+
+import os
+
+from rpython.rlib import rmmap
+from rpython.rlib.buffer import SubBuffer
+from rpython.rlib.rstring import assert_str0
+
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import oefmt, wrap_oserror
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.interpreter.module import Module
+from pypy.interpreter.pycode import PyCode
+from pypy.module.imp import importing
+from pypy.module.mmap.interp_mmap import MMapBuffer
+
+BUNDLE_HEADER = 'PyPyBNDL'
+FLAG_PACKAGE = 1
+
+
+class BundleEntry(object):
+    def __init__(self, filename, is_package, offset, size):
+        self.filename = filename
+        self.is_package = is_package
+        self.offset = offset
+        self.size = size
+
+
+class W_BundleImporter(W_Root):
+    def __init__(self, space, name):
+        self.space = space
+        self.name = name
+        self.entries = {}      # dotted name -> BundleEntry
+        self.mmap = None
+        self.valid = False
+
+    def _open(self, space):
+        try:
+            fd = os.open(self.name, os.O_RDONLY, 0)
+        except OSError as e:
+            raise wrap_oserror(space, e, self.name)
+        try:
+            try:
+                size = os.fstat(fd).st_size
+            except OSError as e:
+                raise wrap_oserror(space, e, self.name)
+            if size < len(BUNDLE_HEADER) + 8:
+                raise oefmt(space.w_ImportError, "%R is not a bundle",
+                            space.newfilename(self.name))
+            try:
+                self.mmap = rmmap.mmap(fd, size, access=rmmap.ACCESS_READ)
+            except rmmap.RMMapError:
+                raise oefmt(space.w_ImportError, "cannot map %R",
+                            space.newfilename(self.name))
+        finally:
+            os.close(fd)
+        self._read_index(space)
+
+    def _read_index(self, space):
+        m = self.mmap
+        size = m.size
+        pos = len(BUNDLE_HEADER)
+        if m.getslice(0, pos) != BUNDLE_HEADER:
+            raise oefmt(space.w_ImportError, "%R is not a bundle",
+                        space.newfilename(self.name))
+        magic = importing._get_long(m.getslice(pos, 4))
+        count = importing._get_long(m.getslice(pos + 4, 4))
+        pos += 8
+        if magic != importing.get_pyc_magic(space):
+            # written by another version: leave it to the normal importers
+            return
+        for i in range(count):
+            if pos + 20 > size:
+                raise oefmt(space.w_ImportError, "corrupted bundle %R",
+                            space.newfilename(self.name))
+            fields = m.getslice(pos, 20)
+            namelen = importing._get_long(fields[0:4])
+            filenamelen = importing._get_long(fields[4:8])
+            flags = importing._get_long(fields[8:12])
+            offset = importing._get_long(fields[12:16])
+            length = importing._get_long(fields[16:20])
+            pos += 20
+            if (namelen < 0 or filenamelen < 0 or offset < 0 or length < 0 or
+                    pos + namelen + filenamelen > size or
+                    offset + length > size):
+                raise oefmt(space.w_ImportError, "corrupted bundle %R",
+                            space.newfilename(self.name))
+            name = m.getslice(pos, namelen)
+            pos += namelen
+            filename = m.getslice(pos, filenamelen)
+            pos += filenamelen
+            if flags & FLAG_PACKAGE and filename.rfind(os.sep) < 0:
+                # a package is stored as '<directory>/__init__.py'
+                raise oefmt(space.w_ImportError, "corrupted bundle %R",
+                            space.newfilename(self.name))
+            self.entries[name] = BundleEntry(filename,
+                                             bool(flags & FLAG_PACKAGE),
+                                             offset, length)
+        self.valid = True
+
+    def _get_entry(self, space, w_fullname):
+        fullname = space.text_w(w_fullname)
+        try:
+            return self.entries[fullname]
+        except KeyError:
+            raise oefmt(space.w_ImportError, "can't find module %R in %R",
+                        w_fullname, space.newfilename(self.name))
+
+    def _unmarshal(self, space, entry):
+        from pypy.module.marshal import interp_marshal
+        buf = SubBuffer(MMapBuffer(space, self.mmap, True),
+                        entry.offset, entry.size)
+        w_code = interp_marshal.loads_buffer(space, buf)
+        if not isinstance(w_code, PyCode):
+            raise oefmt(space.w_ImportError, "Non-code object in %R",
+                        space.newfilename(self.name))
+        return w_code
+
+    @unwrap_spec(fullname='text')
+    def find_module(self, space, fullname, w_path=None):
+        if fullname in self.entries:
+            return self
+        return space.w_None
+
+    def load_module(self, space, w_fullname):
+        entry = self._get_entry(space, w_fullname)
+        fullname = space.text_w(w_fullname)
+        code_w = self._unmarshal(space, entry)
+        filename = assert_str0(entry.filename)
+        if entry.is_package:
+            i = filename.rfind(os.sep)
+            assert i >= 0      # checked by _read_index()
+            pkgpath = filename[:i]
+        else:
+            pkgpath = None
+        w_mod = Module(space, w_fullname)
+        space.setattr(w_mod, space.newtext('__loader__'), self)
+        try:
+            importing._prepare_module(space, w_mod, filename, pkgpath)
+            try:
+                optimize = space.sys.get_flag('optimize')
+            except RuntimeError:
+                # during bootstrapping
+                optimize = 0
+            if optimize >= 2:
+                code_w.remove_docstrings(space)
+            importing.exec_code_module(space, w_mod, code_w, filename, None)
+        except:
+            w_mods = space.sys.get('modules')
+            space.call_method(w_mods, 'pop', w_fullname, space.w_None)
+            raise
+        if space.sys.get_flag('verbose') >= 1:
+            w_stderr = space.sys.get('stderr')
+            message = "import %s # loaded from bundle %s\n" % (
+                fullname, self.name)
+            space.call_method(w_stderr, "write", space.newtext(message))
+        return space.getitem(space.sys.get('modules'), w_fullname)
+
+    def get_code(self, space, w_fullname):
+        return self._unmarshal(space, self._get_entry(space, w_fullname))
+
+    def get_source(self, space, w_fullname):
+        self._get_entry(space, w_fullname)
+        return space.w_None
+
+    def get_filename(self, space, w_fullname):
+        entry = self._get_entry(space, w_fullname)
+        return space.newfilename(entry.filename)
+
+    def is_package(self, space, w_fullname):
+        entry = self._get_entry(space, w_fullname)
+        return space.newbool(entry.is_package)
+
+    def modules(self, space):
+        return space.newlist([space.newtext(name) for name in self.entries])
+
+    def getarchive(self, space):
+        return space.newfilename(self.name)
+
+    def getvalid(self, space):
+        return space.newbool(self.valid)
+
+
+@unwrap_spec(name='fsencode')
+def descr_new_bundleimporter(space, w_type, name):
+    w_result = W_BundleImporter(space, name)
+    w_result._open(space)
+    return w_result
+
+W_BundleImporter.typedef = TypeDef(
+    'bundleimporter',
+    __new__     = interp2app(descr_new_bundleimporter),
+    find_module = interp2app(W_BundleImporter.find_module),
+    load_module = interp2app(W_BundleImporter.load_module),
+    get_code    = interp2app(W_BundleImporter.get_code),
+    get_source  = interp2app(W_BundleImporter.get_source),
+    get_filename = interp2app(W_BundleImporter.get_filename),
+    is_package  = interp2app(W_BundleImporter.is_package),
+    modules     = interp2app(W_BundleImporter.modules),
+    archive     = GetSetProperty(W_BundleImporter.getarchive),
+    valid       = GetSetProperty(W_BundleImporter.getvalid),
+)
@@ -122,4 +122,29 @@ def fix_co_filename(space, w_code, pathname):
     code_w = space.interp_w(PyCode, w_code)
     importing.update_code_filenames(space, code_w, pathname)
 
-
+def import_cache_stats(space):
+    """import_cache_stats() -> dict
+
+    Return counters of the directory listings and zip file reads done by
+    the importers, and of the stat() calls, listings and reads that they
+    avoided thanks to their caches."""
+    stats = space.fromcache(importing.ImportCacheStats)
+    w_result = space.newdict()
+    names = ['listdir', 'listdir_saved', 'stat_saved']
+    for i in range(len(names)):
+        if stats.w_counts is not None:
+            w_value = space.getitem(stats.w_counts, space.newint(i))
+        else:
+            w_value = space.newint(0)
+        space.setitem_str(w_result, names[i], w_value)
+    space.setitem_str(w_result, 'zip_read', space.newint(stats.zip_reads))
+    space.setitem_str(w_result, 'zip_read_saved',
+                      space.newint(stats.zip_reads_saved))
+    return w_result
+
+def set_import_cache_counts(space, w_counts):
+    """Called by importlib with the list of the counters of its
+    FileFinders, which it updates in place: listdir() calls done, and
+    listdir() and stat() calls avoided."""
+    stats = space.fromcache(importing.ImportCacheStats)
+    stats.w_counts = w_counts
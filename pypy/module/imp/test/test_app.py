@@ -316,3 +316,125 @@ class AppTestImpModule:
         if not hasattr(sys, 'pypy_version_info'):
             skip('This test is PyPy-only')
         assert imp.get_tag() == 'pypy3-%d%d' % sys.pypy_version_info[0:2]
+
+
+class AppTestBundleImporter:
+    spaceconfig = {
+        'usemodules': ['imp', 'struct', 'marshal'],
+    }
+
+    def setup_class(cls):
+        cls.w_udir = cls.space.wrap(str(udir))
+
+    def test_bundleimporter(self):
+        import sys, os, _imp
+        from _pypy_bundle import find_modules, write_bundle
+        base = self.udir + '/bundle_src'
+        os.makedirs(base + '/bndpkg')
+        with open(base + '/bndmod.py', 'w') as f:
+            f.write('x = 42\n')
+        with open(base + '/bndpkg/__init__.py', 'w') as f:
+            f.write('y = 43\n')
+        with open(base + '/bndpkg/sub.py', 'w') as f:
+            f.write('from . import y\nz = y + 1\n')
+        with open(base + '/bndbad.py', 'w') as f:
+            f.write('def (\n')
+        bundle = self.udir + '/test.bundle'
+        modules = sorted(find_modules(base))
+        assert [name for name, _ in modules] == [
+            'bndbad', 'bndmod', 'bndpkg', 'bndpkg.sub']
+        assert write_bundle(bundle, modules) == 3
+        for name in ['bndmod.py', 'bndpkg/__init__.py', 'bndpkg/sub.py']:
+            os.unlink(base + '/' + name)
+        #
+        importer = _imp.bundleimporter(bundle)
+        assert importer.valid
+        assert sorted(importer.modules()) == ['bndmod', 'bndpkg',
+                                              'bndpkg.sub']
+        assert importer.find_module('bndbad') is None
+        assert importer.is_package('bndpkg')
+        assert importer.get_source('bndmod') is None
+        raises(ImportError, importer.get_code, 'bndbad')
+        sys.meta_path.insert(0, importer)
+        try:
+            import bndmod
+            import bndpkg.sub
+        finally:
+            sys.meta_path.remove(importer)
+            for name in ['bndmod', 'bndpkg', 'bndpkg.sub']:
+                sys.modules.pop(name, None)
+        assert bndmod.x == 42
+        assert bndmod.__file__ == base + '/bndmod.py'
+        assert bndmod.__loader__ is importer
+        assert bndpkg.__path__ == [base + '/bndpkg']
+        assert bndpkg.sub.z == 44
+        #
+        # installed before the PathFinder, like PYPY_BUNDLE does, the
+        # bundle shadows the modules of the same name in sys.path
+        shadow = self.udir + '/bundle_shadow'
+        os.makedirs(shadow)
+        with open(shadow + '/bndmod.py', 'w') as f:
+            f.write('x = 0\n')
+        sys.path.insert(0, shadow)
+        sys.meta_path.insert(0, importer)
+        try:
+            import bndmod
+        finally:
+            sys.meta_path.remove(importer)
+            sys.path.remove(shadow)
+            sys.modules.pop('bndmod', None)
+        assert bndmod.x == 42
+        #
+        # a truncated index is an error, not an empty bundle
+        with open(bundle, 'rb') as f:
+            data = f.read()
+        with open(bundle, 'wb') as f:
+            f.write(data[:len(b'PyPyBNDL') + 8 + 10])
+        raises(ImportError, _imp.bundleimporter, bundle)
+        #
+        with open(bundle, 'wb') as f:
+            f.write(b'not a bundle, really')
+        raises(ImportError, _imp.bundleimporter, bundle)
+
+
+class AppTestImportCache:
+    spaceconfig = {
+        'usemodules': ['imp'],
+    }
+
+    def setup_class(cls):
+        cls.w_udir = cls.space.wrap(str(udir))
+
+    def test_listdir_cache(self):
+        import sys, os, _imp, importlib
+        base = self.udir + '/importcache'
+        os.makedirs(base + '/cachedpkg')
+        with open(base + '/cachedpkg/__init__.py', 'w') as f:
+            f.write('')
+        with open(base + '/cachedpkg/sub.py', 'w') as f:
+            f.write('x = 42\n')
+        sys.path.insert(0, base)
+        # writing the .pyc files would change the mtime of cachedpkg
+        dont_write_bytecode = sys.dont_write_bytecode
+        sys.dont_write_bytecode = True
+        try:
+            before = _imp.import_cache_stats()
+            import cachedpkg.sub
+            after = _imp.import_cache_stats()
+            assert cachedpkg.sub.x == 42
+            # the listing of cachedpkg, done to find its __init__.py,
+            # is reused by the FileFinder of cachedpkg.__path__
+            assert after['listdir_saved'] > before['listdir_saved']
+            assert after['stat_saved'] > before['stat_saved']
+            #
+            with open(base + '/cachedpkg/sub2.py', 'w') as f:
+                f.write('y = 43\n')
+            importlib.invalidate_caches()
+            assert importlib._bootstrap_external._listdir_cache == {}
+            import cachedpkg.sub2
+            assert cachedpkg.sub2.y == 43
+        finally:
+            sys.dont_write_bytecode = dont_write_bytecode
+            sys.path.remove(base)
+            for name in ['cachedpkg', 'cachedpkg.sub', 'cachedpkg.sub2']:
+                sys.modules.pop(name, None)
@@ -0,0 +1,100 @@
+"""Measures the speed of marshal.loads() on the code objects of the
+standard library, i.e. on what pyc loading costs at startup.
+
+    pypy3 bench_loads.py [DIRECTORY...] [--repeat=N]
+
+All the .py files in the DIRECTORYs (by default, the directory of the
+standard library) are compiled and marshalled once; then the marshalled
+data is loaded N times, both from bytes objects and from memoryviews over
+an mmap of a single file containing all of it.  The throughput is printed
+in MB/s and in code objects per second.
+"""
+
+import os
+import sys
+import time
+import mmap
+import marshal
+import tempfile
+
+
+def collect(directories):
+    blobs = []
+    for directory in directories:
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [name for name in dirnames
+                           if name not in ('test', 'tests', '__pycache__')]
+            for name in sorted(filenames):
+                if not name.endswith('.py'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    with open(path, 'rb') as f:
+                        source = f.read()
+                    code = compile(source, path, 'exec', dont_inherit=True)
+                except (OSError, SyntaxError, ValueError):
+                    continue
+                blobs.append(marshal.dumps(code))
+    return blobs
+
+
+def count_codes(code):
+    result = 1
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            result += count_codes(const)
+    return result
+
+
+def report(name, seconds, nbytes, ncodes):
+    print("%-12s %8.3f s  %8.1f MB/s  %10.0f codes/s" % (
+        name, seconds, nbytes / seconds / 1e6, ncodes / seconds))
+
+
+def bench(blobs, repeat):
+    nbytes = sum(len(blob) for blob in blobs) * repeat
+    ncodes = sum(count_codes(marshal.loads(blob)) for blob in blobs) * repeat
+
+    t0 = time.time()
+    for i in range(repeat):
+        for blob in blobs:
+            marshal.loads(blob)
+    report("bytes", time.time() - t0, nbytes, ncodes)
+
+    with tempfile.TemporaryFile() as f:
+        offsets = []
+        for blob in blobs:
+            offsets.append((f.tell(), len(blob)))
+            f.write(blob)
+        f.flush()
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(m)
+        try:
+            t0 = time.time()
+            for i in range(repeat):
+                for offset, size in offsets:
+                    marshal.loads(view[offset:offset + size])
+            report("mmap", time.time() - t0, nbytes, ncodes)
+        finally:
+            view.release()
+            m.close()
+
+
+def main(argv):
+    repeat = 5
+    directories = []
+    for arg in argv[1:]:
+        if arg.startswith('--repeat='):
+            repeat = int(arg[len('--repeat='):])
+        else:
+            directories.append(arg)
+    if not directories:
+        directories = [os.path.dirname(os.__file__)]
+    blobs = collect(directories)
+    print("%d modules, %d bytes of marshal data, %d runs" % (
+        len(blobs), sum(len(blob) for blob in blobs), repeat))
+    bench(blobs, repeat)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -2,7 +2,8 @@ from pypy.interpreter.error import OperationError, oefmt
 from pypy.interpreter.gateway import WrappedDefault, unwrap_spec
 from rpython.rlib.rarithmetic import intmask
 from rpython.rlib import rstackovf
-from pypy.objspace.std.marshal_impl import marshal, get_unmarshallers
+from pypy.objspace.std.marshal_impl import (marshal, get_unmarshallers,
+    intern_utf8)
 
 #
 # Write Python objects to files and read them back.  This is primarily
@@ -53,6 +54,13 @@ ignored."""
     obj = u.load_w_obj()
     return obj
 
+def loads_buffer(space, buf):
+    """Interp-level loads() reading directly from an RPython Buffer, e.g.
+    a SubBuffer of an mmap, without first copying the data into a bytes
+    object."""
+    u = StringUnmarshaller(space, None, buf)
+    return u.load_w_obj()
+
 
 class AbstractReaderWriter(object):
     def __init__(self, space):
@@ -333,6 +341,9 @@ class Unmarshaller(_Base):
         self.space = space
         self.reader = reader
         self.refs_w = []
+        # utf-8 string -> interned str object, for the names that are
+        # repeated in the data without using TYPE_REF
+        self.interned_utf8 = {}
 
     def get(self, n):
         assert n >= 0
@@ -392,6 +403,13 @@ class Unmarshaller(_Base):
         else:
             self.raise_exc('bad marshal data')
 
+    def intern_utf8(self, s):
+        w_ret = self.interned_utf8.get(s, None)
+        if w_ret is None:
+            w_ret = intern_utf8(self.space, s)
+            self.interned_utf8[s] = w_ret
+        return w_ret
+
     def get_pascal(self):
         lng = ord(self.get1())
         return self.get(lng)
@@ -442,9 +460,11 @@ class Unmarshaller(_Base):
 
 class StringUnmarshaller(Unmarshaller):
     # Unmarshaller with inlined buffer string
-    def __init__(self, space, w_str):
+    def __init__(self, space, w_str, buf=None):
         Unmarshaller.__init__(self, space, None)
-        self.buf = space.readbuf_w(w_str)
+        if buf is None:
+            buf = space.readbuf_w(w_str)
+        self.buf = buf
         self.bufpos = 0
         self.limit = self.buf.getlength()
 
@@ -43,6 +43,28 @@ class AppTestMarshalMore:
         s = marshal.loads(b"Z\x04ab\xc2\x84")
         assert s == "ab\xc2\x84"
 
+    def test_code_names_interned(self):
+        import marshal, sys
+        def foo(some_argument_name):
+            return some_argument_name.some_attribute_name
+        for version in [2, 3, 4]:
+            s = marshal.dumps(foo.__code__, version)
+            code2 = marshal.loads(s)
+            assert code2.co_varnames == ('some_argument_name',)
+            assert code2.co_names == ('some_attribute_name',)
+            assert code2.co_name == 'foo'
+            name = ''.join(['some_', 'attribute_name'])
+            assert sys.intern(name) is code2.co_names[0]
+
+    def test_loads_memoryview(self):
+        import marshal
+        def foo(x):
+            return (x, 'abc', 1.5)
+        s = marshal.dumps(foo.__code__)
+        view = memoryview(b'xx' + s + b'yy')[2:-2]
+        code2 = marshal.loads(view)
+        assert code2 == foo.__code__
+
     def test_shared_string(self):
         import marshal
         x = "hello, "
@@ -113,3 +135,25 @@ def test_int_roundtrip(space):
 
     assert type(w_res) is W_IntObject
     assert w_res.intval == w_a.intval == a
+
+def test_loads_buffer(space):
+    from rpython.rlib.buffer import StringBuffer, SubBuffer
+    w_code = space.appexec([], """():
+        def f(abc):
+            return abc.xyz + abc
+        return f.__code__""")
+    m = interp_marshal.StringMarshaller(space, 4)
+    interp_marshal.marshal(space, w_code, m)
+    s = m.get_value()
+    buf = SubBuffer(StringBuffer('garbage' + s + 'garbage'), 7, len(s))
+    w_res = interp_marshal.loads_buffer(space, buf)
+    assert space.eq_w(w_res, w_code)
+    assert w_res.co_names == ['xyz']
+    assert w_res.co_varnames == ['abc']
+
+def test_intern_utf8_table(space):
+    u = interp_marshal.StringUnmarshaller(space, space.newbytes(''))
+    w_a = u.intern_utf8('some_name')
+    assert u.intern_utf8('some_name') is w_a
+    assert space.new_interned_str('some_name') is w_a
+    assert u.interned_utf8 == {'some_name': w_a}
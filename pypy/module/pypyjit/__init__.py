@@ -2,11 +2,14 @@ from pypy.interpreter.mixedmodule import MixedModule
 
 class Module(MixedModule):
     appleveldefs = {
+        'save_profile': 'app_profile.save_profile',
+        'load_profile': 'app_profile.load_profile',
     }
 
     interpleveldefs = {
         'set_param':    'interp_jit.set_param',
         'residual_call': 'interp_jit.residual_call',
+        'hint': 'interp_jit.jit_hint',
         'not_from_assembler': 'interp_jit.W_NotFromAssembler',
         'get_jitcell_at_key': 'interp_jit.get_jitcell_at_key',
         'dont_trace_here': 'interp_jit.dont_trace_here',
@@ -17,6 +20,9 @@ class Module(MixedModule):
         'set_trace_too_long_hook': 'interp_resop.set_trace_too_long_hook',
         'get_stats_snapshot': 'interp_resop.get_stats_snapshot',
         'get_stats_asmmemmgr': 'interp_resop.get_stats_asmmemmgr',
+        'record_profile': 'interp_profile.record_profile',
+        'get_profile': 'interp_profile.get_profile',
+        'preload_profile': 'interp_profile.preload_profile',
         # those things are disabled because they have bugs, but if
         # they're found to be useful, fix test_ztranslation_jit_stats
         # in the backend first. get_stats_snapshot still produces
@@ -0,0 +1,47 @@
+
+_HEADER = '# PyPy JIT profile v1\n'
+
+def save_profile(path):
+    """Writes to 'path' the position of the loops compiled by the JIT
+    since record_profile() was called.  The file can be given to
+    load_profile() in a later process.  The file is replaced atomically,
+    so several processes can save to the same path."""
+    import os
+    from pypyjit import get_profile
+    entries = get_profile()
+    entries.sort()
+    tmppath = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmppath, 'w', encoding='utf-8',
+              errors='surrogateescape') as f:
+        f.write(_HEADER)
+        for filename, firstlineno, name, next_instr in entries:
+            if '\t' in filename or '\n' in filename:
+                continue
+            f.write('%s\t%d\t%s\t%d\n' % (filename, firstlineno, name,
+                                          next_instr))
+    os.replace(tmppath, path)
+
+def load_profile(path):
+    """Reads a file written by save_profile() and preloads it: the loops
+    listed in it are traced the first time they are entered instead of
+    after 'threshold' iterations.  Only the code objects created after
+    this call are affected, so it should be called as early as possible;
+    setting the environment variable PYPY_JIT_PROFILE does it at startup.
+    Returns the number of entries read."""
+    from pypyjit import preload_profile
+    entries = []
+    with open(path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+        if f.readline() != _HEADER:
+            raise ValueError("%r is not a PyPy JIT profile" % (path,))
+        for line in f:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) != 4:
+                continue
+            filename, firstlineno, name, next_instr = parts
+            try:
+                entries.append((filename, int(firstlineno), name,
+                                int(next_instr)))
+            except ValueError:
+                continue
+    preload_profile(entries)
+    return len(entries)
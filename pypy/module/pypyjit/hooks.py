@@ -5,6 +5,7 @@ from rpython.rlib.jit import JitHookInterface, Counters
 from pypy.interpreter.error import OperationError
 from pypy.module.pypyjit.interp_resop import (Cache, wrap_greenkey,
     WrappedOp, W_JitLoopInfo, wrap_oplist)
+from pypy.module.pypyjit.interp_profile import JitProfile
 
 class PyPyJitIface(JitHookInterface):
     def are_hooks_enabled(self):
@@ -12,7 +13,8 @@ class PyPyJitIface(JitHookInterface):
         cache = space.fromcache(Cache)
         return (cache.w_compile_hook is not None or
                 cache.w_abort_hook is not None or
-                cache.w_trace_too_long_hook is not None)
+                cache.w_trace_too_long_hook is not None or
+                space.fromcache(JitProfile).recording)
 
 
     def on_abort(self, reason, jitdriver, greenkey, greenkey_repr, logops, operations):
@@ -54,6 +56,9 @@ class PyPyJitIface(JitHookInterface):
                 cache.in_recursion = False
 
     def after_compile(self, debug_info):
+        profile = self.space.fromcache(JitProfile)
+        if profile.recording:
+            profile.record_loop(debug_info)
         self._compile_hook(debug_info, is_bridge=False)
 
     def after_compile_bridge(self, debug_info):
@@ -62,8 +62,19 @@ def get_location(next_instr, is_being_profiled, bytecode):
             name, intmask(next_instr), opname)
 
 def should_unroll_one_iteration(next_instr, is_being_profiled, bytecode):
+    hints = bytecode.jit_hints
+    if hints is not None and hints.unroll:
+        return True
     return (bytecode.co_flags & (CO_COROUTINE | CO_GENERATOR)) != 0
 
+def can_never_inline(next_instr, is_being_profiled, bytecode):
+    hints = bytecode.jit_hints
+    return hints is not None and not hints.inline
+
+def confirm_enter_jit(next_instr, is_being_profiled, bytecode, frame, ec):
+    hints = bytecode.jit_hints
+    return hints is None or hints.may_enter(next_instr)
+
 class PyPyJitDriver(JitDriver):
     reds = ['frame', 'ec']
     greens = ['next_instr', 'is_being_profiled', 'pycode']
@@ -74,6 +85,8 @@ pypyjitdriver = PyPyJitDriver(get_printable_location = get_printable_location,
                               get_unique_id = get_unique_id,
                               should_unroll_one_iteration =
                               should_unroll_one_iteration,
+                              can_never_inline = can_never_inline,
+                              confirm_enter_jit = confirm_enter_jit,
                               name='pypyjit',
                               is_recursive=True)
 
@@ -83,6 +96,8 @@ class __extend__(PyFrame):
         self = hint(self, access_directly=True)
         next_instr = r_uint(next_instr)
         is_being_profiled = self.get_is_being_profiled()
+        if not we_are_jitted() and pycode.jit_hints is not None:
+            pycode.jit_hints.tick(pycode, next_instr, is_being_profiled)
         try:
             while True:
                 pypyjitdriver.jit_merge_point(ec=ec,
@@ -111,6 +126,11 @@ class __extend__(PyFrame):
             self.last_instr = intmask(jumpto)
             ec.bytecode_trace(self, decr_by)
             jumpto = r_uint(self.last_instr)
+        else:
+            pycode = self.getcode()
+            if pycode.jit_hints is not None:
+                pycode.jit_hints.tick(pycode, jumpto,
+                                      self.get_is_being_profiled())
         #
         pypyjitdriver.can_enter_jit(frame=self, ec=ec, next_instr=jumpto,
                                  pycode=self.getcode(),
@@ -167,6 +187,74 @@ def set_param(space, __args__):
             else:
                 raise oefmt(space.w_TypeError, "no JIT parameter '%s'", key)
 
+class JitHints(object):
+    """Per-code-object settings given with pypyjit.hint()."""
+
+    def __init__(self, threshold, trace, inline, unroll):
+        self.threshold = threshold
+        self.trace = trace
+        self.inline = inline
+        self.unroll = unroll
+        self.counts = {}     # next_instr -> number of times it was reached
+
+    @dont_look_inside
+    def tick(self, pycode, next_instr, is_being_profiled):
+        # count the iterations of the loops (and the calls) of this code
+        # object.  When 'threshold' is reached, the JIT counter for that
+        # position is set close to its own bound, which makes the JIT
+        # trace it soon even if the global threshold is much larger.
+        if self.threshold <= 0:
+            return
+        key = intmask(next_instr)
+        count = self.counts.get(key, 0)
+        if count < self.threshold:
+            count += 1
+            self.counts[key] = count
+            if count == self.threshold:
+                ll_pycode = cast_instance_to_gcref(pycode)
+                jit_hooks.trace_next_iteration('pypyjit', next_instr,
+                                               int(is_being_profiled),
+                                               ll_pycode)
+
+    def may_enter(self, next_instr):
+        # called when the JIT counter reaches its bound: with a threshold
+        # larger than the global one, refuse to trace until it is reached
+        if not self.trace:
+            return False
+        if self.threshold > 0:
+            key = intmask(next_instr)
+            return self.counts.get(key, 0) >= self.threshold
+        return True
+
+@unwrap_spec(threshold=int, trace=bool, inline=bool, unroll=bool)
+def jit_hint(space, w_func, threshold=0, trace=True, inline=True,
+             unroll=False):
+    '''hint(func, threshold=0, trace=True, inline=True, unroll=False)
+
+    Give JIT hints for one function or code object only.
+        * threshold=N: number of iterations of a loop, or of calls of the
+          function, before they are traced (0=use the global parameters)
+        * trace=False: never trace or run machine code for this code
+          object, and never inline it in other traces
+        * inline=False: never inline it in the traces of other functions
+        * unroll=True: unroll one iteration of the loops before tracing
+    Returns the function, so it can also be used as a decorator.
+    Calling it again replaces all the previous hints.
+    '''
+    from pypy.interpreter.function import Function, Method
+    w_code = w_func
+    if isinstance(w_code, Method):
+        w_code = w_code.w_function
+    if isinstance(w_code, Function):
+        w_code = w_code.materialize_code()
+    if not isinstance(w_code, PyCode):
+        raise oefmt(space.w_TypeError,
+                    "expected a function or a code object, got %T", w_func)
+    if threshold < 0:
+        raise oefmt(space.w_ValueError, "threshold must be >= 0")
+    w_code.jit_hints = JitHints(threshold, trace, inline and trace, unroll)
+    return w_func
+
 @dont_look_inside
 def residual_call(space, w_callable, __args__):
     '''For testing.  Invokes callable(...), but without letting
@@ -0,0 +1,112 @@
+"""The JIT warm-up profile.
+
+While recording, the greenkey of every loop compiled by the JIT is
+remembered as (co_filename, co_firstlineno, co_name, next_instr).  A
+later process can preload such a list: whenever a code object matching
+an entry is created, the JIT counter of the corresponding position is
+pushed to the threshold, so that the loop is traced on its first
+iteration instead of after 'threshold' iterations.
+"""
+
+from rpython.rlib import jit, jit_hooks
+from rpython.rlib.rarithmetic import r_uint
+from rpython.rtyper.annlowlevel import (cast_instance_to_gcref,
+                                      cast_base_ptr_to_instance)
+from rpython.rtyper.lltypesystem import lltype
+from rpython.rtyper.rclass import OBJECT
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.pycode import PyCode, CodeHookCache
+
+
+class JitProfile(object):
+    def __init__(self, space):
+        self.space = space
+        self.recording = False
+        # (filename, firstlineno, name, next_instr) -> None
+        self.hot = {}
+        # (filename, firstlineno, name) -> list of next_instr
+        self.preloaded = {}
+
+    def record_loop(self, debug_info):
+        if debug_info.get_jitdriver().name != 'pypyjit':
+            return
+        greenkey = debug_info.greenkey
+        if greenkey is None:
+            return
+        next_instr = greenkey[0].getint()
+        ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
+                                         greenkey[2].getref_base())
+        pycode = cast_base_ptr_to_instance(PyCode, ll_code)
+        key = (pycode.co_filename, pycode.co_firstlineno, pycode.co_name,
+               next_instr)
+        self.hot[key] = None
+
+    def preload(self, filename, firstlineno, name, next_instr):
+        key = (filename, firstlineno, name)
+        positions = self.preloaded.get(key, None)
+        if positions is None:
+            positions = []
+            self.preloaded[key] = positions
+        if next_instr not in positions:
+            positions.append(next_instr)
+
+    def code_created(self, pycode):
+        key = (pycode.co_filename, pycode.co_firstlineno, pycode.co_name)
+        positions = self.preloaded.get(key, None)
+        if positions is None:
+            return
+        for next_instr in positions:
+            if 0 <= next_instr < len(pycode.co_code):
+                _trace_next_iteration(pycode, next_instr)
+
+@jit.dont_look_inside
+def _trace_next_iteration(pycode, next_instr):
+    ll_pycode = cast_instance_to_gcref(pycode)
+    jit_hooks.trace_next_iteration(
+        'pypyjit', r_uint(next_instr), 0, ll_pycode)
+
+
+def record_profile(space, w_enabled=None):
+    """record_profile(enabled=True)
+
+    Start or stop remembering the position of the loops compiled by the
+    JIT.  They are returned by get_profile() and written by
+    save_profile()."""
+    profile = space.fromcache(JitProfile)
+    if w_enabled is None:
+        profile.recording = True
+    else:
+        profile.recording = space.is_true(w_enabled)
+
+def get_profile(space):
+    """get_profile() -> list of (filename, firstlineno, name, next_instr)
+
+    Returns the position of the loops compiled since record_profile() was
+    called."""
+    profile = space.fromcache(JitProfile)
+    entries_w = []
+    for key in profile.hot:
+        filename, firstlineno, name, next_instr = key
+        entries_w.append(space.newtuple([
+            space.newfilename(filename), space.newint(firstlineno),
+            space.newtext(name), space.newint(next_instr)]))
+    return space.newlist(entries_w)
+
+def preload_profile(space, w_entries):
+    """preload_profile(entries)
+
+    Takes a list as returned by get_profile().  The loops at these
+    positions are traced the first time they are entered, in all code
+    objects created from now on; code objects that already exist are not
+    affected."""
+    profile = space.fromcache(JitProfile)
+    for w_entry in space.unpackiterable(w_entries):
+        items_w = space.fixedview(w_entry)
+        if len(items_w) != 4:
+            raise oefmt(space.w_ValueError,
+                        "expected (filename, firstlineno, name, next_instr)")
+        profile.preload(space.fsencode_w(items_w[0]),
+                        space.int_w(items_w[1]),
+                        space.text_w(items_w[2]),
+                        space.int_w(items_w[3]))
+    space.fromcache(CodeHookCache)._jit_profile = profile
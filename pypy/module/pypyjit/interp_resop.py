@@ -388,14 +388,22 @@ def get_stats_snapshot(space):
     space.setitem_str(w_counter_times, 'TRACING', space.newfloat(tr_time))
     b_time = jit_hooks.stats_get_times_value(None, Counters.BACKEND)
     space.setitem_str(w_counter_times, 'BACKEND', space.newfloat(b_time))
+    pause = jit_hooks.stats_get_longest_pause(None)
+    space.setitem_str(w_counter_times, 'LONGEST_PAUSE', space.newfloat(pause))
     return W_JitInfoSnapshot(space, w_times, w_counters, w_counter_times)
 
 def get_stats_asmmemmgr(space):
-    """Returns the raw memory currently used by the JIT backend,
-    as a pair (total_memory_allocated, memory_in_use)."""
+    """Returns the raw memory currently used by the JIT backend, as a
+    tuple (total_memory_allocated, memory_in_use, evicted_loops,
+    evicted_bytes).  The last two items count the loops freed, and the
+    size of their machine code, because of the 'code_memory_limit'
+    parameter."""
     m1 = jit_hooks.stats_asmmemmgr_allocated(None)
     m2 = jit_hooks.stats_asmmemmgr_used(None)
-    return space.newtuple([space.newint(m1), space.newint(m2)])
+    e1 = jit_hooks.stats_memmgr_evicted_loops(None)
+    e2 = jit_hooks.stats_memmgr_evicted_bytes(None)
+    return space.newtuple([space.newint(m1), space.newint(m2),
+                           space.newint(e1), space.newint(e2)])
 
 def enable_debug(space):
     """ Set the jit debugging - completely necessary for some stats to work,
@@ -0,0 +1,107 @@
+import py
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from rpython.jit.metainterp.history import JitCellToken, ConstInt, ConstPtr
+from rpython.rtyper.annlowlevel import cast_instance_to_base_ptr
+from rpython.rtyper.lltypesystem import lltype, llmemory
+from rpython.jit.metainterp.logger import Logger
+from rpython.rlib.jit import JitDebugInfo
+from pypy.module.pypyjit import interp_profile
+from pypy.module.pypyjit.hooks import pypy_hooks
+from pypy.module.pypyjit.test.test_jit_hook import MockJitDriverSD, MockSD
+
+
+class AppTestJitProfile(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        space = cls.space
+        traced = []
+
+        def fake_trace_next_iteration(pycode, next_instr):
+            traced.append((pycode.co_name, next_instr))
+        cls.orig_trace_next_iteration = interp_profile._trace_next_iteration
+        interp_profile._trace_next_iteration = fake_trace_next_iteration
+
+        @unwrap_spec(next_instr=int)
+        def interp_on_compile(w_code, next_instr):
+            ll_code = cast_instance_to_base_ptr(w_code)
+            code_gcref = lltype.cast_opaque_ptr(llmemory.GCREF, ll_code)
+            greenkey = [ConstInt(next_instr), ConstInt(0),
+                        ConstPtr(code_gcref)]
+            di_loop = JitDebugInfo(MockJitDriverSD, Logger(MockSD()),
+                                   JitCellToken(), [], 'loop', greenkey)
+            if pypy_hooks.are_hooks_enabled():
+                pypy_hooks.after_compile(di_loop)
+
+        def interp_get_traced():
+            result = space.newlist([space.newtuple([space.newtext(name),
+                                                    space.newint(i)])
+                                    for name, i in traced])
+            del traced[:]
+            return result
+
+        cls.w_on_compile = space.wrap(interp2app(interp_on_compile))
+        cls.w_get_traced = space.wrap(interp2app(interp_get_traced))
+        cls.w_tmpfile = space.wrap(str(py.test.ensuretemp("jitprofile")
+                                       .join("profile")))
+
+    def teardown_class(cls):
+        interp_profile._trace_next_iteration = cls.orig_trace_next_iteration
+
+    def test_record(self):
+        import pypyjit
+        def f():
+            pass
+        self.on_compile(f.__code__, 6)
+        assert pypyjit.get_profile() == []
+        pypyjit.record_profile()
+        try:
+            self.on_compile(f.__code__, 6)
+            self.on_compile(f.__code__, 6)
+            self.on_compile(f.__code__, 10)
+        finally:
+            pypyjit.record_profile(False)
+        entries = sorted(pypyjit.get_profile())
+        code = f.__code__
+        assert entries == [
+            (code.co_filename, code.co_firstlineno, 'f', 6),
+            (code.co_filename, code.co_firstlineno, 'f', 10)]
+
+    def test_preload(self):
+        import pypyjit
+        src = "def g():\n    for i in range(10):\n        pass\n"
+        pypyjit.preload_profile([('<preloaded>', 1, 'g', 2),
+                                 ('<preloaded>', 1, 'g', 10000),
+                                 ('<preloaded>', 2, 'g', 4)])
+        assert self.get_traced() == []
+        d = {}
+        exec(compile(src, '<preloaded>', 'exec'), d)
+        assert self.get_traced() == [('g', 2)]
+        exec(compile(src, '<other>', 'exec'), d)
+        assert self.get_traced() == []
+        raises(ValueError, pypyjit.preload_profile, [('<preloaded>', 1)])
+
+    def test_save_and_load(self):
+        import pypyjit
+        def h():
+            pass
+        pypyjit.record_profile()
+        try:
+            self.on_compile(h.__code__, 2)
+        finally:
+            pypyjit.record_profile(False)
+        pypyjit.save_profile(self.tmpfile)
+        with open(self.tmpfile) as f:
+            content = f.read()
+        assert content.startswith('# PyPy JIT profile')
+        assert '\th\t2\n' in content
+        assert pypyjit.load_profile(self.tmpfile) >= 1
+        self.get_traced()
+        src = "\n" * (h.__code__.co_firstlineno - 1) + "def h():\n    pass\n"
+        exec(compile(src, h.__code__.co_filename, 'exec'), {})
+        assert ('h', 2) in self.get_traced()
+        with open(self.tmpfile, 'w') as f:
+            f.write('garbage\n')
+        raises(ValueError, pypyjit.load_profile, self.tmpfile)
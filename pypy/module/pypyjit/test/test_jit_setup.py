@@ -53,3 +53,63 @@ class AppTestPyPyJIT:
             return (args, kwds)
         res = pypyjit.residual_call(f, 4, x=6)
         assert res == ((4,), {'x': 6})
+
+    def test_hint(self):
+        import pypyjit
+        def f(n):
+            total = 0
+            for i in range(n):
+                total += i
+            return total
+        assert pypyjit.hint(f, threshold=1000, inline=False) is f
+        assert f(10) == 45
+        assert pypyjit.hint(f.__code__, trace=False) is f.__code__
+        assert f(10) == 45
+        class A(object):
+            def m(self):
+                return 42
+        pypyjit.hint(A().m, unroll=True)
+        assert A().m() == 42
+        raises(TypeError, pypyjit.hint, len)
+        raises(TypeError, pypyjit.hint, 42)
+        raises(ValueError, pypyjit.hint, f, threshold=-1)
+
+
+def test_jit_hints():
+    from pypy.module.pypyjit.interp_jit import (JitHints, can_never_inline,
+        confirm_enter_jit, should_unroll_one_iteration)
+    from rpython.rlib import jit_hooks
+
+    class FakeCode(object):
+        jit_hints = None
+        co_flags = 0
+
+    code = FakeCode()
+    assert not can_never_inline(0, False, code)
+    assert confirm_enter_jit(0, False, code, None, None)
+    assert not should_unroll_one_iteration(0, False, code)
+
+    code.jit_hints = JitHints(0, False, False, True)
+    assert can_never_inline(0, False, code)
+    assert not confirm_enter_jit(0, False, code, None, None)
+    assert should_unroll_one_iteration(0, False, code)
+
+    traced = []
+    def trace_next_iteration(name, next_instr, is_being_profiled, ll_code):
+        traced.append(next_instr)
+    orig = jit_hooks.trace_next_iteration
+    jit_hooks.trace_next_iteration = trace_next_iteration
+    try:
+        hints = code.jit_hints = JitHints(3, True, True, False)
+        for i in range(2):
+            hints.tick(code, 10, False)
+            assert not confirm_enter_jit(10, False, code, None, None)
+        assert traced == []
+        hints.tick(code, 10, False)
+        assert traced == [10]
+        assert confirm_enter_jit(10, False, code, None, None)
+        assert not confirm_enter_jit(20, False, code, None, None)
+        hints.tick(code, 10, False)
+        assert traced == [10]
+    finally:
+        jit_hooks.trace_next_iteration = orig
@@ -124,12 +124,16 @@ zip_cache = W_ZipCache()
 
 @finishsigs
 class W_ZipImporter(W_Root):
-    def __init__(self, space, name, filename, zip_file, prefix):
+    def __init__(self, space, name, filename, zip_file, prefix,
+                 mtime=-1.0, size=-1):
         self.space = space
         self.name = name
         self.filename = filename
         self.zip_file = zip_file
         self.prefix = prefix
+        # mtime and size of the archive when its directory was read
+        self.mtime = mtime
+        self.size = size
 
     def getprefix(self, space):
         if ZIPSEP == os.path.sep:
@@ -451,6 +455,8 @@ def descr_new_zipimporter(space, w_type, w_name):
             if name[i] == os.path.sep or name[i] == ZIPSEP]
     parts_ends.append(len(name))
     filename = ""  # make annotator happy
+    mtime = -1.0
+    size = -1
     for i in parts_ends:
         filename = name[:i]
         if not filename:
@@ -461,34 +467,47 @@ def descr_new_zipimporter(space, w_type, w_name):
             raise oefmt(get_error(space), "Cannot find name %R", w_name)
         if not stat.S_ISDIR(s.st_mode):
             ok = True
+            mtime = s.st_mtime
+            size = s.st_size
             break
     if not ok:
         raise oefmt(get_error(space), "Did not find %R to be a valid zippath",
                     w_name)
+    stats = space.fromcache(importing.ImportCacheStats)
+    zip_file = None
     try:
-        w_result = zip_cache.get(filename)
-        if w_result is None:
+        w_cached = zip_cache.get(filename)
+        if w_cached is None:
             raise oefmt(get_error(space),
                         "Cannot import %R from zipfile, recursion detected or"
                         "already tried and failed", w_name)
+        # the directory of the archive read by the previous zipimporter
+        # is still valid if the file did not change
+        assert isinstance(w_cached, W_ZipImporter)
+        if w_cached.mtime == mtime and w_cached.size == size:
+            zip_file = w_cached.zip_file
+            stats.zip_reads_saved += 1
     except KeyError:
         zip_cache.cache[filename] = None
-    try:
-        zip_file = RZipFile(filename, 'r')
-    except (BadZipfile, OSError):
-        raise oefmt(get_error(space), "%R seems not to be a zipfile",
-                    space.newfilename(filename))
-    except RZlibError as e:
-        # in this case, CPython raises the direct exception coming
-        # from the zlib module: let's do the same
-        raise zlib_error(space, e.msg)
+    if zip_file is None:
+        stats.zip_reads += 1
+        try:
+            zip_file = RZipFile(filename, 'r')
+        except (BadZipfile, OSError):
+            raise oefmt(get_error(space), "%R seems not to be a zipfile",
+                        space.newfilename(filename))
+        except RZlibError as e:
+            # in this case, CPython raises the direct exception coming
+            # from the zlib module: let's do the same
+            raise zlib_error(space, e.msg)
 
     prefix = name[len(filename):]
     if prefix.startswith(os.path.sep) or prefix.startswith(ZIPSEP):
         prefix = prefix[1:]
     if prefix and not prefix.endswith(ZIPSEP) and not prefix.endswith(os.path.sep):
         prefix += ZIPSEP
-    w_result = W_ZipImporter(space, name, filename, zip_file, prefix)
+    w_result = W_ZipImporter(space, name, filename, zip_file, prefix,
+                             mtime, size)
     zip_cache.set(filename, w_result)
     return w_result
 
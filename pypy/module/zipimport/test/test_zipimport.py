@@ -223,6 +223,23 @@ def get_file():
         raises(ImportError, z.load_module, 'uuu')
         raises(zipimport.ZipImportError, z.get_code, 'uuu')
 
+    def test_reuse_directory(self):
+        import os, zipimport, _imp
+        self.writefile("xxreuse/__init__.py", "")
+        self.writefile("xxreuse/mod.py", "x = 42")
+        before = _imp.import_cache_stats()
+        z1 = zipimport.zipimporter(self.zipfile)
+        z2 = zipimport.zipimporter(self.zipfile + os.path.sep + "xxreuse")
+        after = _imp.import_cache_stats()
+        assert after['zip_read'] == before['zip_read'] + 1
+        assert after['zip_read_saved'] == before['zip_read_saved'] + 1
+        assert z2.find_module("mod") is z2
+        # the archive changes: its directory is read again
+        self.writefile("xxreuse/other.py", "y = 43")
+        z3 = zipimport.zipimporter(self.zipfile + os.path.sep + "xxreuse")
+        assert _imp.import_cache_stats()['zip_read'] == after['zip_read'] + 1
+        assert z3.find_module("other") is z3
+
     def test_package(self):
         import os, sys
         self.writefile("xxuuu/__init__.py", "")
@@ -570,22 +570,36 @@ class EmptyDictStrategy(DictStrategy):
     def get_empty_storage(self):
         return self.erase(None)
 
-    def switch_to_correct_strategy(self, w_dict, w_key):
+    def switch_to_correct_strategy(self, w_dict, w_key, w_value=None):
         from pypy.objspace.std.intobject import W_IntObject
         if type(w_key) is self.space.StringObjectCls:
             self.switch_to_bytes_strategy(w_dict)
             return
         if type(w_key) is self.space.UnicodeObjectCls:
-            self.switch_to_unicode_strategy(w_dict)
+            if (self.space.config.objspace.std.withasciidicts and
+                    _unicode_key_as_ascii(w_key) is not None):
+                self.switch_to_ascii_strategy(w_dict, w_value)
+            else:
+                self.switch_to_unicode_strategy(w_dict)
             return
         w_type = self.space.type(w_key)
         if self.space.is_w(w_type, self.space.w_int):
-            self.switch_to_int_strategy(w_dict)
+            if type(w_key) is W_IntObject:
+                self.switch_to_int_strategy(w_dict, w_value)
+            else:
+                self.switch_to_int_strategy(w_dict)
         elif w_type.compares_by_identity():
             self.switch_to_identity_strategy(w_dict)
         else:
             self.switch_to_object_strategy(w_dict)
 
+    @specialize.arg(2)
+    def switch_to(self, w_dict, strategycls):
+        strategy = self.space.fromcache(strategycls)
+        storage = strategy.get_empty_storage()
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = storage
+
     def switch_to_bytes_strategy(self, w_dict):
         strategy = self.space.fromcache(BytesDictStrategy)
         storage = strategy.get_empty_storage()
@@ -598,11 +612,24 @@ class EmptyDictStrategy(DictStrategy):
         w_dict.set_strategy(strategy)
         w_dict.dstorage = storage
 
-    def switch_to_int_strategy(self, w_dict):
-        strategy = self.space.fromcache(IntDictStrategy)
-        storage = strategy.get_empty_storage()
-        w_dict.set_strategy(strategy)
-        w_dict.dstorage = storage
+    def switch_to_ascii_strategy(self, w_dict, w_value=None):
+        # if the first value is an int or a float, store the values unboxed
+        unboxed = self.space.config.objspace.std.withunboxeddictvalues
+        if unboxed and _is_unboxed_int(w_value):
+            self.switch_to(w_dict, AsciiIntDictStrategy)
+        elif unboxed and _is_unboxed_float(w_value):
+            self.switch_to(w_dict, AsciiFloatDictStrategy)
+        else:
+            self.switch_to(w_dict, AsciiDictStrategy)
+
+    def switch_to_int_strategy(self, w_dict, w_value=None):
+        unboxed = self.space.config.objspace.std.withunboxeddictvalues
+        if unboxed and _is_unboxed_int(w_value):
+            self.switch_to(w_dict, IntIntDictStrategy)
+        elif unboxed and _is_unboxed_float(w_value):
+            self.switch_to(w_dict, IntFloatDictStrategy)
+        else:
+            self.switch_to(w_dict, IntDictStrategy)
 
     def switch_to_identity_strategy(self, w_dict):
         from pypy.objspace.std.identitydict import IdentityDictStrategy
@@ -630,12 +657,12 @@ class EmptyDictStrategy(DictStrategy):
 
     def setdefault(self, w_dict, w_key, w_default):
         # here the dict is always empty
-        self.switch_to_correct_strategy(w_dict, w_key)
+        self.switch_to_correct_strategy(w_dict, w_key, w_default)
         w_dict.setitem(w_key, w_default)
         return w_default
 
     def setitem(self, w_dict, w_key, w_value):
-        self.switch_to_correct_strategy(w_dict, w_key)
+        self.switch_to_correct_strategy(w_dict, w_key, w_value)
         w_dict.setitem(w_key, w_value)
 
     def setitem_str(self, w_dict, key, w_value):
@@ -1235,16 +1262,181 @@ class UnicodeDictStrategy(AbstractTypedStrategy, DictStrategy):
 create_iterator_classes(UnicodeDictStrategy)
 
 
+def _unicode_key_as_ascii(w_key):
+    """Return the str object 'w_key' as an RPython byte string if it
+    contains only ASCII characters, and None otherwise.  The utf-8
+    encoding is only computed (and cached) for ASCII strings."""
+    if w_key._utf8 is None and not _is_ascii(w_key._value):
+        return None
+    utf8 = w_key.utf8_or_none()
+    if utf8 is not None and len(utf8) == w_key._len():
+        return utf8
+    return None
+
+@specialize.argtype(0)
+def _is_ascii(s):
+    for c in s:
+        if ord(c) >= 0x80:
+            return False
+    return True
+
+
+class AbstractAsciiDictStrategy(AbstractTypedStrategy):
+    """Strategy for dicts whose keys are all pure-ASCII str objects.  The
+    keys are stored as RPython byte strings, i.e. one byte per character
+    instead of four, and with their hash cached in the string.  The first
+    non-ASCII key switches the dict to UnicodeDictStrategy."""
+    _mixin_ = True
+
+    def wrap(self, unwrapped):
+        return self.space.newunicode(unwrapped.decode('ascii'))
+
+    def unwrap(self, wrapped):
+        key = _unicode_key_as_ascii(wrapped)
+        assert key is not None
+        return key
+
+    def is_correct_type(self, w_obj):
+        return self.ascii_key(w_obj) is not None
+
+    def ascii_key(self, w_obj):
+        """Return 'w_obj' unwrapped as a key of this strategy, or None if it
+        is not an ASCII str.  The operations below call this only once."""
+        if type(w_obj) is self.space.UnicodeObjectCls:
+            return _unicode_key_as_ascii(w_obj)
+        return None
+
+    def get_empty_storage(self):
+        res = {}
+        mark_dict_non_null(res)
+        return self.erase(res)
+
+    def _never_equal_to(self, w_lookup_type):
+        # a non-ASCII str is never equal to any of our keys
+        space = self.space
+        return (space.is_w(w_lookup_type, space.w_unicode) or
+                _never_equal_to_string(space, w_lookup_type))
+
+    def setitem(self, w_dict, w_key, w_value):
+        key = self.ascii_key(w_key)
+        if key is not None:
+            self.unerase(w_dict.dstorage)[key] = w_value
+            return
+        elif type(w_key) is self.space.UnicodeObjectCls:
+            self.switch_to_unicode_strategy(w_dict)
+        else:
+            self.switch_to_object_strategy(w_dict)
+        w_dict.setitem(w_key, w_value)
+
+    def setdefault(self, w_dict, w_key, w_default):
+        key = self.ascii_key(w_key)
+        if key is not None:
+            return self.unerase(w_dict.dstorage).setdefault(key, w_default)
+        elif type(w_key) is self.space.UnicodeObjectCls:
+            self.switch_to_unicode_strategy(w_dict)
+        else:
+            self.switch_to_object_strategy(w_dict)
+        return w_dict.setdefault(w_key, w_default)
+
+    def delitem(self, w_dict, w_key):
+        key = self.ascii_key(w_key)
+        if key is not None:
+            del self.unerase(w_dict.dstorage)[key]
+        elif type(w_key) is self.space.UnicodeObjectCls:
+            raise KeyError
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.delitem(w_key)
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        key = self.ascii_key(w_key)
+        if key is not None:
+            return self.unerase(w_dict.dstorage).get(key, None)
+        elif self._never_equal_to(space.type(w_key)):
+            return None
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_key)
+
+    def pop(self, w_dict, w_key, w_default):
+        space = self.space
+        key = self.ascii_key(w_key)
+        if key is not None:
+            d = self.unerase(w_dict.dstorage)
+            if w_default is None:
+                return d.pop(key)
+            else:
+                return d.pop(key, w_default)
+        elif self._never_equal_to(space.type(w_key)):
+            if w_default is not None:
+                return w_default
+            raise KeyError
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.get_strategy().pop(w_dict, w_key, w_default)
+
+    def setitem_str(self, w_dict, key, w_value):
+        assert key is not None
+        if _is_ascii(key):
+            self.unerase(w_dict.dstorage)[key] = w_value
+        else:
+            self.switch_to_unicode_strategy(w_dict)
+            w_dict.setitem_str(key, w_value)
+
+    def getitem_str(self, w_dict, key):
+        assert key is not None
+        return self.unerase(w_dict.dstorage).get(key, None)
+
+    def switch_to_unicode_strategy(self, w_dict):
+        d = self.unerase(w_dict.dstorage)
+        strategy = self.space.fromcache(UnicodeDictStrategy)
+        d_new = strategy.unerase(strategy.get_empty_storage())
+        for key, w_value in d.iteritems():
+            d_new[key.decode('ascii')] = w_value
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = strategy.erase(d_new)
+
+    def listview_unicode(self, w_dict):
+        return [key.decode('ascii')
+                for key in self.unerase(w_dict.dstorage).iterkeys()]
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_unicode(self.listview_unicode(w_dict))
+
+    def wrapkey(space, key):
+        return space.newunicode(key.decode('ascii'))
+
+    @jit.look_inside_iff(lambda self, w_dict:
+                         w_dict_unrolling_heuristic(w_dict))
+    def view_as_kwargs(self, w_dict):
+        d = self.unerase(w_dict.dstorage)
+        l = len(d)
+        keys, values = [None] * l, [None] * l
+        i = 0
+        for key, val in d.iteritems():
+            keys[i] = key
+            values[i] = val
+            i += 1
+        return keys, values
+
+
+class AsciiDictStrategy(AbstractAsciiDictStrategy, DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("ascii")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+create_iterator_classes(AsciiDictStrategy)
+
+
 def from_unicode_key_dict(space, d):
     strategy = space.fromcache(UnicodeDictStrategy)
     storage = strategy.erase(d)
     return W_DictObject(space, strategy, storage)
 
 
-class IntDictStrategy(AbstractTypedStrategy, DictStrategy):
-    erase, unerase = rerased.new_erasing_pair("int")
-    erase = staticmethod(erase)
-    unerase = staticmethod(unerase)
+class AbstractIntDictStrategy(AbstractTypedStrategy):
+    _mixin_ = True
 
     def wrap(self, unwrapped):
         return self.space.newint(unwrapped)
@@ -1276,9 +1468,253 @@ class IntDictStrategy(AbstractTypedStrategy, DictStrategy):
     def w_keys(self, w_dict):
         return self.space.newlist_int(self.listview_int(w_dict))
 
+
+class IntDictStrategy(AbstractIntDictStrategy, DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("int")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
 create_iterator_classes(IntDictStrategy)
 
 
+# strategies that store the values unboxed as well, for dicts like
+# counters or accumulators whose values are all ints or all floats
+
+def _is_unboxed_int(w_value):
+    from pypy.objspace.std.intobject import W_IntObject
+    return w_value is not None and type(w_value) is W_IntObject
+
+def _is_unboxed_float(w_value):
+    from pypy.objspace.std.floatobject import W_FloatObject
+    return w_value is not None and type(w_value) is W_FloatObject
+
+
+class IntValuesMixin(object):
+    _mixin_ = True
+
+    def is_correct_value_type(self, w_value):
+        return _is_unboxed_int(w_value)
+
+    def unwrap_value(self, w_value):
+        return self.space.int_w(w_value)
+
+    def wrap_value(self, value):
+        return self.space.newint(value)
+
+    def wrapvalue(space, value):
+        return space.newint(value)
+
+
+class FloatValuesMixin(object):
+    _mixin_ = True
+
+    def is_correct_value_type(self, w_value):
+        return _is_unboxed_float(w_value)
+
+    def unwrap_value(self, w_value):
+        return self.space.float_w(w_value)
+
+    def wrap_value(self, value):
+        return self.space.newfloat(value)
+
+    def wrapvalue(space, value):
+        return space.newfloat(value)
+
+
+def make_unboxed_values_strategy(KeyStrategy, KeysMixin, ValuesMixin, name):
+    """Make a variant of KeyStrategy that stores the values unboxed, as
+    described by ValuesMixin.  KeysMixin is the mixin that KeyStrategy is
+    made from.  Any operation that does not fit switches the dict to
+    KeyStrategy (with boxed values) and redoes it there."""
+    # constant-folded: with ASCII keys, ascii_key() checks and unwraps the
+    # key in one go, while int keys use is_correct_type() and unwrap()
+    ascii_keys = KeysMixin is AbstractAsciiDictStrategy
+
+    class UnboxedValuesDictStrategy(ValuesMixin, KeysMixin, DictStrategy):
+        erase, unerase = rerased.new_erasing_pair(name)
+        erase = staticmethod(erase)
+        unerase = staticmethod(unerase)
+
+        def get_empty_storage(self):
+            return self.erase({})
+
+        def switch_to_boxed_strategy(self, w_dict):
+            d = self.unerase(w_dict.dstorage)
+            strategy = self.space.fromcache(KeyStrategy)
+            d_new = strategy.unerase(strategy.get_empty_storage())
+            for key, value in d.iteritems():
+                d_new[key] = self.wrap_value(value)
+            w_dict.set_strategy(strategy)
+            w_dict.dstorage = strategy.erase(d_new)
+
+        def switch_to_object_strategy(self, w_dict):
+            d = self.unerase(w_dict.dstorage)
+            strategy = self.space.fromcache(ObjectDictStrategy)
+            d_new = strategy.unerase(strategy.get_empty_storage())
+            for key, value in d.iteritems():
+                d_new[self.wrap(key)] = self.wrap_value(value)
+            w_dict.set_strategy(strategy)
+            w_dict.dstorage = strategy.erase(d_new)
+
+        if hasattr(KeyStrategy, 'switch_to_unicode_strategy'):
+            def switch_to_unicode_strategy(self, w_dict):
+                d = self.unerase(w_dict.dstorage)
+                strategy = self.space.fromcache(UnicodeDictStrategy)
+                d_new = strategy.unerase(strategy.get_empty_storage())
+                for key, value in d.iteritems():
+                    d_new[key.decode('ascii')] = self.wrap_value(value)
+                w_dict.set_strategy(strategy)
+                w_dict.dstorage = strategy.erase(d_new)
+
+        def setitem(self, w_dict, w_key, w_value):
+            if self.is_correct_value_type(w_value):
+                d = self.unerase(w_dict.dstorage)
+                if ascii_keys:
+                    key = self.ascii_key(w_key)
+                    if key is not None:
+                        d[key] = self.unwrap_value(w_value)
+                        return
+                elif self.is_correct_type(w_key):
+                    d[self.unwrap(w_key)] = self.unwrap_value(w_value)
+                    return
+            self.switch_to_boxed_strategy(w_dict)
+            w_dict.setitem(w_key, w_value)
+
+        def setitem_str(self, w_dict, key, w_value):
+            if ascii_keys:
+                assert key is not None
+                if _is_ascii(key) and self.is_correct_value_type(w_value):
+                    self.unerase(w_dict.dstorage)[key] = (
+                        self.unwrap_value(w_value))
+                    return
+                self.switch_to_boxed_strategy(w_dict)
+                w_dict.setitem_str(key, w_value)
+            else:
+                self.switch_to_object_strategy(w_dict)
+                w_dict.setitem(self.space.newtext(key), w_value)
+
+        def setdefault(self, w_dict, w_key, w_default):
+            d = self.unerase(w_dict.dstorage)
+            if ascii_keys:
+                key = self.ascii_key(w_key)
+                if key is not None:
+                    if key in d:
+                        return self.wrap_value(d[key])
+                    if self.is_correct_value_type(w_default):
+                        d[key] = self.unwrap_value(w_default)
+                        return w_default
+            elif self.is_correct_type(w_key):
+                key = self.unwrap(w_key)
+                if key in d:
+                    return self.wrap_value(d[key])
+                if self.is_correct_value_type(w_default):
+                    d[key] = self.unwrap_value(w_default)
+                    return w_default
+            self.switch_to_boxed_strategy(w_dict)
+            return w_dict.setdefault(w_key, w_default)
+
+        def getitem(self, w_dict, w_key):
+            space = self.space
+            d = self.unerase(w_dict.dstorage)
+            if ascii_keys:
+                key = self.ascii_key(w_key)
+                if key is not None:
+                    return self._getitem_key(d, key)
+            elif self.is_correct_type(w_key):
+                return self._getitem_key(d, self.unwrap(w_key))
+            if self._never_equal_to(space.type(w_key)):
+                return None
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_key)
+
+        def getitem_str(self, w_dict, key):
+            if ascii_keys:
+                assert key is not None
+                # a non-ASCII key is never in the dict
+                if _is_ascii(key):
+                    return self._getitem_key(self.unerase(w_dict.dstorage),
+                                             key)
+            # an int key is never equal to a str
+            return None
+
+        def _getitem_key(self, d, key):
+            try:
+                value = d[key]
+            except KeyError:
+                return None
+            return self.wrap_value(value)
+
+        def delitem(self, w_dict, w_key):
+            d = self.unerase(w_dict.dstorage)
+            if ascii_keys:
+                key = self.ascii_key(w_key)
+                if key is not None:
+                    del d[key]
+                    return
+            elif self.is_correct_type(w_key):
+                del d[self.unwrap(w_key)]
+                return
+            self.switch_to_boxed_strategy(w_dict)
+            w_dict.delitem(w_key)
+
+        def values(self, w_dict):
+            return [self.wrap_value(value)
+                    for value in self.unerase(w_dict.dstorage).itervalues()]
+
+        def items(self, w_dict):
+            space = self.space
+            return [space.newtuple([self.wrap(key), self.wrap_value(value)])
+                    for (key, value) in
+                        self.unerase(w_dict.dstorage).iteritems()]
+
+        def popitem(self, w_dict):
+            key, value = self.unerase(w_dict.dstorage).popitem()
+            return (self.wrap(key), self.wrap_value(value))
+
+        def pop(self, w_dict, w_key, w_default):
+            d = self.unerase(w_dict.dstorage)
+            if ascii_keys:
+                key = self.ascii_key(w_key)
+                if key is not None:
+                    return self._pop_key(d, key, w_default)
+            elif self.is_correct_type(w_key):
+                return self._pop_key(d, self.unwrap(w_key), w_default)
+            if self._never_equal_to(self.space.type(w_key)):
+                if w_default is not None:
+                    return w_default
+                raise KeyError
+            self.switch_to_boxed_strategy(w_dict)
+            return w_dict.get_strategy().pop(w_dict, w_key, w_default)
+
+        def _pop_key(self, d, key, w_default):
+            try:
+                value = d.pop(key)
+            except KeyError:
+                if w_default is not None:
+                    return w_default
+                raise
+            return self.wrap_value(value)
+
+        def view_as_kwargs(self, w_dict):
+            return (None, None)
+
+    UnboxedValuesDictStrategy.__name__ = (
+        KeyStrategy.__name__.replace('DictStrategy', '') +
+        ValuesMixin.__name__.replace('ValuesMixin', '') + 'DictStrategy')
+    create_iterator_classes(UnboxedValuesDictStrategy)
+    return UnboxedValuesDictStrategy
+
+AsciiIntDictStrategy = make_unboxed_values_strategy(
+    AsciiDictStrategy, AbstractAsciiDictStrategy, IntValuesMixin, "ascii-int")
+AsciiFloatDictStrategy = make_unboxed_values_strategy(
+    AsciiDictStrategy, AbstractAsciiDictStrategy, FloatValuesMixin,
+    "ascii-float")
+IntIntDictStrategy = make_unboxed_values_strategy(
+    IntDictStrategy, AbstractIntDictStrategy, IntValuesMixin, "int-int")
+IntFloatDictStrategy = make_unboxed_values_strategy(
+    IntDictStrategy, AbstractIntDictStrategy, FloatValuesMixin, "int-float")
+
+
 def update1(space, w_dict, w_data):
     if isinstance(w_data, W_DictMultiObject):    # optimization case only
         update1_dict_dict(space, w_dict, w_data)
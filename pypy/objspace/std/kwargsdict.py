@@ -21,6 +21,9 @@ class EmptyKwargsDictStrategy(EmptyDictStrategy):
         w_dict.set_strategy(strategy)
         w_dict.dstorage = storage
 
+    def switch_to_ascii_strategy(self, w_dict, w_value=None):
+        self.switch_to_unicode_strategy(w_dict)
+
 
 class KwargsDictStrategy(DictStrategy):
     erase, unerase = rerased.new_erasing_pair("kwargsdict")
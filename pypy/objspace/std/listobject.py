@@ -15,8 +15,10 @@ from rpython.rlib import debug, jit, rerased
 from rpython.rlib.listsort import make_timsort_class
 from rpython.rlib.objectmodel import (
     import_from_mixin, instantiate, newlist_hint, resizelist_hint, specialize)
-from rpython.rlib.rarithmetic import ovfcheck
+from rpython.rlib.rarithmetic import LONG_BIT, ovfcheck, widen
+from rpython.rlib.unroll import unrolling_iterable
 from rpython.rlib import longlong2float
+from rpython.rtyper.lltypesystem import rffi
 from rpython.tool.sourcetools import func_with_new_name
 
 from pypy.interpreter.baseobjspace import W_Root
@@ -41,6 +43,11 @@ __all__ = ['W_ListObject', 'make_range_list', 'make_empty_list_with_size']
 
 UNROLL_CUTOFF = 5
 
+# lists at least this long share their storage with full copies (l[:],
+# list(l), l.copy()) until one side is mutated; see
+# make_copy_on_write_strategy()
+COPY_ON_WRITE_CUTOFF = 64
+
 
 def make_range_list(space, start, step, length):
     if length <= 0:
@@ -86,7 +93,7 @@ def get_strategy_from_list_objects(space, list_w, sizehint):
                 check_int_or_float = (type(w_obj) is W_FloatObject)
                 break
         else:
-            return space.fromcache(IntegerListStrategy)
+            return get_strategy_from_int_objects(space, list_w)
 
     elif type(w_firstobj) is W_BytesObject:
         # check for all-strings
@@ -129,6 +136,35 @@ def get_strategy_from_list_objects(space, list_w, sizehint):
     return space.fromcache(ObjectListStrategy)
 
 
+def get_strategy_from_int_objects(space, list_w):
+    if not space.config.objspace.std.withnarrowintlists:
+        return space.fromcache(IntegerListStrategy)
+    minval, maxval = _int_range([space.int_w(w_obj) for w_obj in list_w])
+    return get_int_strategy(space, minval, maxval)
+
+
+def get_int_strategy(space, minval, maxval):
+    """Returns the narrowest strategy able to store all the ints between
+    minval and maxval."""
+    if space.config.objspace.std.withnarrowintlists:
+        for NarrowStrategy in unrolling_narrow_int_strategies:
+            if NarrowStrategy.MIN <= minval and maxval <= NarrowStrategy.MAX:
+                return space.fromcache(NarrowStrategy)
+    return space.fromcache(IntegerListStrategy)
+
+
+def _int_range(ints):
+    minval = maxval = 0
+    if ints:
+        minval = maxval = ints[0]
+    for intval in ints:
+        if intval < minval:
+            minval = intval
+        elif intval > maxval:
+            maxval = intval
+    return minval, maxval
+
+
 def _get_printable_location(w_type):
     return ('list__do_extend_from_iterable [w_type=%s]' %
             w_type.getname(w_type.space).encode('utf-8'))
@@ -934,7 +970,8 @@ class EmptyListStrategy(ListStrategy):
 
     def switch_to_correct_strategy(self, w_list, w_item):
         if type(w_item) is W_IntObject:
-            strategy = self.space.fromcache(IntegerListStrategy)
+            intval = self.space.int_w(w_item)
+            strategy = get_int_strategy(self.space, intval, intval)
         elif type(w_item) is W_BytesObject:
             strategy = self.space.fromcache(BytesListStrategy)
         elif type(w_item) is W_UnicodeObject:
@@ -994,6 +1031,18 @@ class EmptyListStrategy(ListStrategy):
         space = self.space
         if (isinstance(w_iterable, W_AbstractTupleObject)
                 and space._uses_tuple_iter(w_iterable)):
+            intlist = w_iterable.getitems_int()
+            if intlist is not None:
+                w_list.strategy = strategy = space.fromcache(
+                    IntegerListStrategy)
+                w_list.lstorage = strategy.erase(intlist[:])
+                return
+            floatlist = w_iterable.getitems_float()
+            if floatlist is not None:
+                w_list.strategy = strategy = space.fromcache(
+                    FloatListStrategy)
+                w_list.lstorage = strategy.erase(floatlist[:])
+                return
             w_list.__init__(space, w_iterable.getitems_copy())
             return
 
@@ -1339,7 +1388,27 @@ class AbstractUnwrappedStrategy(object):
             return self.erase([])
         return self.erase(newlist_hint(sizehint))
 
+    def new_copy_on_write_strategy(self):
+        """Returns a new strategy for two lists sharing their storage, or
+        None if this strategy never shares."""
+        return None
+
+    def _share_storage(self, w_list):
+        """If w_list is long enough, switch it to a copy-on-write
+        strategy and return that strategy, so that a copy can reuse its
+        storage.  Returns None if the storage must be copied."""
+        if self.length(w_list) < COPY_ON_WRITE_CUTOFF:
+            return None
+        strategy = self.new_copy_on_write_strategy()
+        if strategy is not None:
+            w_list.strategy = strategy
+        return strategy
+
     def clone(self, w_list):
+        strategy = self._share_storage(w_list)
+        if strategy is not None:
+            return W_ListObject.from_storage_and_strategy(
+                    self.space, w_list.lstorage, strategy)
         l = self.unerase(w_list.lstorage)
         storage = self.erase(l[:])
         w_clone = W_ListObject.from_storage_and_strategy(
@@ -1350,6 +1419,11 @@ class AbstractUnwrappedStrategy(object):
         resizelist_hint(self.unerase(w_list.lstorage), hint)
 
     def copy_into(self, w_list, w_other):
+        strategy = self._share_storage(w_list)
+        if strategy is not None:
+            w_other.strategy = strategy
+            w_other.lstorage = w_list.lstorage
+            return
         w_other.strategy = self
         items = self.unerase(w_list.lstorage)[:]
         w_other.lstorage = self.erase(items)
@@ -1399,6 +1473,8 @@ class AbstractUnwrappedStrategy(object):
         return self.erase(items)
 
     def getslice(self, w_list, start, stop, step, length):
+        if step == 1 and start == 0 and stop == self.length(w_list):
+            return self.clone(w_list)
         if step == 1 and 0 <= start <= stop:
             l = self.unerase(w_list.lstorage)
             assert start >= 0
@@ -1654,7 +1730,10 @@ class IntegerListStrategy(ListStrategy):
         return type(w_obj) is W_IntObject
 
     def list_is_correct_type(self, w_list):
-        return w_list.strategy is self.space.fromcache(IntegerListStrategy)
+        return isinstance(w_list.strategy, IntegerListStrategy)
+
+    def new_copy_on_write_strategy(self):
+        return CopyOnWriteIntegerListStrategy(self.space)
 
     def sort(self, w_list, reverse):
         l = self.unerase(w_list.lstorage)
@@ -1670,13 +1749,14 @@ class IntegerListStrategy(ListStrategy):
     _base_extend_from_list = _extend_from_list
 
     def _extend_from_list(self, w_list, w_other):
-        if isinstance(w_other.strategy, BaseRangeListStrategy):
+        if (isinstance(w_other.strategy, BaseRangeListStrategy) or
+                isinstance(w_other.strategy, BaseNarrowIntListStrategy)):
             l = self.unerase(w_list.lstorage)
             other = w_other.getitems_int()
             assert other is not None
             l += other
             return
-        if (w_other.strategy is self.space.fromcache(FloatListStrategy) or
+        if (isinstance(w_other.strategy, FloatListStrategy) or
             w_other.strategy is self.space.fromcache(IntOrFloatListStrategy)):
             if self.switch_to_int_or_float_strategy(w_list):
                 w_list.extend(w_other)
@@ -1687,11 +1767,12 @@ class IntegerListStrategy(ListStrategy):
     _base_setslice = setslice
 
     def setslice(self, w_list, start, step, slicelength, w_other):
-        if w_other.strategy is self.space.fromcache(RangeListStrategy):
+        if (w_other.strategy is self.space.fromcache(RangeListStrategy) or
+                isinstance(w_other.strategy, BaseNarrowIntListStrategy)):
             storage = self.erase(w_other.getitems_int())
             w_other = W_ListObject.from_storage_and_strategy(
                     self.space, storage, self)
-        if (w_other.strategy is self.space.fromcache(FloatListStrategy) or
+        if (isinstance(w_other.strategy, FloatListStrategy) or
             w_other.strategy is self.space.fromcache(IntOrFloatListStrategy)):
             if self.switch_to_int_or_float_strategy(w_list):
                 w_list.setslice(start, step, slicelength, w_other)
@@ -1731,6 +1812,146 @@ class IntegerListStrategy(ListStrategy):
         w_list.switch_to_object_strategy()
 
 
+class BaseNarrowIntListStrategy(ListStrategy):
+    """Base class of the strategies that store ints in fewer bits than a
+    machine word.  As soon as an int that does not fit is stored, the list
+    widens to the narrowest strategy that can hold it, and eventually to
+    IntegerListStrategy."""
+
+    MIN = 0
+    MAX = 0
+
+    def init_from_ints(self, w_list, ints):
+        raise NotImplementedError("abstract base class")
+
+    def switch_to_integer_strategy(self, w_list):
+        strategy = self.space.fromcache(IntegerListStrategy)
+        ints = self.getitems_int(w_list)
+        w_list.strategy = strategy
+        w_list.lstorage = strategy.erase(ints)
+
+    def switch_to_wider_strategy(self, w_list, minval, maxval):
+        strategy = get_int_strategy(self.space, min(minval, self.MIN),
+                                    max(maxval, self.MAX))
+        if isinstance(strategy, BaseNarrowIntListStrategy):
+            ints = self.getitems_int(w_list)
+            w_list.strategy = strategy
+            strategy.init_from_ints(w_list, ints)
+        else:
+            self.switch_to_integer_strategy(w_list)
+
+    def _fits(self, ints):
+        minval, maxval = _int_range(ints)
+        return self.MIN <= minval and maxval <= self.MAX
+
+
+def make_narrow_int_strategy(TYPE, bits):
+    BaseSort = make_timsort_class()
+
+    class NarrowSort(BaseSort):
+        def lt(self, a, b):
+            return a < b
+
+    class NarrowIntListStrategy(BaseNarrowIntListStrategy):
+        import_from_mixin(AbstractUnwrappedStrategy)
+
+        MIN = -(1 << (bits - 1))
+        MAX = (1 << (bits - 1)) - 1
+
+        _none_value = rffi.cast(TYPE, 0)
+
+        def wrap(self, intval):
+            return self.space.newint(widen(intval))
+
+        def unwrap(self, w_int):
+            return rffi.cast(TYPE, self.space.int_w(w_int))
+
+        erase, unerase = rerased.new_erasing_pair("int%d" % bits)
+        erase = staticmethod(erase)
+        unerase = staticmethod(unerase)
+
+        def is_correct_type(self, w_obj):
+            if type(w_obj) is not W_IntObject:
+                return False
+            intval = self.space.int_w(w_obj)
+            return self.MIN <= intval <= self.MAX
+
+        def list_is_correct_type(self, w_list):
+            return w_list.strategy is self.space.fromcache(
+                NarrowIntListStrategy)
+
+        def switch_to_next_strategy(self, w_list, w_sample_item):
+            if type(w_sample_item) is W_IntObject:
+                intval = self.space.int_w(w_sample_item)
+                self.switch_to_wider_strategy(w_list, intval, intval)
+            else:
+                # the IntegerListStrategy devolves further when the item
+                # is stored again
+                self.switch_to_integer_strategy(w_list)
+
+        def init_from_ints(self, w_list, ints):
+            w_list.lstorage = self.erase(
+                [rffi.cast(TYPE, intval) for intval in ints])
+
+        def sort(self, w_list, reverse):
+            l = self.unerase(w_list.lstorage)
+            sorter = NarrowSort(l, len(l))
+            sorter.sort()
+            if reverse:
+                l.reverse()
+
+        def getitems_int(self, w_list):
+            return [widen(item) for item in self.unerase(w_list.lstorage)]
+
+        _base_extend_from_list = _extend_from_list
+
+        def _extend_from_list(self, w_list, w_other):
+            if not self.list_is_correct_type(w_other):
+                ints = w_other.getitems_int()
+                if ints is not None:
+                    if self._fits(ints):
+                        l = self.unerase(w_list.lstorage)
+                        l += [rffi.cast(TYPE, intval) for intval in ints]
+                    else:
+                        minval, maxval = _int_range(ints)
+                        self.switch_to_wider_strategy(w_list, minval, maxval)
+                        w_list.extend(w_other)
+                    return
+            return self._base_extend_from_list(w_list, w_other)
+
+        _base_setslice = setslice
+
+        def setslice(self, w_list, start, step, slicelength, w_other):
+            if not self.list_is_correct_type(w_other):
+                ints = w_other.getitems_int()
+                if ints is not None:
+                    if not self._fits(ints):
+                        minval, maxval = _int_range(ints)
+                        self.switch_to_wider_strategy(w_list, minval, maxval)
+                        w_list.setslice(start, step, slicelength, w_other)
+                        return
+                    storage = self.erase(
+                        [rffi.cast(TYPE, intval) for intval in ints])
+                    w_other = W_ListObject.from_storage_and_strategy(
+                            self.space, storage, self)
+            return self._base_setslice(w_list, start, step, slicelength,
+                                       w_other)
+
+    NarrowIntListStrategy.__name__ = "Int%dListStrategy" % bits
+    return NarrowIntListStrategy
+
+Int8ListStrategy = make_narrow_int_strategy(rffi.SIGNEDCHAR, 8)
+Int16ListStrategy = make_narrow_int_strategy(rffi.SHORT, 16)
+Int32ListStrategy = make_narrow_int_strategy(rffi.INT, 32)
+
+if LONG_BIT > 32:
+    unrolling_narrow_int_strategies = unrolling_iterable([
+        Int8ListStrategy, Int16ListStrategy, Int32ListStrategy])
+else:
+    unrolling_narrow_int_strategies = unrolling_iterable([
+        Int8ListStrategy, Int16ListStrategy])
+
+
 class FloatListStrategy(ListStrategy):
     import_from_mixin(AbstractUnwrappedStrategy)
 
@@ -1750,7 +1971,10 @@ class FloatListStrategy(ListStrategy):
         return type(w_obj) is W_FloatObject
 
     def list_is_correct_type(self, w_list):
-        return w_list.strategy is self.space.fromcache(FloatListStrategy)
+        return isinstance(w_list.strategy, FloatListStrategy)
+
+    def new_copy_on_write_strategy(self):
+        return CopyOnWriteFloatListStrategy(self.space)
 
     def sort(self, w_list, reverse):
         l = self.unerase(w_list.lstorage)
@@ -1766,7 +1990,7 @@ class FloatListStrategy(ListStrategy):
     _base_extend_from_list = _extend_from_list
 
     def _extend_from_list(self, w_list, w_other):
-        if (w_other.strategy is self.space.fromcache(IntegerListStrategy) or
+        if (isinstance(w_other.strategy, IntegerListStrategy) or
             w_other.strategy is self.space.fromcache(IntOrFloatListStrategy)):
             # xxx a case that we don't optimize: [3.4].extend([9999999999999])
             # will cause a switch to int-or-float, followed by another
@@ -1780,7 +2004,7 @@ class FloatListStrategy(ListStrategy):
     _base_setslice = setslice
 
     def setslice(self, w_list, start, step, slicelength, w_other):
-        if (w_other.strategy is self.space.fromcache(IntegerListStrategy) or
+        if (isinstance(w_other.strategy, IntegerListStrategy) or
             w_other.strategy is self.space.fromcache(IntOrFloatListStrategy)):
             if self.switch_to_int_or_float_strategy(w_list):
                 w_list.setslice(start, step, slicelength, w_other)
@@ -1894,14 +2118,14 @@ class IntOrFloatListStrategy(ListStrategy):
         l += longlong_list
 
     def _extend_from_list(self, w_list, w_other):
-        if w_other.strategy is self.space.fromcache(IntegerListStrategy):
+        if isinstance(w_other.strategy, IntegerListStrategy):
             try:
                 longlong_list = IntegerListStrategy.int_2_float_or_int(w_other)
             except ValueError:
                 pass
             else:
                 return self._extend_longlong(w_list, longlong_list)
-        if w_other.strategy is self.space.fromcache(FloatListStrategy):
+        if isinstance(w_other.strategy, FloatListStrategy):
             try:
                 longlong_list = FloatListStrategy.float_2_float_or_int(w_other)
             except ValueError:
@@ -1917,14 +2141,14 @@ class IntOrFloatListStrategy(ListStrategy):
         return W_ListObject.from_storage_and_strategy(self.space, storage, self)
 
     def setslice(self, w_list, start, step, slicelength, w_other):
-        if w_other.strategy is self.space.fromcache(IntegerListStrategy):
+        if isinstance(w_other.strategy, IntegerListStrategy):
             try:
                 longlong_list = IntegerListStrategy.int_2_float_or_int(w_other)
             except ValueError:
                 pass
             else:
                 w_other = self._temporary_longlong_list(longlong_list)
-        elif w_other.strategy is self.space.fromcache(FloatListStrategy):
+        elif isinstance(w_other.strategy, FloatListStrategy):
             try:
                 longlong_list = FloatListStrategy.float_2_float_or_int(w_other)
             except ValueError:
@@ -1967,7 +2191,10 @@ class BytesListStrategy(ListStrategy):
         return type(w_obj) is W_BytesObject
 
     def list_is_correct_type(self, w_list):
-        return w_list.strategy is self.space.fromcache(BytesListStrategy)
+        return isinstance(w_list.strategy, BytesListStrategy)
+
+    def new_copy_on_write_strategy(self):
+        return CopyOnWriteBytesListStrategy(self.space)
 
     def sort(self, w_list, reverse):
         l = self.unerase(w_list.lstorage)
@@ -2000,7 +2227,10 @@ class UnicodeListStrategy(ListStrategy):
         return type(w_obj) is W_UnicodeObject
 
     def list_is_correct_type(self, w_list):
-        return w_list.strategy is self.space.fromcache(UnicodeListStrategy)
+        return isinstance(w_list.strategy, UnicodeListStrategy)
+
+    def new_copy_on_write_strategy(self):
+        return CopyOnWriteUnicodeListStrategy(self.space)
 
     def sort(self, w_list, reverse):
         l = self.unerase(w_list.lstorage)
@@ -2012,6 +2242,93 @@ class UnicodeListStrategy(ListStrategy):
     def getitems_unicode(self, w_list):
         return self.unerase(w_list.lstorage)
 
+
+def make_copy_on_write_strategy(Strategy):
+    """Returns a subclass of Strategy for lists whose storage may be shared
+    with other lists.  Reading works exactly as with Strategy; every
+    mutation first gives the list a private copy of its storage and
+    switches it back to Strategy.  Unlike the other strategies, there is
+    one instance per shared storage, which counts the lists sharing it:
+    the last one can take the storage without copying it."""
+
+    class CopyOnWriteStrategy(Strategy):
+
+        def __init__(self, space):
+            Strategy.__init__(self, space)
+            # created by new_copy_on_write_strategy() for two lists; this
+            # is an upper bound, as lists can die or be cleared without
+            # telling us
+            self.sharers = 2
+
+        def _share_storage(self, w_list):
+            self.sharers += 1
+            return self
+
+        def unshare(self, w_list):
+            strategy = self.space.fromcache(Strategy)
+            self.sharers -= 1
+            if self.sharers > 0:
+                w_list.lstorage = strategy.getstorage_copy(w_list)
+            w_list.strategy = strategy
+
+        def _resize_hint(self, w_list, hint):
+            self.unshare(w_list)
+            w_list._resize_hint(hint)
+
+        def append(self, w_list, w_item):
+            self.unshare(w_list)
+            w_list.append(w_item)
+
+        def insert(self, w_list, index, w_item):
+            self.unshare(w_list)
+            w_list.insert(index, w_item)
+
+        def extend(self, w_list, w_any):
+            self.unshare(w_list)
+            w_list.extend(w_any)
+
+        def setitem(self, w_list, index, w_item):
+            self.unshare(w_list)
+            w_list.setitem(index, w_item)
+
+        def setslice(self, w_list, start, step, slicelength, w_other):
+            self.unshare(w_list)
+            w_list.setslice(start, step, slicelength, w_other)
+
+        def deleteslice(self, w_list, start, step, slicelength):
+            self.unshare(w_list)
+            w_list.deleteslice(start, step, slicelength)
+
+        def pop_end(self, w_list):
+            self.unshare(w_list)
+            return w_list.pop_end()
+
+        def pop(self, w_list, index):
+            self.unshare(w_list)
+            return w_list.pop(index)
+
+        def inplace_mul(self, w_list, times):
+            self.unshare(w_list)
+            w_list.inplace_mul(times)
+
+        def reverse(self, w_list):
+            self.unshare(w_list)
+            w_list.reverse()
+
+        def sort(self, w_list, reverse):
+            self.unshare(w_list)
+            w_list.sort(reverse)
+
+    CopyOnWriteStrategy.__name__ = "CopyOnWrite" + Strategy.__name__
+    return CopyOnWriteStrategy
+
+CopyOnWriteIntegerListStrategy = make_copy_on_write_strategy(
+    IntegerListStrategy)
+CopyOnWriteFloatListStrategy = make_copy_on_write_strategy(FloatListStrategy)
+CopyOnWriteBytesListStrategy = make_copy_on_write_strategy(BytesListStrategy)
+CopyOnWriteUnicodeListStrategy = make_copy_on_write_strategy(
+    UnicodeListStrategy)
+
 # _______________________________________________________
 
 init_signature = Signature(['sequence'], None, None)
@@ -30,6 +30,14 @@ NUM_DIGITS_POW2 = 1 << NUM_DIGITS
 # dict)
 LIMIT_MAP_ATTRIBUTES = 80
 
+# the maximum number of keys in the table shared by the devolved dicts of
+# the instances of one class (afterwards new keys need a per-instance dict)
+LIMIT_SHARED_KEYS = 1000
+
+# when the number of maps of a class reaches this value, and then every
+# time it doubles, it is reported in the 'mapdict-explosion' debug section
+MAP_EXPLOSION_THRESHOLD = 256
+
 
 class AbstractAttribute(object):
     _immutable_fields_ = ['terminator']
@@ -144,6 +152,7 @@ class AbstractAttribute(object):
         if attr is None:
             attr = PlainAttribute(name, index, self)
             cache[name, index] = attr
+            self.terminator.note_new_map()
         return attr
 
     def add_attr(self, obj, name, index, w_value):
@@ -262,6 +271,9 @@ class AbstractAttribute(object):
     def materialize_str_dict(self, space, obj, str_dict):
         raise NotImplementedError("abstract base class")
 
+    def materialize_split_dict(self, space, obj, split_storage):
+        raise NotImplementedError("abstract base class")
+
     def remove_dict_entries(self, obj):
         raise NotImplementedError("abstract base class")
 
@@ -272,10 +284,26 @@ class AbstractAttribute(object):
 class Terminator(AbstractAttribute):
     _immutable_fields_ = ['w_cls']
 
+    # the number of maps (PlainAttributes) created below this terminator
+    num_maps = 0
+
     def __init__(self, space, w_cls):
         AbstractAttribute.__init__(self, space, self)
         self.w_cls = w_cls
 
+    def note_new_map(self):
+        self.num_maps += 1
+        num_maps = self.num_maps
+        if (num_maps >= MAP_EXPLOSION_THRESHOLD and
+                num_maps & (num_maps - 1) == 0):
+            debug.debug_start("mapdict-explosion")
+            if self.w_cls is None:
+                name = "<dict>"
+            else:
+                name = self.w_cls.name    # utf-8 bytes
+            debug.debug_print("class", name, "has", num_maps, "maps")
+            debug.debug_stop("mapdict-explosion")
+
     def _read_terminator(self, obj, name, index):
         return None
 
@@ -287,7 +315,7 @@ class Terminator(AbstractAttribute):
             assert isinstance(w_dict, W_DictMultiObject)
             strategy = w_dict.get_strategy()
             assert isinstance(strategy, MapDictStrategy)
-            strategy.switch_to_text_strategy(w_dict)
+            strategy.switch_to_split_or_text_strategy(w_dict)
         return True
 
     def copy(self, obj):
@@ -312,10 +340,11 @@ class Terminator(AbstractAttribute):
         return "<%s w_cls=%s>" % (self.__class__.__name__, self.w_cls)
 
 class DictTerminator(Terminator):
-    _immutable_fields_ = ['devolved_dict_terminator']
+    _immutable_fields_ = ['devolved_dict_terminator', 'shared_keys']
     def __init__(self, space, w_cls):
         Terminator.__init__(self, space, w_cls)
         self.devolved_dict_terminator = DevolvedDictTerminator(space, w_cls)
+        self.shared_keys = SharedDictKeys()
 
     def materialize_r_dict(self, space, obj, dict_w):
         return self._make_devolved(space)
@@ -323,6 +352,9 @@ class DictTerminator(Terminator):
     def materialize_str_dict(self, space, obj, dict_w):
         return self._make_devolved(space)
 
+    def materialize_split_dict(self, space, obj, split_storage):
+        return self._make_devolved(space)
+
     def _make_devolved(self, space):
         result = Object()
         result.space = space
@@ -439,6 +471,16 @@ class PlainAttribute(AbstractAttribute):
             self._copy_attr(obj, new_obj)
         return new_obj
 
+    def materialize_split_dict(self, space, obj, split_storage):
+        new_obj = self.back.materialize_split_dict(space, obj, split_storage)
+        if self.index == DICT:
+            w_value = obj._mapdict_read_storage(self.storageindex)
+            flag = split_storage.setitem(self.name, w_value)
+            assert flag
+        else:
+            self._copy_attr(obj, new_obj)
+        return new_obj
+
     def remove_dict_entries(self, obj):
         new_obj = self.back.remove_dict_entries(obj)
         if self.index != DICT:
@@ -471,6 +513,24 @@ class MapAttrCache(object):
     def _cleanup_(self):
         self.clear()
 
+def map_tree_stats(terminator):
+    """Returns (number of maps, largest number of transitions out of one
+    map, largest number of attributes in one map) for all the maps
+    created below 'terminator'."""
+    num_maps = 0
+    max_fanout = 0
+    max_length = 0
+    pending = [terminator]
+    while pending:
+        attr = pending.pop()
+        max_length = max(max_length, attr.length())
+        if attr.cache_attrs is not None:
+            max_fanout = max(max_fanout, len(attr.cache_attrs))
+            for child in attr.cache_attrs.values():
+                pending.append(child)
+                num_maps += 1
+    return num_maps, max_fanout, max_length
+
 # ____________________________________________________________
 # object implementation
 
@@ -777,6 +837,31 @@ class MapDictStrategy(DictStrategy):
         assert w_obj.getdict(self.space) is w_dict or w_obj._get_mapdict_map().terminator.w_cls is None
         materialize_str_dict(self.space, w_obj, str_dict)
 
+    def switch_to_split_or_text_strategy(self, w_dict):
+        """Called when an instance has too many attributes for mapdict.
+        If possible, its attributes go into a SplitDictStrategy sharing
+        its keys with the other instances of the class."""
+        w_obj = self.unerase(w_dict.dstorage)
+        map = w_obj._get_mapdict_map()
+        terminator = map.terminator
+        assert isinstance(terminator, DictTerminator)
+        attrs = []
+        curr_map = map.search(DICT)
+        while curr_map is not None:
+            attrs.append(curr_map.name)
+            curr_map = curr_map.back.search(DICT)
+        attrs.reverse()
+        if not terminator.shared_keys.can_append_in_order(attrs):
+            self.switch_to_text_strategy(w_dict)
+            return
+        strategy = self.space.fromcache(SplitDictStrategy)
+        split_storage = SplitDictStorage(terminator.shared_keys)
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = strategy.erase(split_storage)
+        assert w_obj.getdict(self.space) is w_dict or terminator.w_cls is None
+        new_obj = map.materialize_split_dict(self.space, w_obj, split_storage)
+        w_obj._set_mapdict_storage_and_map(new_obj.storage, new_obj.map)
+
     def getitem(self, w_dict, w_key):
         space = self.space
         w_lookup_type = space.type(w_key)
@@ -957,6 +1042,262 @@ class MapDictIteratorItems(BaseItemIterator):
         return None, None
 
 
+# ____________________________________________________________
+# split dicts: the dicts of instances with too many attributes for mapdict
+# share the table of their keys with the other instances of the class, and
+# only store an array of values themselves (like CPython's split tables)
+
+class SharedDictKeys(object):
+    """The keys of the split dicts of the instances of one class, in the
+    order in which they were first added.  Keys are never removed."""
+
+    def __init__(self):
+        self.keys = []
+        self.indexes = {}
+
+    def lookup(self, key):
+        return self.indexes.get(key, -1)
+
+    def add(self, key):
+        """Appends key and returns its index, or -1 if the table is full."""
+        index = len(self.keys)
+        if index >= LIMIT_SHARED_KEYS:
+            return -1
+        self.keys.append(key)
+        self.indexes[key] = index
+        return index
+
+    def can_append_in_order(self, keys):
+        """Tells if a split dict with all of 'keys', in this order, can
+        use this table."""
+        last = -1
+        missing = 0
+        for key in keys:
+            index = self.lookup(key)
+            if index == -1:
+                missing += 1
+            elif index <= last or missing:
+                return False
+            else:
+                last = index
+        return len(self.keys) + missing <= LIMIT_SHARED_KEYS
+
+
+class SplitDictStorage(object):
+    def __init__(self, shared_keys):
+        self.shared_keys = shared_keys
+        # values_w[i] is the value of shared_keys.keys[i], or None
+        self.values_w = []
+        self.length = 0
+
+    def getitem(self, key):
+        index = self.shared_keys.lookup(key)
+        if 0 <= index < len(self.values_w):
+            return self.values_w[index]
+        return None
+
+    def setitem(self, key, w_value):
+        """Returns False if key cannot be stored without breaking the
+        insertion order or growing the shared table too much."""
+        values_w = self.values_w
+        index = self.shared_keys.lookup(key)
+        if 0 <= index < len(values_w):
+            if values_w[index] is None:
+                return False    # re-adding the key would move it to the end
+            values_w[index] = w_value
+            return True
+        if index == -1:
+            index = self.shared_keys.add(key)
+            if index == -1:
+                return False
+        while len(values_w) < index:
+            values_w.append(None)
+        values_w.append(w_value)
+        self.length += 1
+        return True
+
+    def delitem(self, key):
+        values_w = self.values_w
+        index = self.shared_keys.lookup(key)
+        if not (0 <= index < len(values_w)) or values_w[index] is None:
+            return False
+        values_w[index] = None
+        self.length -= 1
+        while values_w and values_w[-1] is None:
+            values_w.pop()
+        return True
+
+    def next_index(self, index):
+        """Returns the first index >= 'index' with a value, or -1."""
+        values_w = self.values_w
+        while index < len(values_w):
+            if values_w[index] is not None:
+                return index
+            index += 1
+        return -1
+
+
+class SplitDictStrategy(DictStrategy):
+
+    erase, unerase = rerased.new_erasing_pair("split")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def __init__(self, space):
+        self.space = space
+
+    def get_empty_storage(self):
+        return self.erase(SplitDictStorage(SharedDictKeys()))
+
+    def switch_to_object_strategy(self, w_dict):
+        split_storage = self.unerase(w_dict.dstorage)
+        space = self.space
+        strategy = space.fromcache(ObjectDictStrategy)
+        dict_w = strategy.unerase(strategy.get_empty_storage())
+        keys = split_storage.shared_keys.keys
+        index = split_storage.next_index(0)
+        while index != -1:
+            dict_w[space.newtext(keys[index])] = split_storage.values_w[index]
+            index = split_storage.next_index(index + 1)
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = strategy.erase(dict_w)
+
+    def switch_to_text_strategy(self, w_dict):
+        split_storage = self.unerase(w_dict.dstorage)
+        space = self.space
+        strategy = space.fromcache(UnicodeDictStrategy)
+        str_dict = strategy.unerase(strategy.get_empty_storage())
+        keys = split_storage.shared_keys.keys
+        index = split_storage.next_index(0)
+        while index != -1:
+            uni_name = decode_utf8(space, keys[index])
+            str_dict[uni_name] = split_storage.values_w[index]
+            index = split_storage.next_index(index + 1)
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = strategy.erase(str_dict)
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        w_lookup_type = space.type(w_key)
+        if space.is_w(w_lookup_type, space.w_text):
+            return self.getitem_str(w_dict, space.text_w(w_key))
+        elif _never_equal_to_string(space, w_lookup_type):
+            return None
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_key)
+
+    def getitem_str(self, w_dict, key):
+        return self.unerase(w_dict.dstorage).getitem(key)
+
+    def setitem_str(self, w_dict, key, w_value):
+        if not self.unerase(w_dict.dstorage).setitem(key, w_value):
+            self.switch_to_text_strategy(w_dict)
+            w_dict.setitem_str(key, w_value)
+
+    def setitem(self, w_dict, w_key, w_value):
+        space = self.space
+        if space.is_w(space.type(w_key), space.w_text):
+            self.setitem_str(w_dict, space.text_w(w_key), w_value)
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.setitem(w_key, w_value)
+
+    def setdefault(self, w_dict, w_key, w_default):
+        space = self.space
+        if space.is_w(space.type(w_key), space.w_text):
+            key = space.text_w(w_key)
+            w_result = self.getitem_str(w_dict, key)
+            if w_result is not None:
+                return w_result
+            self.setitem_str(w_dict, key, w_default)
+            return w_default
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.setdefault(w_key, w_default)
+
+    def delitem(self, w_dict, w_key):
+        space = self.space
+        w_key_type = space.type(w_key)
+        if space.is_w(w_key_type, space.w_text):
+            key = space.text_w(w_key)
+            if not self.unerase(w_dict.dstorage).delitem(key):
+                raise KeyError
+        elif _never_equal_to_string(space, w_key_type):
+            raise KeyError
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.delitem(w_key)
+
+    def length(self, w_dict):
+        return self.unerase(w_dict.dstorage).length
+
+    def iterkeys(self, w_dict):
+        return SplitDictIteratorKeys(self.space, self, w_dict)
+    def itervalues(self, w_dict):
+        return SplitDictIteratorValues(self.space, self, w_dict)
+    def iteritems(self, w_dict):
+        return SplitDictIteratorItems(self.space, self, w_dict)
+
+
+class SplitDictIteratorMixin(object):
+
+    def _init(self, strategy, w_dict):
+        self.split_storage = strategy.unerase(w_dict.dstorage)
+        self.index = 0
+
+    def _next_index(self):
+        # stop if the dict switched to another strategy meanwhile
+        if self.w_dict.get_strategy() is not self.strategy:
+            return -1
+        index = self.split_storage.next_index(self.index)
+        self.index = index + 1
+        return index
+
+
+class SplitDictIteratorKeys(BaseKeyIterator):
+    objectmodel.import_from_mixin(SplitDictIteratorMixin)
+
+    def __init__(self, space, strategy, w_dict):
+        BaseKeyIterator.__init__(self, space, strategy, w_dict)
+        self._init(strategy, w_dict)
+
+    def next_key_entry(self):
+        index = self._next_index()
+        if index == -1:
+            return None
+        return self.space.newtext(self.split_storage.shared_keys.keys[index])
+
+
+class SplitDictIteratorValues(BaseValueIterator):
+    objectmodel.import_from_mixin(SplitDictIteratorMixin)
+
+    def __init__(self, space, strategy, w_dict):
+        BaseValueIterator.__init__(self, space, strategy, w_dict)
+        self._init(strategy, w_dict)
+
+    def next_value_entry(self):
+        index = self._next_index()
+        if index == -1:
+            return None
+        return self.split_storage.values_w[index]
+
+
+class SplitDictIteratorItems(BaseItemIterator):
+    objectmodel.import_from_mixin(SplitDictIteratorMixin)
+
+    def __init__(self, space, strategy, w_dict):
+        BaseItemIterator.__init__(self, space, strategy, w_dict)
+        self._init(strategy, w_dict)
+
+    def next_item_entry(self):
+        index = self._next_index()
+        if index == -1:
+            return None, None
+        w_key = self.space.newtext(self.split_storage.shared_keys.keys[index])
+        return w_key, self.split_storage.values_w[index]
+
+
 # ____________________________________________________________
 # Magic caching
 
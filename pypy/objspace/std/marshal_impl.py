@@ -369,7 +369,7 @@ def marshal_pycode(space, w_pycode, m):
     m.put_int(x.co_stacksize)
     m.put_int(x.co_flags)
     m.atom_str(TYPE_STRING, x.co_code)
-    _marshal_tuple(space, x.co_consts_w, m)
+    _marshal_tuple(space, x.get_consts_w(), m)
     _marshal_tuple(space, x.co_names_w, m)   # list of w_unicodes
     co_varnames_w = [space.newunicode(_decode_utf8(space, s)) for s in x.co_varnames]
     co_freevars_w = [space.newunicode(_decode_utf8(space, s)) for s in x.co_freevars]
@@ -386,9 +386,52 @@ def marshal_pycode(space, w_pycode, m):
 # into rpython-level lists of strings.  Only for code objects.
 
 def _unmarshal_strlist(u):
-    items_w = _unmarshal_tuple_w(u)
-    return [_encode_utf8(u.space, u.space.unicode_w(w_item))
-            for w_item in items_w]
+    space = u.space
+    tc = u.get1()
+    base_tc = chr(ord(tc) & ~FLAG_REF)
+    if base_tc != TYPE_TUPLE and base_tc != TYPE_SMALL_TUPLE:
+        w_obj = u._dispatch[ord(tc)](space, u, tc)
+        if w_obj is None:
+            raise oefmt(space.w_TypeError, "NULL object in marshal data")
+        try:
+            items_w = space.fixedview(w_obj)
+        except OperationError as e:
+            if e.match(space, space.w_TypeError):
+                u.raise_exc('invalid marshal data for code object')
+            raise
+        return [_encode_utf8(space, space.unicode_w(w_item))
+                for w_item in items_w]
+    # Fast path for the tuples of names written by marshal_pycode: the
+    # strings are read as utf-8 and interned with u.intern_utf8(), instead
+    # of being decoded to unicode objects and then encoded back.
+    index = -1
+    if ord(tc) & FLAG_REF:
+        index = len(u.refs_w)
+        u.refs_w.append(None)
+    if base_tc == TYPE_SMALL_TUPLE:
+        lng = ord(u.get1())
+    else:
+        lng = u.get_lng()
+    result = [''] * lng
+    items_w = [None] * lng
+    for i in range(lng):
+        tc = u.get1()
+        base_tc = chr(ord(tc) & ~FLAG_REF)
+        if base_tc == TYPE_INTERNED:
+            s = u.get_str()
+            w_item = u.intern_utf8(s)
+            if ord(tc) & FLAG_REF:
+                u.refs_w.append(w_item)
+        else:
+            w_item = u._dispatch[ord(tc)](space, u, tc)
+            if w_item is None:
+                raise oefmt(space.w_TypeError, "NULL object in marshal data")
+            s = _encode_utf8(space, space.unicode_w(w_item))
+        result[i] = s
+        items_w[i] = w_item
+    if index >= 0:
+        u.refs_w[index] = space.newtuple(items_w)
+    return result
 
 def _unmarshal_tuple_w(u):
     w_obj = u.get_w_obj()
@@ -457,8 +500,15 @@ def unmarshal_unicode(space, u, tc):
 
 @unmarshaller(TYPE_INTERNED)
 def unmarshal_interned(space, u, tc):
-    w_ret = unmarshal_unicode(space, u, tc)
-    return u.space.new_interned_w_str(w_ret)
+    return u.intern_utf8(u.get_str())
+
+def intern_utf8(space, s):
+    """Returns the interned str object whose utf-8 encoding is 's'."""
+    uc = _decode_utf8(space, s)
+    w_ret = space.interned_strings.get(uc)
+    if w_ret is None:
+        w_ret = space.new_interned_w_str(space.newunicode(uc))
+    return w_ret
 
 def _unmarshal_ascii(u, short_length, interned):
     if short_length:
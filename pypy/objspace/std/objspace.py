@@ -561,6 +561,14 @@ class StdObjSpace(ObjSpace):
             return w_obj.listview_int()
         if isinstance(w_obj, W_ListObject) and self._uses_list_iter(w_obj):
             return w_obj.getitems_int()
+        if (isinstance(w_obj, W_AbstractTupleObject) and
+                self._uses_tuple_iter(w_obj)):
+            intlist = w_obj.getitems_int()
+            if intlist is None:
+                return None
+            # a copy: the items of the tuple are not resizable, and they
+            # must not be modified by the caller
+            return intlist[:]
         return None
 
     def listview_float(self, w_obj):
@@ -570,6 +578,14 @@ class StdObjSpace(ObjSpace):
         # for now
         if isinstance(w_obj, W_ListObject) and self._uses_list_iter(w_obj):
             return w_obj.getitems_float()
+        if (isinstance(w_obj, W_AbstractTupleObject) and
+                self._uses_tuple_iter(w_obj)):
+            floatlist = w_obj.getitems_float()
+            if floatlist is None:
+                return None
+            # a copy: the items of the tuple are not resizable, and they
+            # must not be modified by the caller
+            return floatlist[:]
         return None
 
     def view_as_kwargs(self, w_dict):
@@ -1,6 +1,8 @@
 from pypy.interpreter.error import oefmt
-from pypy.objspace.std.tupleobject import W_AbstractTupleObject
+from pypy.objspace.std.tupleobject import W_AbstractTupleObject, UNROLL_CUTOFF
 from pypy.objspace.std.util import negate
+from rpython.rlib import jit
+from rpython.rlib.debug import make_sure_not_resized
 from rpython.rlib.objectmodel import specialize
 from rpython.rlib.rarithmetic import intmask
 from rpython.rlib.unroll import unrolling_iterable
@@ -144,6 +146,143 @@ Cls_ii = make_specialised_class((int, int))
 Cls_oo = make_specialised_class((object, object))
 Cls_ff = make_specialised_class((float, float))
 
+# ---------- unboxed versions of longer tuples ----------
+# Tuples of more than UNROLL_CUTOFF items that are all ints, or all
+# floats, store them unboxed in a single RPython list, like the
+# IntegerListStrategy and FloatListStrategy of lists.  Shorter tuples are
+# not worth it: the JIT unrolls the operations on them anyway.
+
+def make_unboxed_tuple_class(typ):
+    if typ == int:
+        def wrap(space, x):
+            return space.newint(x)
+        def hash_item(space, x):
+            from pypy.objspace.std.intobject import _hash_int
+            return _hash_int(x)
+    elif typ == float:
+        def wrap(space, x):
+            return space.newfloat(x)
+        def hash_item(space, x):
+            from pypy.objspace.std.floatobject import _hash_float
+            return _hash_float(space, x)
+    else:
+        assert 0
+
+    class cls(W_AbstractTupleObject):
+        _immutable_fields_ = ['items[*]']
+
+        def __init__(self, space, items):
+            make_sure_not_resized(items)
+            self.space = space
+            self.items = items
+
+        def length(self):
+            return len(self.items)
+
+        def tolist(self):
+            space = self.space
+            items = self.items
+            list_w = [None] * len(items)
+            for i in range(len(items)):
+                list_w[i] = wrap(space, items[i])
+            return list_w
+
+        # same source code, but builds and returns a resizable list
+        getitems_copy = func_with_new_name(tolist, 'getitems_copy')
+
+        if typ == int:
+            def getitems_int(self):
+                return self.items
+        else:
+            def getitems_float(self):
+                return self.items
+
+        @jit.unroll_safe
+        def descr_hash(self, space):
+            # same algorithm as W_TupleObject.descr_hash()
+            mult = 1000003
+            x = 0x345678
+            z = len(self.items)
+            for item in self.items:
+                y = hash_item(space, item)
+                x = (x ^ y) * mult
+                z -= 1
+                mult += 82520 + z + z
+            x += 97531
+            return space.newint(intmask(x))
+
+        def descr_eq(self, space, w_other):
+            if not isinstance(w_other, W_AbstractTupleObject):
+                return space.w_NotImplemented
+            if self.length() != w_other.length():
+                return space.w_False
+            if isinstance(w_other, cls):
+                items1 = self.items
+                items2 = w_other.items
+                for i in range(len(items1)):
+                    if items1[i] != items2[i]:
+                        # issue with NaNs, which should be equal here
+                        if (typ == float and float2longlong(items1[i]) ==
+                                             float2longlong(items2[i])):
+                            continue
+                        return space.w_False
+                return space.w_True
+            for i in range(len(self.items)):
+                if not space.eq_w(wrap(space, self.items[i]),
+                                  w_other.getitem(space, i)):
+                    return space.w_False
+            return space.w_True
+
+        descr_ne = negate(descr_eq)
+
+        def getitem(self, space, index):
+            try:
+                return wrap(space, self.items[index])
+            except IndexError:
+                raise oefmt(space.w_IndexError, "tuple index out of range")
+
+    cls.__name__ = 'W_Unboxed%sTupleObject' % (typ.__name__.capitalize(),)
+    return cls
+
+W_UnboxedIntTupleObject = make_unboxed_tuple_class(int)
+W_UnboxedFloatTupleObject = make_unboxed_tuple_class(float)
+
+def makeunboxedtuple(space, list_w):
+    from pypy.objspace.std.intobject import W_IntObject
+    from pypy.objspace.std.floatobject import W_FloatObject
+    w_first = list_w[0]
+    if type(w_first) is W_IntObject:
+        for w_item in list_w:
+            if type(w_item) is not W_IntObject:
+                raise NotSpecialised
+        return W_UnboxedIntTupleObject(space,
+                                       [space.int_w(w_item)
+                                        for w_item in list_w])
+    elif type(w_first) is W_FloatObject:
+        for w_item in list_w:
+            if type(w_item) is not W_FloatObject:
+                raise NotSpecialised
+        return W_UnboxedFloatTupleObject(space,
+                                         [space.float_w(w_item)
+                                          for w_item in list_w])
+    raise NotSpecialised
+
+def makeunboxedtuple_from_sequence(space, w_sequence):
+    """Build an unboxed tuple directly out of the unwrapped ints or floats
+    of a list (or another unboxed tuple), without going through wrapped
+    items.  Returns None if w_sequence doesn't store its items that way."""
+    intlist = space.listview_int(w_sequence)
+    if intlist is not None:
+        if len(intlist) <= UNROLL_CUTOFF:
+            return None
+        return W_UnboxedIntTupleObject(space, intlist[:])
+    floatlist = space.listview_float(w_sequence)
+    if floatlist is not None:
+        if len(floatlist) <= UNROLL_CUTOFF:
+            return None
+        return W_UnboxedFloatTupleObject(space, floatlist[:])
+    return None
+
 def makespecialisedtuple(space, list_w):
     from pypy.objspace.std.intobject import W_IntObject
     from pypy.objspace.std.floatobject import W_FloatObject
@@ -156,6 +295,8 @@ def makespecialisedtuple(space, list_w):
             if type(w_arg2) is W_FloatObject:
                 return Cls_ff(space, space.float_w(w_arg1), space.float_w(w_arg2))
         return Cls_oo(space, w_arg1, w_arg2)
+    elif len(list_w) > UNROLL_CUTOFF:
+        return makeunboxedtuple(space, list_w)
     else:
         raise NotSpecialised
 
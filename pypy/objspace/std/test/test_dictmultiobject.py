@@ -184,6 +184,37 @@ class TestW_DictObject(object):
         w_l = self.space.call_function(self.space.w_list, w_k)
         assert sorted(self.space.listview_unicode(w_l)) == [u"a", u"b"]
 
+class TestUnboxedDictValues(object):
+    spaceconfig = {"objspace.std.withasciidicts": True,
+                   "objspace.std.withunboxeddictvalues": True}
+
+    def test_setitem_str_getitem_str(self):
+        space = self.space
+        w_d = space.newdict()
+        space.setitem(w_d, space.wrap("a"), space.wrap(1))
+        strategy = w_d.get_strategy()
+        assert type(strategy).__name__ == "AsciiIntDictStrategy"
+        w_d.setitem_str("b", space.wrap(2))
+        assert w_d.get_strategy() is strategy
+        assert space.int_w(w_d.getitem_str("b")) == 2
+        assert w_d.getitem_str("c") is None
+        assert w_d.getitem_str("\xc3\xa9") is None
+        w_d.setitem_str("c", space.wrap("x"))
+        assert type(w_d.get_strategy()).__name__ == "AsciiDictStrategy"
+        assert space.int_w(w_d.getitem_str("a")) == 1
+
+    def test_setitem_str_int_keys(self):
+        space = self.space
+        w_d = space.newdict()
+        space.setitem(w_d, space.wrap(1), space.wrap(1))
+        assert type(w_d.get_strategy()).__name__ == "IntIntDictStrategy"
+        assert w_d.getitem_str("a") is None
+        w_d.setitem_str("a", space.wrap(2))
+        assert type(w_d.get_strategy()) is ObjectDictStrategy
+        assert space.int_w(w_d.getitem_str("a")) == 2
+        assert space.int_w(space.getitem(w_d, space.wrap(1))) == 1
+
+
 class AppTest_DictObject:
     def setup_class(cls):
         cls.w_on_pypy = cls.space.wrap("__pypy__" in sys.builtin_module_names)
@@ -1211,6 +1242,153 @@ class AppTestStrategies(object):
         assert b'a' in list(d)
 
 
+class AppTestAsciiDictStrategies(object):
+    spaceconfig = {"objspace.std.withasciidicts": True}
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("__repr__ doesn't work on appdirect")
+
+    def w_get_strategy(self, obj):
+        import __pypy__
+        r = __pypy__.internal_repr(obj)
+        return r[r.find("(") + 1: r.find(")")]
+
+    def test_empty_to_ascii(self):
+        d = {}
+        d["a"] = None
+        assert "AsciiDictStrategy" in self.get_strategy(d)
+        assert d["a"] is None
+        assert list(d.keys()) == ["a"]
+        assert type(list(d.keys())[0]) is str
+
+    def test_ascii_to_unicode(self):
+        d = {}
+        d["a"] = "x"
+        d["b"] = "y"
+        assert "AsciiDictStrategy" in self.get_strategy(d)
+        assert "\xe9" not in d
+        assert d.get("\u1234") is None
+        raises(KeyError, "del d['\xe9']")
+        assert "AsciiDictStrategy" in self.get_strategy(d)
+        d["\xe9"] = "z"
+        assert "UnicodeDictStrategy" in self.get_strategy(d)
+        assert d == {"a": "x", "b": "y", "\xe9": "z"}
+
+    def test_ascii_non_ascii_first(self):
+        d = {}
+        d["\xe9"] = 1
+        assert "UnicodeDictStrategy" in self.get_strategy(d)
+        d["a"] = 2
+        assert d == {"\xe9": 1, "a": 2}
+
+    def test_ascii_to_object(self):
+        d = {"a": "x"}
+        assert "AsciiDictStrategy" in self.get_strategy(d)
+        assert d.get(1) is None
+        assert "AsciiDictStrategy" in self.get_strategy(d)
+        d[1] = 2
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d == {"a": "x", 1: 2}
+
+    def test_ascii_kwargs(self):
+        def f(**kw):
+            return kw
+        d = {"a": "x", "b": "y"}
+        assert "AsciiDictStrategy" in self.get_strategy(d)
+        assert f(**d) == {"a": "x", "b": "y"}
+        assert d.copy() == d
+        assert "AsciiDictStrategy" in self.get_strategy(d.copy())
+
+
+class AppTestUnboxedDictValues(object):
+    spaceconfig = {"objspace.std.withasciidicts": True,
+                   "objspace.std.withunboxeddictvalues": True}
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("__repr__ doesn't work on appdirect")
+
+    def w_get_strategy(self, obj):
+        import __pypy__
+        r = __pypy__.internal_repr(obj)
+        return r[r.find("(") + 1: r.find(")")]
+
+    def test_empty_to_unboxed(self):
+        d = {}
+        d["a"] = 1
+        assert "AsciiIntDictStrategy" in self.get_strategy(d)
+        d = {}
+        d[1] = 1.5
+        assert "IntFloatDictStrategy" in self.get_strategy(d)
+
+    def test_unboxed_int_values(self):
+        d = {}
+        for key in ["a", "b", "a", "c", "a"]:
+            d[key] = d.get(key, 0) + 1
+        assert "AsciiIntDictStrategy" in self.get_strategy(d)
+        assert d == {"a": 3, "b": 1, "c": 1}
+        assert sorted(d.values()) == [1, 1, 3]
+        assert sorted(d.items()) == [("a", 3), ("b", 1), ("c", 1)]
+        assert d.setdefault("a", 5) == 3
+        assert d.setdefault("d", 5) == 5
+        assert d.pop("d") == 5
+        assert d.pop("d", None) is None
+        assert d.pop(None, 42) == 42
+        raises(KeyError, d.pop, "d")
+        d2 = d.copy()
+        assert "AsciiIntDictStrategy" in self.get_strategy(d2)
+        assert d2 == d
+        assert "AsciiIntDictStrategy" in self.get_strategy(d)
+        d["e"] = True
+        assert "AsciiDictStrategy" in self.get_strategy(d)
+        assert d["e"] is True
+        assert d == {"a": 3, "b": 1, "c": 1, "e": True}
+
+    def test_unboxed_values_devolve(self):
+        d = {"a": 1}
+        d["\xe9"] = 2
+        assert "UnicodeDictStrategy" in self.get_strategy(d)
+        assert d == {"a": 1, "\xe9": 2}
+        d = {"a": 1}
+        d[5] = 2
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d == {"a": 1, 5: 2}
+        d = {"a": 1}
+        d.setdefault("b", 2.5)
+        assert "AsciiDictStrategy" in self.get_strategy(d)
+        assert d == {"a": 1, "b": 2.5}
+
+    def test_unboxed_float_values(self):
+        d = {}
+        d["x"] = 1.5
+        d["y"] = -0.0
+        assert "AsciiFloatDictStrategy" in self.get_strategy(d)
+        d["x"] += 1.0
+        assert d == {"x": 2.5, "y": -0.0}
+        assert str(d["y"]) == "-0.0"
+        d["z"] = 1
+        assert "AsciiDictStrategy" in self.get_strategy(d)
+        assert type(d["z"]) is int and type(d["x"]) is float
+
+    def test_unboxed_int_keys(self):
+        d = {}
+        for i in range(10):
+            d[i % 3] = d.get(i % 3, 0) + i
+        assert "IntIntDictStrategy" in self.get_strategy(d)
+        assert d == {0: 18, 1: 12, 2: 15}
+        assert d.get("a") is None
+        del d[0]
+        assert d == {1: 12, 2: 15}
+        d = {1: 0.5}
+        assert "IntFloatDictStrategy" in self.get_strategy(d)
+        d[2] = None
+        assert "IntDictStrategy" in self.get_strategy(d)
+        assert "Float" not in self.get_strategy(d)
+        assert d == {1: 0.5, 2: None}
+
+
+
 class FakeString(str):
 
     hash_count = 0
@@ -1231,6 +1409,12 @@ class FakeUnicode(unicode):
         self.unwrapped = True
         return unicode(self)
 
+    def utf8_or_none(self):
+        return unicode(self).encode('utf-8')
+
+    def _len(self):
+        return len(self)
+
     def __hash__(self):
         self.hash_count += 1
         return unicode.__hash__(self)
@@ -1356,6 +1540,8 @@ class Config:
         class std:
             methodcachesizeexp = 11
             withmethodcachecounter = False
+            withasciidicts = False
+            withunboxeddictvalues = False
 
 FakeSpace.config = Config()
 
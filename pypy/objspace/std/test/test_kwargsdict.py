@@ -147,6 +147,9 @@ class AppTestKwargsDictStrategy(object):
         assert "KwargsDictStrategy" in self.get_strategy(d)
         d = f()
         assert "EmptyKwargsDictStrategy" in self.get_strategy(d)
+        d["a"] = 1
+        assert "KwargsDictStrategy" in self.get_strategy(d)
+        assert "EmptyKwargsDictStrategy" not in self.get_strategy(d)
 
     def test_iterator(self):
         def f(**args):
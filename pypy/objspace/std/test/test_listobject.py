@@ -1160,6 +1160,26 @@ class AppTestListObject(object):
 
         raises(TypeError, l.copy, None)
 
+    def test_copy_long_list_is_independent(self):
+        for items in [list(range(100)), [i + 0.5 for i in range(100)],
+                      [b'%d' % i for i in range(100)],
+                      ['%d' % i for i in range(100)]]:
+            l = items[:]
+            copies = [l.copy(), l[:], list(l), l[::1]]
+            expected = list(l)
+            l[0] = l[1]
+            l.reverse()
+            for c in copies:
+                assert c == expected
+            c = copies[0]
+            c.append(c[0])
+            c.sort()
+            del copies[1][5:10]
+            assert copies[2] == expected
+            copies[3] *= 2
+            assert copies[2] == expected
+            assert l == list(reversed([expected[1]] + expected[1:]))
+
     def test_append(self):
         l = []
         l.append('X')
@@ -1662,6 +1682,20 @@ class AppTestWithoutStrategies:
         assert notshared == []
 
 
+class AppTestWithNarrowIntLists(AppTestListObject):
+    spaceconfig = {"objspace.std.withnarrowintlists": True}
+
+    def test_narrow_int_strategy(self):
+        from __pypy__ import strategy
+        l = [1, 2, -3]
+        assert strategy(l) == "Int8ListStrategy"
+        l.append(1000)
+        assert strategy(l) == "Int16ListStrategy"
+        l[0] = 1 << 40
+        assert strategy(l) == "IntegerListStrategy"
+        assert l == [1 << 40, 2, -3, 1000]
+
+
 class AppTestListFastSubscr:
     spaceconfig = {"objspace.std.optimized_list_getitem": True}
 
@@ -4,7 +4,9 @@ from pypy.objspace.std.listobject import (
     W_ListObject, EmptyListStrategy, ObjectListStrategy, IntegerListStrategy,
     FloatListStrategy, BytesListStrategy, RangeListStrategy,
     SimpleRangeListStrategy, make_range_list, UnicodeListStrategy,
-    IntOrFloatListStrategy)
+    IntOrFloatListStrategy, CopyOnWriteIntegerListStrategy,
+    CopyOnWriteFloatListStrategy, COPY_ON_WRITE_CUTOFF, Int8ListStrategy,
+    Int16ListStrategy, Int32ListStrategy)
 from pypy.objspace.std import listobject
 from pypy.objspace.std.test.test_listobject import TestW_ListObject
 
@@ -532,6 +534,73 @@ class TestW_ListStrategies(TestW_ListObject):
         l2.append(self.space.wrap(4))
         assert not l2 == l1.getitems()
 
+    def test_clone_shares_long_list(self):
+        space = self.space
+        n = COPY_ON_WRITE_CUTOFF
+        l1 = W_ListObject(space, [space.wrap(i) for i in range(n)])
+        l2 = l1.clone()
+        assert l2.lstorage is l1.lstorage
+        assert isinstance(l1.strategy, CopyOnWriteIntegerListStrategy)
+        assert isinstance(l2.strategy, CopyOnWriteIntegerListStrategy)
+        l2.append(space.wrap(n))
+        assert l2.lstorage is not l1.lstorage
+        assert type(l2.strategy) is IntegerListStrategy
+        assert l1.length() == n
+        assert l2.length() == n + 1
+        l1.setitem(0, space.wrap(42))
+        assert type(l1.strategy) is IntegerListStrategy
+        assert space.int_w(l2.getitem(0)) == 0
+
+    def test_last_sharer_takes_storage(self):
+        space = self.space
+        n = COPY_ON_WRITE_CUTOFF
+        l1 = W_ListObject(space, [space.wrap(i) for i in range(n)])
+        l2 = l1.clone()
+        l3 = l1.clone()
+        assert l1.strategy is l2.strategy is l3.strategy
+        assert l1.strategy.sharers == 3
+        storage = l1.lstorage
+        l1.append(space.wrap(n))
+        assert l1.lstorage is not storage
+        l2.append(space.wrap(n))
+        assert l2.lstorage is not storage
+        # l3 is the last list using 'storage': no copy
+        l3.append(space.wrap(n))
+        assert l3.lstorage is storage
+        assert type(l3.strategy) is IntegerListStrategy
+        l3.setitem(0, space.wrap(42))
+        assert space.int_w(l1.getitem(0)) == 0
+        assert space.int_w(l2.getitem(0)) == 0
+        # a new copy gets a new counter
+        l4 = l1.clone()
+        assert l4.strategy is l1.strategy
+        assert l1.strategy is not l3.strategy
+        assert l1.strategy.sharers == 2
+
+    def test_copy_into_and_getslice_share(self):
+        space = self.space
+        n = COPY_ON_WRITE_CUTOFF
+        l1 = W_ListObject(space, [space.wrap(i + 0.5) for i in range(n)])
+        l2 = W_ListObject(space, [])
+        l2.extend(l1)
+        assert l2.lstorage is l1.lstorage
+        assert isinstance(l2.strategy, CopyOnWriteFloatListStrategy)
+        l3 = l1.getslice(0, n, 1, n)
+        assert l3.lstorage is l1.lstorage
+        l4 = l1.getslice(1, n, 1, n - 1)
+        assert l4.lstorage is not l1.lstorage
+        l1.sort(True)
+        assert space.float_w(l1.getitem(0)) == n - 0.5
+        assert space.float_w(l2.getitem(0)) == 0.5
+        assert space.float_w(l3.getitem(0)) == 0.5
+
+    def test_short_clone_does_not_share(self):
+        space = self.space
+        l1 = W_ListObject(space, [space.wrap(1), space.wrap(2)])
+        l2 = l1.clone()
+        assert l2.lstorage is not l1.lstorage
+        assert type(l1.strategy) is IntegerListStrategy
+
     def test_getitems_does_not_copy_object_list(self):
         l1 = W_ListObject(self.space, [self.space.wrap(1), self.space.wrap("two"), self.space.wrap(3)])
         l2 = l1.getitems()
@@ -1054,3 +1123,76 @@ class TestW_ListStrategiesDisabled:
         assert isinstance(W_ListObject(self.space, [self.space.wrap(1),self.space.wrap('a')]).strategy, ObjectListStrategy)
         assert isinstance(W_ListObject(self.space, [self.space.wrap(1),self.space.wrap(2),self.space.wrap(3)]).strategy, ObjectListStrategy)
         assert isinstance(W_ListObject(self.space, [self.space.wrap('a'), self.space.wrap('b')]).strategy, ObjectListStrategy)
+
+
+class TestW_NarrowIntListStrategies:
+    spaceconfig = {"objspace.std.withnarrowintlists": True}
+
+    def test_check_strategy(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(1), w(-128), w(127)])
+        assert isinstance(l.strategy, Int8ListStrategy)
+        l = W_ListObject(space, [w(1), w(-129)])
+        assert isinstance(l.strategy, Int16ListStrategy)
+        l = W_ListObject(space, [w(1), w(40000)])
+        assert isinstance(l.strategy, Int32ListStrategy)
+        l = W_ListObject(space, [w(1), w(sys.maxint)])
+        assert isinstance(l.strategy, IntegerListStrategy)
+        l = W_ListObject(space, [])
+        l.append(w(5))
+        assert isinstance(l.strategy, Int8ListStrategy)
+
+    def test_widen(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(1), w(-2)])
+        l.append(w(-300))
+        assert isinstance(l.strategy, Int16ListStrategy)
+        l.setitem(0, w(1 << 20))
+        assert isinstance(l.strategy, Int32ListStrategy)
+        l.insert(0, w(-sys.maxint))
+        assert isinstance(l.strategy, IntegerListStrategy)
+        assert space.unwrap(l) == [-sys.maxint, 1 << 20, -2, -300]
+
+        l = W_ListObject(space, [w(1), w(-2)])
+        l.append(w(2.5))
+        assert isinstance(l.strategy, IntOrFloatListStrategy)
+        l = W_ListObject(space, [w(1), w(-2)])
+        l.append(w("x"))
+        assert isinstance(l.strategy, ObjectListStrategy)
+        assert space.unwrap(l) == [1, -2, "x"]
+
+    def test_extend_and_setslice(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(1), w(2)])
+        l.extend(W_ListObject(space, [w(3), w(sys.maxint)]))
+        assert isinstance(l.strategy, IntegerListStrategy)
+        l2 = W_ListObject(space, [w(-1), w(-2)])
+        l2.extend(W_ListObject(space, [w(3), w(100)]))
+        assert isinstance(l2.strategy, Int8ListStrategy)
+        l2.extend(make_range_list(space, 0, 1000, 3))
+        assert isinstance(l2.strategy, Int16ListStrategy)
+        assert space.unwrap(l2) == [-1, -2, 3, 100, 0, 1000, 2000]
+        l.extend(l2)
+        assert isinstance(l.strategy, IntegerListStrategy)
+        assert space.unwrap(l)[4:] == [-1, -2, 3, 100, 0, 1000, 2000]
+
+        l3 = W_ListObject(space, [w(1), w(2), w(3)])
+        l3.setslice(1, 1, 1, W_ListObject(space, [w(70000), w(5)]))
+        assert isinstance(l3.strategy, Int32ListStrategy)
+        assert space.unwrap(l3) == [1, 70000, 5, 3]
+
+    def test_sort_and_find(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(5), w(-3), w(120), w(0)])
+        l.sort(False)
+        assert space.unwrap(l) == [-3, 0, 5, 120]
+        l.sort(True)
+        assert space.unwrap(l) == [120, 5, 0, -3]
+        assert l.find(w(0)) == 2
+        assert l.find(w(5.0)) == 1
+        py.test.raises(ValueError, l.find, w(1000))
+        assert l.getitems_int() == [120, 5, 0, -3]
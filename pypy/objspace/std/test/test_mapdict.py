@@ -14,6 +14,8 @@ space = FakeSpace()
 space.config = Config
 
 class Class(object):
+    name = "Class"
+
     def __init__(self, hasdict=True):
         self.hasdict = hasdict
         if hasdict:
@@ -21,6 +23,9 @@ class Class(object):
         else:
             self.terminator = NoDictTerminator(space, self)
 
+    def getname(self, space):
+        return u"Class"
+
     def instantiate(self, sp=None):
         if sp is None:
             sp = space
@@ -125,7 +130,7 @@ def test_add_attribute_limit():
             obj.setdictvalue(space, str(i), i)
         # moved to dict (which is the remaining non-slot item)
         assert len(obj.storage) == 1 + numslots
-        assert isinstance(obj.getdict(space).dstrategy, UnicodeDictStrategy)
+        assert isinstance(obj.getdict(space).dstrategy, SplitDictStrategy)
 
         for i in range(1000):
             assert obj.getdictvalue(space, str(i)) == i
@@ -142,6 +147,86 @@ def test_add_attribute_limit():
     for i in range(1000):
         assert obj.getslotvalue(i) == i
 
+def test_map_explosion_is_logged():
+    from rpython.rlib import debug
+    cls = Class()
+    debug._log = debug.DebugLog()
+    try:
+        for i in range(MAP_EXPLOSION_THRESHOLD + 1):
+            obj = cls.instantiate()
+            obj.setdictvalue(space, "a%d" % i, i)
+        log = list(debug._log)
+    finally:
+        debug._log = None
+    assert cls.terminator.num_maps == MAP_EXPLOSION_THRESHOLD + 1
+    assert log == [("mapdict-explosion", [
+        ("debug_print", "class", "Class", "has", MAP_EXPLOSION_THRESHOLD,
+         "maps")])]
+    assert map_tree_stats(cls.terminator) == (
+        MAP_EXPLOSION_THRESHOLD + 1, MAP_EXPLOSION_THRESHOLD + 1, 1)
+
+def test_split_dict_shares_keys():
+    cls = Class()
+    objs = [cls.instantiate() for i in range(3)]
+    for obj in objs:
+        for i in range(100):
+            obj.setdictvalue(space, "x%d" % i, i)
+    for obj in objs:
+        w_dict = obj.getdict(space)
+        assert isinstance(w_dict.dstrategy, SplitDictStrategy)
+        storage = w_dict.dstrategy.unerase(w_dict.dstorage)
+        assert storage.shared_keys is cls.terminator.shared_keys
+        assert storage.length == 100
+    assert cls.terminator.shared_keys.keys == ["x%d" % i for i in range(100)]
+    obj = objs[0]
+    assert obj.getdictvalue(space, "x42") == 42
+    assert obj.getdictvalue(space, "y") is None
+    assert obj.deldictvalue(space, "x42")
+    assert obj.getdictvalue(space, "x42") is None
+    assert obj.getdict(space).length() == 99
+    assert objs[1].getdictvalue(space, "x42") == 42
+    # deleting the last key and adding it again keeps the split table
+    assert obj.deldictvalue(space, "x99")
+    obj.setdictvalue(space, "x99", 99)
+    assert isinstance(obj.getdict(space).dstrategy, SplitDictStrategy)
+    # re-adding a deleted key in the middle moves it to the end, which
+    # needs a dict of its own
+    obj.setdictvalue(space, "x42", -42)
+    assert isinstance(obj.getdict(space).dstrategy, UnicodeDictStrategy)
+    assert obj.getdictvalue(space, "x42") == -42
+    assert obj.getdictvalue(space, "x99") == 99
+    assert objs[1].getdictvalue(space, "x42") == 42
+
+def test_split_dict_different_order():
+    cls = Class()
+    obj1 = cls.instantiate()
+    obj2 = cls.instantiate()
+    for i in range(100):
+        obj1.setdictvalue(space, "x%d" % i, i)
+        obj2.setdictvalue(space, "x%d" % (99 - i), i)
+    assert isinstance(obj1.getdict(space).dstrategy, SplitDictStrategy)
+    assert isinstance(obj2.getdict(space).dstrategy, UnicodeDictStrategy)
+    assert obj2.getdictvalue(space, "x0") == 99
+
+def test_shared_dict_keys_order():
+    keys = SharedDictKeys()
+    assert keys.can_append_in_order(["a", "b"])
+    assert keys.add("a") == 0
+    assert keys.add("b") == 1
+    assert keys.can_append_in_order(["a", "b", "c"])
+    assert keys.can_append_in_order(["b", "c"])
+    assert not keys.can_append_in_order(["b", "a"])
+    assert not keys.can_append_in_order(["c", "a"])
+    storage = SplitDictStorage(keys)
+    assert storage.setitem("b", 1)
+    assert storage.values_w == [None, 1]
+    assert not storage.setitem("a", 2)
+    assert storage.setitem("c", 3)
+    assert keys.keys == ["a", "b", "c"]
+    assert storage.next_index(0) == 1
+    assert storage.next_index(2) == 2
+    assert storage.next_index(3) == -1
+
 def test_insert_different_orders():
     cls = Class()
     obj = cls.instantiate()
@@ -803,6 +888,50 @@ class AppTestWithMapDict(object):
         d[1] = 3
         a.__dict__ = {}
 
+    def test_many_attributes_split_dict(self):
+        from __pypy__ import strategy
+        class A(object):
+            pass
+        objs = [A() for i in range(3)]
+        for a in objs:
+            for i in range(100):
+                setattr(a, "x%d" % i, i)
+        a = objs[0]
+        assert strategy(a.__dict__) == "SplitDictStrategy"
+        assert a.x50 == 50
+        assert list(a.__dict__) == ["x%d" % i for i in range(100)]
+        assert list(a.__dict__.values()) == list(range(100))
+        del a.x50
+        assert not hasattr(a, "x50")
+        assert objs[1].x50 == 50
+        assert len(a.__dict__) == 99
+        a.__dict__[1] = 2
+        assert strategy(a.__dict__) == "ObjectDictStrategy"
+        assert a.x51 == 51
+        b = objs[1]
+        b.x50 = "moved"
+        assert strategy(b.__dict__) == "SplitDictStrategy"
+        del b.x10
+        b.x10 = 10
+        assert strategy(b.__dict__) == "UnicodeDictStrategy"
+        assert b.x10 == 10
+
+    def test_mapdict_stats(self):
+        from __pypy__ import mapdict_stats
+        class A(object):
+            pass
+        assert mapdict_stats(A) == {"maps": 0, "max_fanout": 0,
+                                    "max_length": 0, "split_keys": 0}
+        for i in range(5):
+            a = A()
+            a.x = 1
+            setattr(a, "y%d" % i, 2)
+        stats = mapdict_stats(A)
+        assert stats["maps"] == 6
+        assert stats["max_fanout"] == 5
+        assert stats["max_length"] == 2
+        raises(TypeError, mapdict_stats, A())
+
     def test_dict_clear_bug(self):
         class A(object):
             pass
@@ -1373,6 +1502,27 @@ class AppTestGlobalCaching(AppTestWithMapDict):
         else:
             assert 0, "failed: got %r" % ([got[1] for got in seen],)
 
+    def test_mapdict_code_cache_counter(self):
+        import __pypy__
+        class A(object):
+            def __init__(self, flag):
+                if flag:
+                    self.y = 0
+                self.x = 42
+        def f(l):
+            for a in l:
+                a.x
+        f([A(False)] * 10)
+        (name, hits, misses), = __pypy__.mapdict_code_cache_counter(
+            f.__code__)
+        assert name == "x"
+        assert (hits, misses) == (9, 1)
+        f([A(False), A(True)] * 10)
+        (name, hits, misses), = __pypy__.mapdict_code_cache_counter(
+            f.__code__)
+        assert (hits, misses) == (10, 20)
+
+
 class TestDictSubclassShortcutBug(object):
     spaceconfig = {"objspace.std.withmethodcachecounter": True}
 
@@ -230,3 +230,29 @@ class AppTestMethodCaching(test_typeobject.AppTestTypeObject):
                 setattr(a, "a%s" % i, i)
             cache_counter = __pypy__.method_cache_counter("x")
             assert cache_counter[0] == 0 # 0 hits, because all the attributes are new
+
+    def test_method_cache_stats(self):
+        import __pypy__
+        class A(object):
+            def f(self):
+                return 42
+        class B(A):
+            pass
+        a = A()
+        assert __pypy__.type_version_tag_bumps(A) == 0
+        __pypy__.reset_method_cache_counter()
+        stats = __pypy__.method_cache_stats()
+        assert stats["invalidations"] == 0
+        assert stats["size"] > 0
+        for i in range(10):
+            a.f()
+        A.g = 5
+        A.f = lambda self: 43
+        del A.g
+        assert a.f() == 43
+        stats = __pypy__.method_cache_stats()
+        assert stats["hits"] + stats["misses"] >= 11
+        assert stats["invalidations"] == 6    # A and B, three times
+        assert __pypy__.type_version_tag_bumps(A) == 3
+        assert __pypy__.type_version_tag_bumps(B) == 3
+        raises(TypeError, __pypy__.type_version_tag_bumps, a)
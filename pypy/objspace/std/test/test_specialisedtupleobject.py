@@ -52,6 +52,35 @@ class TestW_SpecialisedTupleObject():
         hash_test([1, 2, 3], must_be_specialized=False)
         hash_test([1 << 62, 0])
 
+    def test_unboxed_long_tuples(self):
+        from pypy.objspace.std.specialisedtupleobject import (
+            W_UnboxedIntTupleObject, W_UnboxedFloatTupleObject)
+        space = self.space
+        w_tuple = space.newtuple([space.wrap(i) for i in range(20)])
+        assert isinstance(w_tuple, W_UnboxedIntTupleObject)
+        assert w_tuple.getitems_int() == range(20)
+        # listview_int() returns a copy, which the caller may modify
+        intlist = space.listview_int(w_tuple)
+        assert intlist == range(20)
+        assert intlist is not w_tuple.items
+        w_tuple = space.newtuple([space.wrap(i + 0.5) for i in range(20)])
+        assert isinstance(w_tuple, W_UnboxedFloatTupleObject)
+        floatlist = space.listview_float(w_tuple)
+        assert floatlist == [i + 0.5 for i in range(20)]
+        assert floatlist is not w_tuple.items
+        w_tuple = space.newtuple([space.wrap(i) for i in range(5)])
+        assert isinstance(w_tuple, W_TupleObject)
+        w_tuple = space.newtuple([space.wrap(i) for i in range(19)] +
+                                 [space.wrap(1.5)])
+        assert isinstance(w_tuple, W_TupleObject)
+
+    def test_hash_against_normal_tuple_unboxed(self):
+        self.hash_test(range(20), must_be_specialized=False)
+        self.hash_test([-1] * 11 + [1 << 62], must_be_specialized=False)
+        self.hash_test([i * 1.5 for i in range(20)],
+                       must_be_specialized=False)
+        self.hash_test([float('inf')] * 20, must_be_specialized=False)
+
     try:
         from hypothesis import given, strategies
     except ImportError:
@@ -261,5 +290,54 @@ class AppTestW_SpecialisedTupleObject:
         assert (0.0, 0.0) == (-0.0, -0.0)
 
 
+    def test_unboxed_tuple(self):
+        t = tuple(range(20))
+        assert not self.isspecialised(t)
+        import __pypy__
+        assert 'UnboxedIntTuple' in __pypy__.internal_repr(t)
+        assert t == tuple(range(20))
+        assert t != tuple(range(21))
+        assert t == tuple([i for i in range(20)])
+        assert t[5] == 5 and t[-1] == 19
+        raises(IndexError, "t[20]")
+        assert t[2:4] == (2, 3)
+        assert list(t) == list(range(20))
+        assert 19 in t and 20 not in t
+        assert t < tuple(range(1, 21))
+        assert hash(t) == hash(tuple(float(i) for i in range(20)))
+        assert t + (1.5,) == tuple(range(20)) + (1.5,)
+        assert sum(t) == 190
+
+    def test_unboxed_float_tuple(self):
+        import __pypy__
+        nan = float('nan')
+        t = tuple([nan] * 12)
+        assert 'UnboxedFloatTuple' in __pypy__.internal_repr(t)
+        assert t == tuple([nan] * 12)
+        assert t != tuple([1.0] * 12)
+        assert list(t)[0] != list(t)[0]
+        t = tuple([i / 2.0 for i in range(12)])
+        assert t == tuple([i / 2.0 for i in range(12)])
+        assert t[3] == 1.5
+
+    def test_unboxed_list_tuple_conversions(self):
+        import __pypy__
+        l = list(range(30))
+        t = tuple(l)
+        assert 'UnboxedIntTuple' in __pypy__.internal_repr(t)
+        l2 = list(t)
+        assert __pypy__.strategy(l2) == "IntegerListStrategy"
+        l2.append(5)
+        assert len(t) == 30 and len(l2) == 31
+        l = [x * 1.5 for x in range(30)]
+        t = tuple(l)
+        assert 'UnboxedFloatTuple' in __pypy__.internal_repr(t)
+        assert __pypy__.strategy(list(t)) == "FloatListStrategy"
+        assert set(tuple(range(20))) == set(range(20))
+        class T(tuple):
+            pass
+        assert type(T(l)) is T and T(l) == tuple(l)
+
+
 class AppTestAll(test_tupleobject.AppTestW_TupleObject):
     spaceconfig = {"objspace.std.withspecialisedtuple": True}
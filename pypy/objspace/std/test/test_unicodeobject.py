@@ -38,6 +38,33 @@ class TestUnicodeObject:
         w_uni = space.wrap(unichr(0xd921) + unichr(0xdddd))
         space.raises_w(space.w_UnicodeEncodeError, space.text_w, w_uni)
 
+    def test_encode_utf8_is_cached(self):
+        space = self.space
+        w_uni = space.wrap(u'abc€')
+        w_b1 = space.call_method(w_uni, 'encode', space.wrap('utf-8'))
+        assert space.bytes_w(w_b1) == 'abc\xe2\x82\xac'
+        assert w_uni._utf8 is None      # encode() alone doesn't cache
+        utf8 = space.text_w(w_uni)
+        w_b2 = space.call_method(w_uni, 'encode', space.wrap('utf-8'))
+        assert space.bytes_w(w_b2) is utf8
+        w_uni = space.wrap(u'x\ud800')
+        assert w_uni.utf8_or_none() is None
+        space.raises_w(space.w_UnicodeEncodeError,
+                       space.call_method, w_uni, 'encode', space.wrap('utf-8'))
+
+    def test_decode_utf8_keeps_source(self):
+        space = self.space
+        w_b = space.newbytes('abc\xe2\x82\xac')
+        w_uni = space.call_method(w_b, 'decode', space.wrap('utf-8'))
+        assert space.unicode_w(w_uni) == u'abc€'
+        if sys.maxunicode > 0xffff:
+            assert space.text_w(w_uni) is space.bytes_w(w_b)
+        # the copy of a bytearray is not kept alive
+        w_ba = space.call_function(space.w_bytearray, w_b)
+        w_uni = space.call_method(w_ba, 'decode', space.wrap('utf-8'))
+        assert space.unicode_w(w_uni) == u'abc€'
+        assert w_uni._utf8 is None
+
 
 class AppTestUnicodeStringStdOnly:
     def test_compares(self):
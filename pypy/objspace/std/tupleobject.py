@@ -72,6 +72,16 @@ class W_AbstractTupleObject(W_Root):
         """Returns a copy of the items, as a resizable list."""
         raise NotImplementedError
 
+    def getitems_int(self):
+        """Returns the items as a fixed-size list of unwrapped ints, if
+        the tuple stores them that way, or None.  Don't modify it."""
+        return None
+
+    def getitems_float(self):
+        """Returns the items as a fixed-size list of unwrapped floats, if
+        the tuple stores them that way, or None.  Don't modify it."""
+        return None
+
     def length(self):
         raise NotImplementedError
 
@@ -93,6 +103,14 @@ class W_AbstractTupleObject(W_Root):
         elif (space.is_w(w_tupletype, space.w_tuple) and
               space.is_w(space.type(w_sequence), space.w_tuple)):
             return w_sequence
+        elif (space.is_w(w_tupletype, space.w_tuple) and
+              space.config.objspace.std.withspecialisedtuple):
+            from pypy.objspace.std.specialisedtupleobject import (
+                makeunboxedtuple_from_sequence)
+            w_tuple = makeunboxedtuple_from_sequence(space, w_sequence)
+            if w_tuple is not None:
+                return w_tuple
+            return space.newtuple(space.fixedview(w_sequence))
         else:
             tuple_w = space.fixedview(w_sequence)
         w_obj = space.allocate_instance(W_TupleObject, w_tupletype)
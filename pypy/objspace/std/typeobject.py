@@ -14,6 +14,7 @@ from rpython.rlib.jit import (promote, elidable_promote, we_are_jitted,
 from rpython.rlib.objectmodel import current_object_addr_as_int, compute_hash
 from rpython.rlib.objectmodel import we_are_translated, not_rpython
 from rpython.rlib.rarithmetic import intmask, r_uint
+from rpython.rlib import debug
 
 class MutableCell(W_Root):
     def unwrap_cell(self, space):
@@ -83,6 +84,7 @@ class MethodCache(object):
         if space.config.objspace.std.withmethodcachecounter:
             self.hits = {}
             self.misses = {}
+            self.invalidations = 0
 
     def clear(self):
         None_None = (None, None)
@@ -169,6 +171,10 @@ class W_TypeObject(W_Root):
     # used to cache the type's __new__ function
     w_new_function = None
 
+    # how many times the version tag changed, invalidating the method cache
+    # entries of this type
+    version_tag_bumps = 0
+
     # set to True by cpyext _before_ it even calls __init__() below
     flag_cpytype = False
 
@@ -251,6 +257,18 @@ class W_TypeObject(W_Root):
 
         if self._version_tag is not None:
             self._version_tag = VersionTag()
+            self.version_tag_bumps += 1
+            if space.config.objspace.std.withmethodcachecounter:
+                space.fromcache(MethodCache).invalidations += 1
+            # only with PYPYLOG=version-tag; untranslated, debug_print()
+            # would write every mutation to stderr
+            if (we_are_translated() and
+                    debug.have_debug_prints_for("version-tag")):
+                debug.debug_start("version-tag")
+                debug.debug_print("type", self.name, "changed",
+                                  key if key is not None else "<any>",
+                                  "bumps", self.version_tag_bumps)
+                debug.debug_stop("version-tag")
 
         subclasses_w = self.get_subclasses()
         for w_subclass in subclasses_w:
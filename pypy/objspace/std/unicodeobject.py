@@ -7,7 +7,8 @@ from rpython.rlib.rstring import StringBuilder, UnicodeBuilder
 from rpython.rlib.runicode import (
     make_unicode_escape_function, str_decode_ascii, str_decode_utf_8,
     unicode_encode_ascii, unicode_encode_utf_8, fast_str_decode_ascii,
-    unicode_encode_utf8_forbid_surrogates, SurrogateError)
+    unicode_encode_utf8_forbid_surrogates, SurrogateError,
+    allow_surrogate_by_default)
 from rpython.rlib import jit
 
 from pypy.interpreter import unicodehelper
@@ -94,6 +95,19 @@ class W_UnicodeObject(W_Root):
             self._utf8 = identifier
         return identifier
 
+    def utf8_or_none(self):
+        """Return the utf-8 encoding of the string, or None if it contains
+        surrogates.  The result is cached, like in text_w().
+        """
+        try:
+            utf8 = jit.conditional_call_elidable(
+                                self._utf8, g_encode_utf8, self._value)
+        except SurrogateError:
+            return None
+        if not jit.isconstant(self):
+            self._utf8 = utf8
+        return utf8
+
     def listview_unicode(self):
         return _create_list_from_unicode(self._value)
 
@@ -565,6 +579,10 @@ def _get_encoding_and_errors(space, w_encoding, w_errors):
 def encode_object(space, w_object, encoding, errors):
     if errors is None or errors == 'strict':
         if encoding is None or encoding == 'utf-8':
+            if (isinstance(w_object, W_UnicodeObject) and
+                    w_object._utf8 is not None):
+                # already computed by text_w(), or seeded by decode_object()
+                return space.newbytes(w_object._utf8)
             u = space.unicode_w(w_object)
             eh = unicodehelper.encode_error_handler(space)
             return space.newbytes(unicode_encode_utf_8(
@@ -600,12 +618,13 @@ def decode_object(space, w_obj, encoding, errors):
                 eh = unicodehelper.decode_error_handler(space)
                 u = str_decode_ascii(     # try again, to get the error right
                     s, len(s), None, final=True, errorhandler=eh)[0]
-            return space.newunicode(u)
+            return _newunicode_from_utf8(w_obj, u, s)
         if encoding == 'utf-8':
             s = space.charbuf_w(w_obj)
             eh = unicodehelper.decode_error_handler(space)
-            return space.newunicode(str_decode_utf_8(
-                    s, len(s), None, final=True, errorhandler=eh)[0])
+            u = str_decode_utf_8(s, len(s), None, final=True,
+                                 errorhandler=eh)[0]
+            return _newunicode_from_utf8(w_obj, u, s)
 
     from pypy.module._codecs.interp_codecs import decode_text
     w_retval = decode_text(space, w_obj, encoding, errors)
@@ -618,6 +637,20 @@ def decode_object(space, w_obj, encoding, errors):
     return w_retval
 
 
+def _newunicode_from_utf8(w_obj, u, s):
+    # 's' was successfully decoded in strict mode, so it is exactly the
+    # utf-8 encoding of 'u'.  If it is the immutable string of a bytes
+    # object, keep a reference to it, so that encoding 'u' back to utf-8
+    # (or asking for its text_w()) does not have to transcode again.  We
+    # don't do that for the copies made by charbuf_w() from bytearrays or
+    # memoryviews, which would be kept alive only for this cache.
+    from pypy.objspace.std.bytesobject import W_BytesObject
+    w_u = W_UnicodeObject(u)
+    if isinstance(w_obj, W_BytesObject) and not allow_surrogate_by_default:
+        w_u._utf8 = s
+    return w_u
+
+
 def unicode_from_encoded_object(space, w_obj, encoding, errors):
     w_retval = decode_object(space, w_obj, encoding, errors)
     if not space.isinstance_w(w_retval, space.w_unicode):
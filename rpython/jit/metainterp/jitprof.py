@@ -9,8 +9,8 @@ from rpython.jit.metainterp.jitexc import JitException
 from rpython.rlib.jit import Counters
 
 
-JITPROF_LINES = Counters.ncounters + 1 + 1
-# one for TOTAL, 1 for calls, update if needed
+JITPROF_LINES = Counters.ncounters + 1 + 1 + 1
+# one for TOTAL, 1 for the longest pause, 1 for calls, update if needed
 _CPU_LINES = 4       # the last 4 lines are stored on the cpu
 
 class BaseProfiler(object):
@@ -49,6 +49,9 @@ class EmptyProfiler(BaseProfiler):
     def get_times(self, num):
         return 0.0
 
+    def get_longest_pause(self):
+        return 0.0
+
 class Profiler(BaseProfiler):
     initialized = False
     timer = staticmethod(time.time)
@@ -59,6 +62,13 @@ class Profiler(BaseProfiler):
     calls = 0
     current = None
     cpu = None
+    # a pause is the time between the start of tracing and the end of
+    # the compilation of its result, i.e. from the outermost _start() to
+    # the matching _end(), during which the program does not progress.
+    # All of it runs on the thread that hit the hot loop: compiling on a
+    # background thread is not supported so far.
+    pause_start = 0.0
+    longest_pause = 0.0
 
     def start(self):
         self.starttime = self.timer()
@@ -77,6 +87,8 @@ class Profiler(BaseProfiler):
         self.t1 = self.timer()
         if self.current:
             self.times[self.current[-1]] += self.t1 - t0
+        else:
+            self.pause_start = self.t1
         self.counters[event] += 1
         self.current.append(event)
 
@@ -91,6 +103,16 @@ class Profiler(BaseProfiler):
             debug_print("BROKEN PROFILER DATA!")
             return
         self.times[ev1] += self.t1 - t0
+        if not self.current:
+            self._end_pause(self.t1 - self.pause_start)
+
+    def _end_pause(self, pause):
+        if pause > self.longest_pause:
+            self.longest_pause = pause
+        debug_start("jit-pause")
+        if have_debug_prints():
+            debug_print("%f" % (pause,))
+        debug_stop("jit-pause")
 
     def start_tracing(self):   self._start(Counters.TRACING)
     def end_tracing(self):     self._end  (Counters.TRACING)
@@ -115,6 +137,9 @@ class Profiler(BaseProfiler):
     def get_times(self, num):
         return self.times[num]
 
+    def get_longest_pause(self):
+        return self.longest_pause
+
     def count_ops(self, opnum, kind=Counters.OPS):
         from rpython.jit.metainterp.resoperation import OpHelpers
         self.counters[kind] += 1
@@ -137,6 +162,8 @@ class Profiler(BaseProfiler):
                               tim[Counters.BACKEND])
         line = "TOTAL:      \t\t%f" % (self.tk - self.starttime, )
         debug_print(line)
+        line = "Longest pause:\t\t%f" % (self.longest_pause, )
+        debug_print(line)
         self._print_intline("ops", cnt[Counters.OPS])
         self._print_intline("recorded ops", cnt[Counters.RECORDED_OPS])
         self._print_intline("  calls", calls)
@@ -2,6 +2,7 @@ import math
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.listsort import make_timsort_class
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,6 +20,31 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# In addition, a limit can be put on the total size of the machine code
+# of the loops in 'alive_loops' (including their bridges).  When a new
+# loop or bridge makes it go over the limit, the loops that were least
+# recently entered, i.e. that have the smallest 'generation', are
+# removed from the set until the total size is below the limit again.
+# The total is kept up to date in 'alive_code_size': the size counted
+# for each loop is stored in its 'counted_code_size', which is measured
+# again when the loop is entered in a new generation or gets a bridge.
+#
+
+def _entered_earlier(token1, token2):
+    return token1.generation < token2.generation
+
+LoopTokenSort = make_timsort_class(lt=_entered_earlier)
+
+def get_code_size(looptoken):
+    """Returns the number of bytes of machine code and data allocated
+    for the loop and all its bridges."""
+    clt = looptoken.compiled_loop_token
+    if clt is None or clt.asmmemmgr_blocks is None:
+        return 0
+    size = 0
+    for rawstart, rawstop in clt.asmmemmgr_blocks:
+        size += rawstop - rawstart
+    return size
 
 class MemoryManager(object):
 
@@ -38,6 +64,10 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        self.code_memory_limit = 0      # in bytes; 0 means no limit
+        self.alive_code_size = 0        # sum of the sizes of alive_loops
+        self.evicted_loops = 0
+        self.evicted_bytes = 0
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,16 +79,68 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_code_memory_limit(self, limit):
+        if limit < 0:
+            limit = 0
+        self.code_memory_limit = limit
+
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
+        if self.code_memory_limit > 0:
+            self._enforce_code_memory_limit()
 
     def keep_loop_alive(self, looptoken):
         if looptoken.generation != self.current_generation:
             looptoken.generation = self.current_generation
             self.alive_loops[looptoken] = None
+            self._count_code_size(looptoken)
+
+    def code_size_changed(self, looptoken):
+        """Called after a bridge was attached to the loop."""
+        if looptoken in self.alive_loops:
+            self._count_code_size(looptoken)
+
+    def _count_code_size(self, looptoken):
+        size = get_code_size(looptoken)
+        self.alive_code_size += size - looptoken.counted_code_size
+        looptoken.counted_code_size = size
+
+    def _forget_loop(self, looptoken):
+        del self.alive_loops[looptoken]
+        self.alive_code_size -= looptoken.counted_code_size
+        looptoken.counted_code_size = 0
+
+    def forget_all_loops(self):
+        for looptoken in self.alive_loops.keys():
+            self._forget_loop(looptoken)
+
+    def _enforce_code_memory_limit(self):
+        total = self.alive_code_size
+        if total <= self.code_memory_limit:
+            return
+        debug_start("jit-mem-limit")
+        debug_print("Code size of alive loops:", total)
+        debug_print("Limit:                   ", self.code_memory_limit)
+        looptokens = self.alive_loops.keys()
+        LoopTokenSort(looptokens).sort()
+        evicted = 0
+        for looptoken in looptokens:
+            if total <= self.code_memory_limit:
+                break
+            if looptoken.generation >= self.current_generation - 1:
+                break     # never evict the loop that was just compiled
+            size = looptoken.counted_code_size
+            self._forget_loop(looptoken)
+            total -= size
+            evicted += 1
+            self.evicted_bytes += size
+        self.evicted_loops += evicted
+        debug_print("Loop tokens evicted:     ", evicted)
+        debug_print("Code size left:          ", total)
+        debug_stop("jit-mem-limit")
 
     def _kill_old_loops_now(self):
         debug_start("jit-mem-collect")
@@ -70,7 +152,7 @@ class MemoryManager(object):
         for looptoken in self.alive_loops.keys():
             if (0 <= looptoken.generation < max_generation or
                 looptoken.invalidated):
-                del self.alive_loops[looptoken]
+                self._forget_loop(looptoken)
         newtotal = len(self.alive_loops)
         debug_print("Loop tokens freed: ", oldtotal - newtotal)
         debug_print("Loop tokens left:  ", newtotal)
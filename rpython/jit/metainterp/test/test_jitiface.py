@@ -141,6 +141,9 @@ class JitHookInterfaceTests(object):
             assert jit_hooks.stats_get_counter_value(None,
                                                      Counters.TRACING) == 2
             assert jit_hooks.stats_get_times_value(None, Counters.TRACING) >= 0
+            assert jit_hooks.stats_get_longest_pause(None) >= 0
+            assert jit_hooks.stats_memmgr_evicted_loops(None) == 0
+            assert jit_hooks.stats_memmgr_evicted_bytes(None) == 0
 
         self.meta_interp(main, [], ProfilerClass=Profiler)
 
@@ -155,6 +158,7 @@ class JitHookInterfaceTests(object):
             assert jit_hooks.stats_get_counter_value(None,
                                            Counters.TOTAL_COMPILED_LOOPS) == 0
             assert jit_hooks.stats_get_times_value(None, Counters.TRACING) == 0
+            assert jit_hooks.stats_get_longest_pause(None) == 0
         self.meta_interp(main, [], ProfilerClass=EmptyProfiler)
 
     def test_get_jitcell_at_key(self):
@@ -21,6 +21,12 @@ from rpython.rlib import rgc
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    compiled_loop_token = None
+    counted_code_size = 0
+
+class FakeCompiledLoopToken:
+    def __init__(self, size):
+        self.asmmemmgr_blocks = [(1000, 1000 + size)]
 
 
 class _TestMemoryManager:
@@ -78,6 +84,69 @@ class _TestMemoryManager:
             else:
                 assert tokens[i] in memmgr.alive_loops
 
+    def test_code_memory_limit(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        memmgr.set_code_memory_limit(250)
+        tokens = [FakeLoopToken() for i in range(6)]
+        for token in tokens:
+            token.compiled_loop_token = FakeCompiledLoopToken(100)
+        for i in range(3):
+            memmgr.keep_loop_alive(tokens[i])
+            memmgr.next_generation()
+        # tokens[0] is the least recently entered, so it is evicted
+        assert memmgr.alive_loops == dict.fromkeys(tokens[1:3])
+        assert memmgr.alive_code_size == 200
+        assert memmgr.evicted_loops == 1
+        assert memmgr.evicted_bytes == 100
+        # entering tokens[1] again makes tokens[2] the oldest one
+        memmgr.keep_loop_alive(tokens[1])
+        memmgr.keep_loop_alive(tokens[3])
+        memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys([tokens[1], tokens[3]])
+        assert memmgr.evicted_loops == 2
+        # a bridge makes the loop bigger
+        tokens[3].compiled_loop_token.asmmemmgr_blocks.append((0, 200))
+        memmgr.keep_loop_alive(tokens[3])
+        memmgr.next_generation()
+        assert memmgr.alive_loops == {tokens[3]: None}
+        assert memmgr.alive_code_size == 300
+        assert memmgr.evicted_bytes == 300
+        # the loop that was just compiled is never evicted
+        memmgr.set_code_memory_limit(50)
+        memmgr.keep_loop_alive(tokens[4])
+        memmgr.next_generation()
+        assert memmgr.alive_loops == {tokens[4]: None}
+        memmgr.set_code_memory_limit(0)
+        memmgr.keep_loop_alive(tokens[5])
+        memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys(tokens[4:])
+        assert memmgr.alive_code_size == 200
+
+    def test_alive_code_size(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(4, 1)
+        tokens = [FakeLoopToken() for i in range(3)]
+        for token in tokens:
+            token.compiled_loop_token = FakeCompiledLoopToken(100)
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        assert memmgr.alive_code_size == 300
+        # a bridge is counted as soon as it is attached
+        tokens[0].compiled_loop_token.asmmemmgr_blocks.append((0, 50))
+        memmgr.code_size_changed(tokens[0])
+        assert memmgr.alive_code_size == 350
+        # old loops are subtracted when they are thrown away
+        memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys(tokens[1:])
+        assert memmgr.alive_code_size == 200
+        assert tokens[0].counted_code_size == 0
+        # a loop that is not alive any more is not counted
+        memmgr.code_size_changed(tokens[0])
+        assert memmgr.alive_code_size == 200
+        memmgr.forget_all_loops()
+        assert memmgr.alive_loops == {}
+        assert memmgr.alive_code_size == 0
 
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
@@ -11,6 +11,7 @@ REGEXES = [
     (('tracing_no', 'tracing_time'), '^Tracing:\s+([\d.]+)\s+([\d.]+)$'),
     (('backend_no', 'backend_time'), '^Backend:\s+([\d.]+)\s+([\d.]+)$'),
     (None, '^TOTAL.*$'),
+    (('longest_pause',), '^Longest pause:\s+([\d.]+)$'),
     (('ops.total',), '^ops:\s+(\d+)$'),
     (('recorded_ops.total',), '^recorded ops:\s+(\d+)$'),
     (('recorded_ops.calls',), '^\s+calls:\s+(\d+)$'),
@@ -51,6 +52,7 @@ class OutputInfo(object):
     tracing_time = 0.0
     backend_no = 0
     backend_time = 0.0
+    longest_pause = 0.0
     asm_no = 0
     asm_time = 0.0
     guards = 0
@@ -46,6 +46,7 @@ def test_really_run():
 DATA = '''Tracing:         1       0.006992
 Backend:        1       0.000525
 TOTAL:                  0.025532
+Longest pause:          0.007517
 ops:                    2
 recorded ops:           6
   calls:                3
@@ -76,6 +77,7 @@ def test_parse():
     assert info.tracing_time == 0.006992
     assert info.backend_no == 1
     assert info.backend_time == 0.000525
+    assert info.longest_pause == 0.007517
     assert info.ops.total == 2
     assert info.recorded_ops.total == 6
     assert info.recorded_ops.calls == 3
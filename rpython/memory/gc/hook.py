@@ -21,6 +21,14 @@ class GcHooks(object):
     def is_gc_collect_enabled(self):
         return False
 
+    def get_gc_alloc_sample_interval(self):
+        """
+        Return the average number of bytes allocated between two calls to
+        on_gc_alloc_sample(), or 0 to disable allocation sampling.  The GC
+        reads it again at every minor collection.
+        """
+        return 0
+
     def on_gc_minor(self, duration, total_memory_used, pinned_objects):
         """
         Called after a minor collection
@@ -45,6 +53,19 @@ class GcHooks(object):
         Called after a major collection is fully done
         """
 
+    def on_gc_alloc_sample(self, sample, size):
+        """
+        Called when an allocation of ``size`` bytes is sampled.  ``sample``
+        is a number identifying the allocated object; note that the object
+        is usually not initialized yet at this point.
+        """
+
+    def on_gc_alloc_sample_free(self, sample):
+        """
+        Called when the GC finds that the object of a sampled allocation
+        is dead.
+        """
+
     # the fire_* methods are meant to be called from the GC are should NOT be
     # overridden
 
@@ -68,3 +89,13 @@ class GcHooks(object):
                                arenas_count_before, arenas_count_after,
                                arenas_bytes, rawmalloc_bytes_before,
                                rawmalloc_bytes_after)
+
+    @rgc.no_collect
+    def fire_gc_alloc_sample(self, sample, size):
+        if self.get_gc_alloc_sample_interval() > 0:
+            self.on_gc_alloc_sample(sample, size)
+
+    @rgc.no_collect
+    def fire_gc_alloc_sample_free(self, sample):
+        if self.get_gc_alloc_sample_interval() > 0:
+            self.on_gc_alloc_sample_free(sample)
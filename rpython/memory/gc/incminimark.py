@@ -52,6 +52,28 @@ Environment variables can be used to fine-tune the following parameters:
                          in time.  Defaults to a conservative value depending
                          on nursery size and maximum object size inside the
                          nursery.  Useful for debugging by setting it to 0.
+
+ PYPY_GC_MARK_PREFETCH   Number of objects that the marking phase prefetches
+                         ahead of the one it visits.  Defaults to 0 (off).
+                         Values like 8 or 16 can make the major collections
+                         of heaps much larger than the CPU cache faster.
+
+ PYPY_GC_MAX_PAUSE_MS    Target for the duration of each step of a major
+                         collection, in milliseconds (e.g. '2').  Defaults
+                         to 0 (off).  If set, the GC measures how fast it
+                         marks and sweeps, and sizes the steps from that
+                         instead of from PYPY_GC_INCREMENT_STEP.  The steps
+                         are still made large enough to keep up with the
+                         objects that survive minor collections, so the
+                         target can be missed; the hooks report the
+                         duration of every step.
+
+ PYPY_GC_LAZY_SWEEP      If set to non-zero, a small object allocated while
+                         a major collection is sweeping first sweeps pages
+                         of its own size, and only takes a new page if they
+                         are full.  Fewer pages are allocated during
+                         sweeping and part of the sweeping is done by the
+                         allocations instead of by the collection steps.
 """
 # XXX Should find a way to bound the major collection threshold by the
 # XXX total addressable size.  Maybe by keeping some minimarkpage arenas
@@ -284,6 +306,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
                  growth_rate_max=2.5,   # for tests
                  card_page_indices=0,
                  large_object=8*WORD,
+                 mark_prefetch=0,
+                 lazy_sweep=False,
+                 max_pause=0.0,
                  ArenaCollectionClass=None,
                  **kwds):
         "NOT_RPYTHON"
@@ -319,6 +344,32 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.debug_rotating_nurseries = lltype.nullptr(NURSARRAY)
         self.extra_threshold = 0
         #
+        # See _visit_all_objects_step_prefetch()
+        self.mark_prefetch = mark_prefetch
+        self.mark_fifo = lltype.nullptr(NURSARRAY)
+        #
+        # Allocation sampling, see _alloc_sample_start().  While it is
+        # active, 'nursery_top' may be lowered to the address where the
+        # next sampled allocation starts; then the real top of the
+        # current nursery area is saved in 'nursery_real_top'.
+        self.nursery_real_top = llmemory.NULL
+        self.alloc_sample_base = llmemory.NULL
+        self.alloc_sample_countdown = 0
+        self.alloc_sample_seed = 0
+        self.alloc_sample_next = 1
+        #
+        # See ArenaCollection.lazy_sweep()
+        self.lazy_sweep = lazy_sweep
+        #
+        # Target duration of the major collection steps, in seconds, or
+        # 0.0.  The rates are the measured speeds of the steps, in bytes
+        # marked, pages swept and raw objects swept per second.
+        self.max_pause = max_pause
+        self.mark_rate = 0.0
+        self.sweep_pages_rate = 0.0
+        self.sweep_raw_rate = 0.0
+        self.pause_target_misses = 0
+        #
         # The ArenaCollection() handles the nonmovable objects allocation.
         if ArenaCollectionClass is None:
             from rpython.memory.gc import minimarkpage
@@ -406,6 +457,11 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.young_objects_with_weakrefs = self.AddressStack()
         self.old_objects_with_weakrefs = self.AddressStack()
         #
+        # Two lists of the sampled objects, see _alloc_sample().  They
+        # contain pairs (object, sample number).
+        self.young_sampled_objects = self.AddressStack()
+        self.old_sampled_objects = self.AddressStack()
+        #
         # Support for id and identityhash: map nursery objects with
         # GCFLAG_HAS_SHADOW to their future location at the next
         # minor collection.
@@ -500,6 +556,18 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 self.gc_nursery_debug = True
             else:
                 self.gc_nursery_debug = False
+            #
+            mark_prefetch = env.read_uint_from_env('PYPY_GC_MARK_PREFETCH')
+            if mark_prefetch > 0:
+                self.mark_prefetch = intmask(mark_prefetch)
+            #
+            lazy_sweep = env.read_uint_from_env('PYPY_GC_LAZY_SWEEP')
+            if lazy_sweep > 0:
+                self.lazy_sweep = True
+            #
+            max_pause_ms = env.read_float_from_env('PYPY_GC_MAX_PAUSE_MS')
+            if max_pause_ms > 0.0:
+                self.max_pause = max_pause_ms / 1000.0
             self._minor_collection()    # to empty the nursery
             llarena.arena_free(self.nursery)
             self.nursery_size = newsize
@@ -518,6 +586,11 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # Estimate this number conservatively
             bigobj = self.nonlarge_max + 1
             self.max_number_of_pinned_objects = self.nursery_size / (bigobj * 2)
+        #
+        if self.mark_prefetch > 0:
+            self.mark_fifo = lltype.malloc(NURSARRAY, self.mark_prefetch,
+                                           flavor='raw',
+                                           track_allocation=False)
 
     def enable(self):
         self.enabled = True
@@ -848,7 +921,22 @@ class IncrementalMiniMarkGC(MovingGCBase):
         jump over the pinned object and try again to reserve totalsize.
         Otherwise do a minor collection, and possibly some steps of a
         major collection, and finally reserve totalsize bytes.
+        If allocation sampling is active, this is also called when
+        nursery_free overflows the sampling limit.
         """
+        sampled = False
+        if self.alloc_sample_base:
+            result = self.nursery_free - totalsize
+            self._alloc_sample_stop(result)
+            self.alloc_sample_countdown -= raw_malloc_usage(totalsize)
+            if self.alloc_sample_countdown < 0:
+                sampled = True
+                if self.nursery_free <= self.nursery_top:
+                    # only the sampling limit was reached: no need to
+                    # collect, the object fits in the current area
+                    self._alloc_sample(result, totalsize)
+                    self._alloc_sample_start()
+                    return result
 
         minor_collection_count = 0
         while True:
@@ -911,6 +999,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
                               "Calling minor_collection() twice is not "
                               "enough. Too many pinned objects?")
                     self._minor_collection()
+                # the minor collection set a sampling limit, but here
+                # we need the real 'nursery_top'
+                self._alloc_sample_stop(self.nursery_free)
             #
             # Tried to do something about nursery_free overflowing
             # nursery_top before this point. Try to reserve totalsize now.
@@ -926,6 +1017,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
             if self.nursery_top - self.nursery_free > self.debug_tiny_nursery:
                 self.nursery_free = self.nursery_top - self.debug_tiny_nursery
         #
+        if sampled:
+            self._alloc_sample(result, totalsize)
+        self._alloc_sample_start()
         return result
     collect_and_reserve._dont_inline_ = True
 
@@ -1064,6 +1158,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.is_varsize(typeid):
             offset_to_length = self.varsize_offset_to_length(typeid)
             (result + size_gc_header + offset_to_length).signed[0] = length
+        if self.alloc_sample_base:
+            self._alloc_sample_external(result, totalsize, alloc_young)
         return result + size_gc_header
 
 
@@ -1086,6 +1182,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.next_major_collection_threshold < 0:
             # cannot trigger a full collection now, but we can ensure
             # that one will occur very soon
+            self._alloc_sample_stop(self.nursery_free)
             self.nursery_free = self.nursery_top
 
     def can_optimize_clean_setarrayitems(self):
@@ -1695,6 +1792,10 @@ class IncrementalMiniMarkGC(MovingGCBase):
         start = time.time()
         debug_start("gc-minor")
         #
+        # Give 'nursery_top' its real value, if allocation sampling
+        # had lowered it.
+        self._alloc_sample_stop(self.nursery_free)
+        #
         # All nursery barriers are invalid from this point on.  They
         # are evaluated anew as part of the minor collection.
         self.nursery_barriers.delete()
@@ -1793,6 +1894,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
             self.invalidate_young_weakrefs()
         if self.young_objects_with_destructors.non_empty():
             self.deal_with_young_objects_with_destructors()
+        if self.young_sampled_objects.non_empty():
+            self.free_young_sampled_objects()
         #
         # Clear this mapping.  Without pinned objects we just clear the dict
         # as all objects in the nursery are dragged out of the nursery and, if
@@ -1871,6 +1974,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
         #
         self.nursery_free = self.nursery
         self.nursery_top = self.nursery_barriers.popleft()
+        self._alloc_sample_start()
         #
         # clear GCFLAG_PINNED_OBJECT_PARENT_KNOWN from all parents in the list.
         self.old_objects_pointing_to_pinned.foreach(
@@ -2361,12 +2465,17 @@ class IncrementalMiniMarkGC(MovingGCBase):
                         self.objects_to_trace.length(),
                         "plus",
                         self.more_objects_to_trace.length())
-            estimate = self.gc_increment_step
+            estimate = self._pause_step_size(self.mark_rate,
+                                             intmask(self.gc_increment_step))
             estimate_from_nursery = self.nursery_surviving_size * 2
             if estimate_from_nursery > estimate:
                 estimate = estimate_from_nursery
             estimate = intmask(estimate)
+            step_start = self._pause_clock()
             remaining = self.visit_all_objects_step(estimate)
+            if remaining == 0:    # stopped by the limit: a full step
+                self.mark_rate = self._pause_rate(
+                    self.mark_rate, estimate, self._pause_clock() - step_start)
             #
             if remaining >= estimate // 2:
                 if self.more_objects_to_trace.non_empty():
@@ -2419,8 +2528,14 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 # Destructors
                 if self.old_objects_with_destructors.non_empty():
                     self.deal_with_old_objects_with_destructors()
+                # Sampled allocations: report the objects that die
+                if self.old_sampled_objects.non_empty():
+                    self.free_old_sampled_objects()
                 # objects_to_trace processed fully, can move on to sweeping
-                self.ac.mass_free_prepare()
+                if self.lazy_sweep:
+                    self.ac.mass_free_prepare_lazy(self._free_if_unvisited)
+                else:
+                    self.ac.mass_free_prepare()
                 self.start_free_rawmalloc_objects()
                 #
                 # get rid of objects pointing to pinned objects that were not
@@ -2451,7 +2566,12 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 # a total object size of at least '3 * nursery_size' bytes
                 # is processed.
                 limit = 3 * self.nursery_size // self.small_request_threshold
+                limit = self._pause_step_size(self.sweep_raw_rate, limit)
+                step_start = self._pause_clock()
                 nobjects = self.free_unvisited_rawmalloc_objects_step(limit)
+                self.sweep_raw_rate = self._pause_rate(
+                    self.sweep_raw_rate, limit - nobjects,
+                    self._pause_clock() - step_start)
                 debug_print("freeing raw objects:", limit-nobjects,
                             "freed, limit was", limit)
                 done = False    # the 2nd half below must still be done
@@ -2461,8 +2581,14 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 # GCFLAG_VISITED on the others.  Visit at most '3 *
                 # nursery_size' bytes.
                 limit = 3 * self.nursery_size // self.ac.page_size
+                limit = self._pause_step_size(self.sweep_pages_rate, limit)
+                step_start = self._pause_clock()
                 done = self.ac.mass_free_incremental(self._free_if_unvisited,
                                                      limit)
+                if not done:    # stopped by the limit: a full step
+                    self.sweep_pages_rate = self._pause_rate(
+                        self.sweep_pages_rate, limit,
+                        self._pause_clock() - step_start)
                 status = done and "No more pages left." or "More to do."
                 debug_print("freeing GC objects, up to", limit, "pages.", status)
             # XXX tweak the limits above
@@ -2543,14 +2669,48 @@ class IncrementalMiniMarkGC(MovingGCBase):
             ll_assert(False, "bogus gc_state")
 
         debug_print("stopping, now in gc state: ", GC_STATES[self.gc_state])
-        debug_stop("gc-collect-step")
         duration = time.time() - start
+        if self.max_pause > 0.0 and duration > self.max_pause:
+            self.pause_target_misses += 1
+            debug_print("pause target missed:", duration, "seconds")
+        debug_stop("gc-collect-step")
         self.total_gc_time += duration
         self.hooks.fire_gc_collect_step(
             duration=duration,
             oldstate=oldstate,
             newstate=self.gc_state)
 
+    def _pause_clock(self):
+        # For PYPY_GC_MAX_PAUSE_MS: the time used to measure the rates,
+        # which is not read at all if there is no target.
+        if self.max_pause > 0.0:
+            return time.time()
+        return 0.0
+
+    def _pause_rate(self, rate, amount, duration):
+        # For PYPY_GC_MAX_PAUSE_MS: update the measured 'rate' of a kind of
+        # step, after a step that processed 'amount' units in 'duration'.
+        if self.max_pause <= 0.0 or amount <= 0 or duration <= 0.0:
+            return rate
+        new_rate = amount / duration
+        if rate > 0.0:
+            new_rate = (rate + new_rate) * 0.5
+        return new_rate
+
+    def _pause_step_size(self, rate, default):
+        # For PYPY_GC_MAX_PAUSE_MS: the number of units that a step can
+        # process within the target, or 'default' if we don't know yet.
+        # Only 3/4 of the target is used, to leave room for the rest of
+        # the step.
+        if self.max_pause <= 0.0 or rate <= 0.0:
+            return default
+        size = rate * self.max_pause * 0.75
+        if size < 1.0:
+            return 1
+        if size > float(sys.maxint // 2):
+            return sys.maxint // 2
+        return int(size)
+
     def _sweep_old_objects_pointing_to_pinned(self, obj, new_list):
         if self.header(obj).tid & GCFLAG_VISITED:
             new_list.append(obj)
@@ -2673,6 +2833,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
     TEST_VISIT_SINGLE_STEP = False    # for tests
 
     def visit_all_objects_step(self, size_to_track):
+        if self.mark_prefetch > 0:
+            return self._visit_all_objects_step_prefetch(size_to_track)
         # Objects can be added to pending by visit
         pending = self.objects_to_trace
         while pending.non_empty():
@@ -2682,6 +2844,54 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 return 0
         return size_to_track
 
+    def _visit_all_objects_step_prefetch(self, size_to_track):
+        # Same as visit_all_objects_step(), but the objects popped from
+        # 'objects_to_trace' first wait in the small FIFO 'mark_fifo'.
+        # Their header is prefetched when they enter it and they are
+        # visited when they leave it, 'mark_prefetch' pops later.  With
+        # a heap much larger than the cache, this overlaps the cache
+        # misses that visit() would otherwise take one after the other
+        # when reading 'tid'.  The FIFO is always emptied back into
+        # 'objects_to_trace' before we return.
+        pending = self.objects_to_trace
+        fifo = self.mark_fifo
+        depth = self.mark_prefetch
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        head = 0       # index of the oldest object in the FIFO
+        count = 0      # number of objects in the FIFO
+        while True:
+            if pending.non_empty():
+                obj = pending.pop()
+                llop.raw_prefetch(lltype.Void, obj - size_gc_header)
+                if count < depth:
+                    index = head + count
+                    if index >= depth:
+                        index -= depth
+                    fifo[index] = obj
+                    count += 1
+                    continue
+                # the FIFO is full: replace the oldest object with 'obj'
+                next = fifo[head]
+                fifo[head] = obj
+            elif count > 0:
+                next = fifo[head]
+                count -= 1
+            else:
+                break
+            head += 1
+            if head == depth:
+                head = 0
+            size_to_track -= self.visit(next)
+            if size_to_track < 0 or self.TEST_VISIT_SINGLE_STEP:
+                while count > 0:
+                    pending.append(fifo[head])
+                    head += 1
+                    if head == depth:
+                        head = 0
+                    count -= 1
+                return 0
+        return size_to_track
+
     def visit(self, obj):
         #
         # 'obj' is a live object.  Check GCFLAG_VISITED to know if we
@@ -3028,6 +3238,131 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.old_objects_with_weakrefs.delete()
         self.old_objects_with_weakrefs = new_with_weakref
 
+    # ----------
+    # Allocation sampling
+
+    # If the hooks return a non-zero get_gc_alloc_sample_interval(), then
+    # on average one allocation every 'interval' bytes is reported to
+    # hooks.on_gc_alloc_sample(), and its death to
+    # hooks.on_gc_alloc_sample_free().  For the nursery, this is done by
+    # lowering 'nursery_top' to the position of the next sampled
+    # allocation: the fast path is unchanged, and collect_and_reserve()
+    # is called when the limit is reached.  A change in the interval
+    # is only seen at the next minor collection.
+
+    def _alloc_sample_start(self):
+        """Start counting the bytes allocated from 'nursery_free'.
+        Called when the current nursery area changes."""
+        ll_assert(not self.alloc_sample_base, "alloc sampling not stopped")
+        interval = self.hooks.get_gc_alloc_sample_interval()
+        if interval <= 0:
+            if self.young_sampled_objects.non_empty():
+                self.young_sampled_objects.delete()
+                self.young_sampled_objects = self.AddressStack()
+            if self.old_sampled_objects.non_empty():
+                self.old_sampled_objects.delete()
+                self.old_sampled_objects = self.AddressStack()
+            return
+        if self.alloc_sample_countdown <= 0:
+            self.alloc_sample_countdown = self._alloc_sample_interval(interval)
+        self.alloc_sample_base = self.nursery_free
+        if self.nursery_top - self.nursery_free > self.alloc_sample_countdown:
+            self.nursery_real_top = self.nursery_top
+            self.nursery_top = self.nursery_free + self.alloc_sample_countdown
+
+    def _alloc_sample_stop(self, position):
+        """Count the bytes allocated in the nursery up to 'position',
+        and restore the real 'nursery_top'."""
+        if self.alloc_sample_base:
+            self.alloc_sample_countdown -= position - self.alloc_sample_base
+            self.alloc_sample_base = llmemory.NULL
+            if self.nursery_real_top:
+                self.nursery_top = self.nursery_real_top
+                self.nursery_real_top = llmemory.NULL
+
+    def _alloc_sample_interval(self, interval):
+        # a pseudo-random number of bytes between interval/2 and
+        # 3*interval/2, to avoid always sampling the same allocation
+        # in a loop
+        self.alloc_sample_seed = intmask(
+            self.alloc_sample_seed * 1103515245 + 12345)
+        rand = (self.alloc_sample_seed >> 16) & 0x7fff
+        return interval // 2 + int(interval * (rand / 32768.0))
+
+    def _alloc_sample_external(self, result, totalsize, alloc_young):
+        self._alloc_sample_stop(self.nursery_free)
+        self.alloc_sample_countdown -= raw_malloc_usage(totalsize)
+        if self.alloc_sample_countdown < 0:
+            self._alloc_sample(result, totalsize, alloc_young)
+        self._alloc_sample_start()
+
+    def _alloc_sample(self, result, totalsize, young=True):
+        """Record the object at 'result' as a sampled allocation.  It
+        is usually not initialized yet."""
+        from rpython.rtyper.lltypesystem import rffi
+        obj = result + self.gcheaderbuilder.size_gc_header
+        sample = self.alloc_sample_next
+        self.alloc_sample_next = sample + 1
+        if young:
+            self.young_sampled_objects.append(obj)
+            self.young_sampled_objects.append(
+                rffi.cast(llmemory.Address, sample))
+        else:
+            self.old_sampled_objects.append(obj)
+            self.old_sampled_objects.append(
+                rffi.cast(llmemory.Address, sample))
+        interval = self.hooks.get_gc_alloc_sample_interval()
+        self.alloc_sample_countdown = self._alloc_sample_interval(interval)
+        self.hooks.fire_gc_alloc_sample(sample, raw_malloc_usage(totalsize))
+
+    def free_young_sampled_objects(self):
+        """Called during a nursery collection."""
+        from rpython.rtyper.lltypesystem import rffi
+        # like invalidate_young_weakrefs(): the sampled objects that
+        # survive are moved to 'old_sampled_objects', except the pinned
+        # ones which stay young.  The others are reported as freed.
+        pinned = self.AddressStack()
+        while self.young_sampled_objects.non_empty():
+            sample = self.young_sampled_objects.pop()
+            obj = self.young_sampled_objects.pop()
+            if self.is_in_nursery(obj):
+                if self.is_forwarded(obj):
+                    obj = self.get_forwarding_address(obj)
+                    self.old_sampled_objects.append(obj)
+                    self.old_sampled_objects.append(sample)
+                    continue
+                if (self._is_pinned(obj) and
+                        self.header(obj).tid & GCFLAG_VISITED):
+                    pinned.append(obj)
+                    pinned.append(sample)
+                    continue
+            elif (bool(self.young_rawmalloced_objects) and
+                  self.young_rawmalloced_objects.contains(obj)):
+                if self.header(obj).tid & GCFLAG_VISITED_RMY:
+                    self.old_sampled_objects.append(obj)
+                    self.old_sampled_objects.append(sample)
+                    continue
+            self.hooks.fire_gc_alloc_sample_free(
+                rffi.cast(lltype.Signed, sample))
+        self.young_sampled_objects.delete()
+        self.young_sampled_objects = pinned
+
+    def free_old_sampled_objects(self):
+        """Called at the end of the marking phase."""
+        from rpython.rtyper.lltypesystem import rffi
+        survivors = self.AddressStack()
+        while self.old_sampled_objects.non_empty():
+            sample = self.old_sampled_objects.pop()
+            obj = self.old_sampled_objects.pop()
+            if self.header(obj).tid & GCFLAG_VISITED:
+                survivors.append(obj)
+                survivors.append(sample)
+            else:
+                self.hooks.fire_gc_alloc_sample_free(
+                    rffi.cast(lltype.Signed, sample))
+        self.old_sampled_objects.delete()
+        self.old_sampled_objects = survivors
+
     def get_stats(self, stats_no):
         from rpython.memory.gc import inspector
 
@@ -3054,6 +3389,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
             return intmask(self.nursery_size)
         elif stats_no == rgc.TOTAL_GC_TIME:
             return int(self.total_gc_time * 1000)
+        elif stats_no == rgc.PAUSE_TARGET_MISSES:
+            return self.pause_target_misses
         return 0
 
 
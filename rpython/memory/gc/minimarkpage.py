@@ -81,6 +81,11 @@ PAGE_HEADER = lltype.Struct('PageHeader',
 PAGE_PTR.TO.become(PAGE_HEADER)
 PAGE_NULL = lltype.nullptr(PAGE_HEADER)
 
+# The maximum number of pages that a single malloc() sweeps when it runs
+# out of pages during a lazy mass_free.  Full pages that stay full are
+# counted too, which bounds the pause of that malloc().
+LAZY_SWEEP_PAGES = 8
+
 # ----------
 
 
@@ -143,6 +148,9 @@ class ArenaCollection(object):
         self.peak_memory_used = r_uint(0)
         self.total_memory_alloced = r_uint(0)
         self.peak_memory_alloced = r_uint(0)
+        #
+        # True during a mass_free started with mass_free_prepare_lazy()
+        self.lazy_sweeping = False
 
 
     def _new_page_ptr_list(self, length):
@@ -197,6 +205,13 @@ class ArenaCollection(object):
     def allocate_new_page(self, size_class):
         """Allocate and return a new page for the given size_class."""
         #
+        # If we are in the middle of a lazy mass_free, try first to
+        # sweep some pages of the same size class.
+        if self.lazy_sweeping:
+            page = self.lazy_sweep(size_class)
+            if page != PAGE_NULL:
+                return page
+        #
         # Allocate a new arena if needed.
         if self.current_arena == ARENA_NULL:
             self.allocate_new_arena()
@@ -327,6 +342,7 @@ class ArenaCollection(object):
         """Prepare calls to mass_free_incremental(): moves the chained lists
         into 'self.old_xxx'.
         """
+        self.lazy_sweeping = False
         self.peak_memory_used = max(self.peak_memory_used,
                                     self.total_memory_used)
         self.total_memory_used = r_uint(0)
@@ -371,9 +387,21 @@ class ArenaCollection(object):
             self._rehash_arenas_lists()
             self.size_class_with_old_pages = -1
         #
+        self.lazy_sweeping = False
         return True
 
 
+    def mass_free_prepare_lazy(self, ok_to_free_func):
+        """Like mass_free_prepare(), but until the end of the mass_free,
+        malloc() sweeps the old pages of a size class with 'ok_to_free_func'
+        before it takes a fresh page for that size class.  The same
+        'ok_to_free_func' must be passed to mass_free_incremental().
+        """
+        self.mass_free_prepare()
+        self.lazy_ok_to_free_func = ok_to_free_func
+        self.lazy_sweeping = True
+
+
     def mass_free(self, ok_to_free_func):
         """For each object, if ok_to_free_func(obj) returns True, then free
         the object.
@@ -384,6 +412,27 @@ class ArenaCollection(object):
         ll_assert(res, "non-incremental mass_free_in_pages() returned False")
 
 
+    def lazy_sweep(self, size_class):
+        """Sweep the old pages of 'size_class', one at a time, until one
+        of them has room for more objects or LAZY_SWEEP_PAGES pages have
+        been swept.  Returns that page, or PAGE_NULL.  The swept pages are
+        not visited again by mass_free_incremental().
+        """
+        ok_to_free_func = self.lazy_ok_to_free_func
+        npages = LAZY_SWEEP_PAGES
+        while npages > 0:
+            if (self.old_full_page_for_size[size_class] == PAGE_NULL and
+                    self.old_page_for_size[size_class] == PAGE_NULL):
+                break
+            self.mass_free_in_pages(size_class, ok_to_free_func, 1)
+            page = self.page_for_size[size_class]
+            if page != PAGE_NULL:
+                return page
+            npages -= 1
+        return PAGE_NULL
+    lazy_sweep._dont_inline_ = True
+
+
     def _rehash_arenas_lists(self):
         #
         # Rehash arenas into the correct arenas_lists[i].  If
@@ -39,6 +39,9 @@ class SimpleArenaCollection(object):
         self.all_objects = []
         self.total_memory_used = 0
 
+    def mass_free_prepare_lazy(self, ok_to_free_func):
+        self.mass_free_prepare()
+
     def mass_free_incremental(self, ok_to_free_func, max_pages):
         old = self.old_all_objects
         while old:
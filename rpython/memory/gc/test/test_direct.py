@@ -10,6 +10,7 @@ import py
 from rpython.rtyper.lltypesystem import lltype, llmemory
 from rpython.memory.gctypelayout import TypeLayoutBuilder, FIN_HANDLER_ARRAY
 from rpython.rlib.rarithmetic import LONG_BIT, is_valid_int
+from rpython.rlib import rgc
 from rpython.memory.gc import minimark, incminimark
 from rpython.memory.gctypelayout import zero_gc_pointers_inside, zero_gc_pointers
 from rpython.rlib.debug import debug_print
@@ -844,3 +845,89 @@ class TestIncrementalMiniMarkGCFull(DirectGCTest):
             (incminimark.STATE_SWEEPING, incminimark.STATE_FINALIZING),
             (incminimark.STATE_FINALIZING, incminimark.STATE_SCANNING)
             ]
+
+
+class TestIncrementalMiniMarkGCPrefetch(TestIncrementalMiniMarkGCSimple):
+    GC_PARAMS = TestIncrementalMiniMarkGCSimple.GC_PARAMS.copy()
+    GC_PARAMS['mark_prefetch'] = 3
+
+    def test_mark_prefetch_step(self):
+        for i in range(10):
+            curobj = self.malloc(S)
+            curobj.x = i
+            if self.stackroots:
+                self.write(curobj, 'next', self.stackroots.pop())
+            self.stackroots.append(curobj)
+        for i in range(5):
+            curobj = self.malloc(S)
+            curobj.x = 100 + i
+            self.stackroots.append(curobj)
+        self.gc.debug_gc_step_until(incminimark.STATE_MARKING)
+        # visit one object at a time: the objects waiting in the
+        # FIFO must be put back in 'objects_to_trace' after each step
+        steps = 0
+        while self.gc.objects_to_trace.non_empty():
+            self.gc.visit_all_objects_step(1)
+            steps += 1
+        assert steps == 15
+        curobj = self.stackroots[0]
+        for i in range(10):
+            hdr = self.gc.header(llmemory.cast_ptr_to_adr(curobj))
+            assert hdr.tid & incminimark.GCFLAG_VISITED
+            assert curobj.x == 9 - i
+            curobj = curobj.next
+        assert not curobj
+        self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
+        assert [obj.x for obj in self.stackroots[1:]] == range(100, 105)
+
+
+class TestIncrementalMiniMarkGCLazySweep(TestIncrementalMiniMarkGCFull):
+    GC_PARAMS = {'lazy_sweep': True}
+
+
+class TestIncrementalMiniMarkGCMaxPause(TestIncrementalMiniMarkGCFull):
+    GC_PARAMS = {'max_pause': 0.002}
+
+    def test_pause_step_size(self):
+        gc = self.gc
+        assert gc._pause_step_size(0.0, 1234) == 1234    # not measured yet
+        rate = gc._pause_rate(0.0, 1000, 0.001)
+        assert rate == 1000000.0
+        rate = gc._pause_rate(rate, 3000, 0.001)
+        assert rate == 2000000.0
+        assert gc._pause_rate(rate, 0, 0.001) == rate
+        assert gc._pause_step_size(rate, 1234) == 3000
+        assert gc._pause_step_size(1.0, 1234) == 1
+        gc.max_pause = 0.0
+        assert gc._pause_step_size(rate, 1234) == 1234
+        assert gc._pause_rate(0.0, 1000, 0.001) == 0.0
+
+    def test_pause_rates_measured(self):
+        for i in range(40):
+            curobj = self.malloc(S)
+            curobj.x = i
+            if self.stackroots:
+                self.write(curobj, 'next', self.stackroots.pop())
+            self.stackroots.append(curobj)
+        self.gc.debug_gc_step_until(incminimark.STATE_SWEEPING)
+        assert self.gc.sweep_pages_rate == 0.0
+        # the objects fill more pages than a sweeping step visits by
+        # default: the first step is a full one and gives a rate
+        self.gc.debug_gc_step()
+        assert self.gc.gc_state == incminimark.STATE_SWEEPING
+        assert self.gc.sweep_pages_rate > 0.0
+        self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
+        curobj = self.stackroots[0]
+        for i in range(40):
+            assert curobj.x == 39 - i
+            curobj = curobj.next
+
+    def test_pause_target_misses(self):
+        self.gc.max_pause = 1e-30     # every step misses it
+        assert self.gc.get_stats(rgc.PAUSE_TARGET_MISSES) == 0
+        self.gc.debug_gc_step(3)
+        assert self.gc.pause_target_misses == 3
+        assert self.gc.get_stats(rgc.PAUSE_TARGET_MISSES) == 3
+        self.gc.max_pause = 1e30
+        self.gc.debug_gc_step(3)
+        assert self.gc.get_stats(rgc.PAUSE_TARGET_MISSES) == 3
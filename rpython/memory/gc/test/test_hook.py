@@ -10,6 +10,7 @@ class MyGcHooks(GcHooks):
         self._gc_minor_enabled = False
         self._gc_collect_step_enabled = False
         self._gc_collect_enabled = False
+        self._gc_alloc_sample_interval = 0
         self.reset()
 
     def is_gc_minor_enabled(self):
@@ -21,11 +22,16 @@ class MyGcHooks(GcHooks):
     def is_gc_collect_enabled(self):
         return self._gc_collect_enabled
 
+    def get_gc_alloc_sample_interval(self):
+        return self._gc_alloc_sample_interval
+
     def reset(self):
         self.minors = []
         self.steps = []
         self.collects = []
         self.durations = []
+        self.samples = {}
+        self.freed_samples = []
 
     def on_gc_minor(self, duration, total_memory_used, pinned_objects):
         self.durations.append(duration)
@@ -51,6 +57,15 @@ class MyGcHooks(GcHooks):
             'rawmalloc_bytes_before': rawmalloc_bytes_before,
             'rawmalloc_bytes_after': rawmalloc_bytes_after})
 
+    def on_gc_alloc_sample(self, sample, size):
+        assert sample not in self.samples
+        self.samples[sample] = size
+
+    def on_gc_alloc_sample_free(self, sample):
+        assert sample in self.samples
+        assert sample not in self.freed_samples
+        self.freed_samples.append(sample)
+
 
 class TestIncMiniMarkHooks(BaseDirectGCTest):
     from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
@@ -123,3 +138,58 @@ class TestIncMiniMarkHooks(BaseDirectGCTest):
         assert self.gc.hooks.minors == []
         assert self.gc.hooks.steps == []
         assert self.gc.hooks.collects == []
+
+    def test_on_gc_alloc_sample(self):
+        hooks = self.gc.hooks
+        hooks._gc_alloc_sample_interval = self.size_of_S * 10
+        self.gc._minor_collection()    # sampling starts here
+        for i in range(500):
+            self.malloc(S)
+        # on average, one object out of 10 is sampled
+        assert 20 <= len(hooks.samples) <= 80
+        assert set(hooks.samples.values()) == set([self.size_of_S])
+        self.gc._minor_collection()
+        assert sorted(hooks.freed_samples) == sorted(hooks.samples)
+        #
+        # large objects are sampled too
+        hooks.reset()
+        A = lltype.GcArray(lltype.Signed)
+        for i in range(10):
+            self.malloc(A, 1000)
+        assert len(hooks.samples) == 10
+        assert min(hooks.samples.values()) > self.gc.nonlarge_max
+        self.gc._minor_collection()
+        assert len(hooks.freed_samples) == 10
+
+    def test_on_gc_alloc_sample_survivors(self):
+        hooks = self.gc.hooks
+        hooks._gc_alloc_sample_interval = self.size_of_S * 10
+        self.gc._minor_collection()
+        for i in range(300):
+            self.stackroots.append(self.malloc(S))
+        assert len(hooks.samples) > 0
+        self.gc._minor_collection()
+        assert hooks.freed_samples == []
+        self.gc.collect()
+        assert hooks.freed_samples == []
+        del self.stackroots[:]
+        self.gc.collect()
+        assert sorted(hooks.freed_samples) == sorted(hooks.samples)
+
+    def test_on_gc_alloc_sample_disabled(self):
+        hooks = self.gc.hooks
+        hooks._gc_alloc_sample_interval = self.size_of_S * 10
+        self.gc._minor_collection()
+        for i in range(100):
+            self.stackroots.append(self.malloc(S))
+        assert len(hooks.samples) > 0
+        hooks._gc_alloc_sample_interval = 0
+        self.gc._minor_collection()
+        hooks.reset()
+        for i in range(100):
+            self.malloc(S)
+        del self.stackroots[:]
+        self.gc.collect()
+        assert hooks.samples == {}
+        assert hooks.freed_samples == []
+        assert self.gc.nursery_top == self.gc.nursery + self.gc.nursery_size
@@ -402,7 +402,7 @@ def test_mass_free_half_page_becomes_more_free():
 
 # ____________________________________________________________
 
-def test_random(incremental=False):
+def test_random(incremental=False, lazy=False):
     import random
     pagesize = hdrsize + 24*WORD
     num_pages = 3
@@ -435,6 +435,7 @@ def test_random(incremental=False):
         at = (obj.arena, obj.offset)
         assert at not in live_objects
         live_objects[at] = size_class * WORD
+        return size_class * WORD
 
     try:
         while True:
@@ -451,13 +452,15 @@ def test_random(incremental=False):
             if not incremental:
                 ac.mass_free(ok_to_free)
             else:
-                ac.mass_free_prepare()
+                if lazy:
+                    ac.mass_free_prepare_lazy(ok_to_free)
+                else:
+                    ac.mass_free_prepare()
                 while not ac.mass_free_incremental(ok_to_free,
                                                    random.randrange(1, 3)):
                     print '[]'
-                    prev = ac.total_memory_used
-                    allocate_object(live_objects_extra)
-                    fresh_extra += ac.total_memory_used - prev
+                    for i in range(random.randrange(1, 4) if lazy else 1):
+                        fresh_extra += allocate_object(live_objects_extra)
             #
             # Check that we have seen all objects
             assert sorted(ok_to_free.seen) == sorted(live_objects)
@@ -477,3 +480,27 @@ def test_random(incremental=False):
 
 def test_random_incremental():
     test_random(incremental=True)
+
+def test_random_lazy_sweep():
+    test_random(incremental=True, lazy=True)
+
+def test_mass_free_lazy_sweep():
+    pagesize = hdrsize + 9*WORD
+    ac = arena_collection_for_test(pagesize, "##", fill_with_objects=2)
+    ok_to_free = OkToFree(ac, 0.5)
+    ac.mass_free_prepare_lazy(ok_to_free)
+    # there is no page left for size class 2 and no free page: malloc()
+    # must sweep an old page and reuse it
+    obj = ac.malloc(2*WORD)
+    assert ok_to_free.seen == {hdrsize + 0*WORD: False,
+                               hdrsize + 2*WORD: True,
+                               hdrsize + 4*WORD: False,
+                               hdrsize + 6*WORD: True}
+    assert obj == pagenum(ac, 0) + hdrsize + 2*WORD
+    assert ac.page_for_size[2] == getpage(ac, 0)
+    #
+    # the rest of the mass_free doesn't visit the page again
+    assert ac.mass_free_incremental(ok_to_free, 10)
+    assert len(ok_to_free.seen) == 8
+    assert not ac.lazy_sweeping
+    assert ac.total_memory_used == 5 * 2*WORD
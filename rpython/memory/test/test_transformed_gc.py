@@ -1396,6 +1396,9 @@ class GcHooksStats(object):
     minors = 0
     steps = 0
     collects = 0
+    alloc_sample_interval = 0
+    alloc_samples = 0
+    alloc_samples_freed = 0
 
     def reset(self):
         # the NonConstant are needed so that the annotator annotates the
@@ -1405,6 +1408,9 @@ class GcHooksStats(object):
         self.minors = NonConstant(0)
         self.steps = NonConstant(0)
         self.collects = NonConstant(0)
+        self.alloc_sample_interval = NonConstant(0)
+        self.alloc_samples = NonConstant(0)
+        self.alloc_samples_freed = NonConstant(0)
 
 
 class MyGcHooks(GcHooks):
@@ -1421,6 +1427,9 @@ class MyGcHooks(GcHooks):
     def is_gc_collect_enabled(self):
         return True
 
+    def get_gc_alloc_sample_interval(self):
+        return self.stats.alloc_sample_interval
+
     def on_gc_minor(self, duration, total_memory_used, pinned_objects):
         self.stats.minors += 1
 
@@ -1433,6 +1442,12 @@ class MyGcHooks(GcHooks):
                       rawmalloc_bytes_after):
         self.stats.collects += 1
 
+    def on_gc_alloc_sample(self, sample, size):
+        self.stats.alloc_samples += 1
+
+    def on_gc_alloc_sample_free(self, sample):
+        self.stats.alloc_samples_freed += 1
+
 
 class TestIncrementalMiniMarkGC(TestMiniMarkGC):
     gcname = "incminimark"
@@ -1514,6 +1529,38 @@ class TestIncrementalMiniMarkGC(TestMiniMarkGC):
         assert steps == 4 * collects   # 4 steps for each major collection
         assert minors == steps         # one minor collection for each step
 
+    def define_gc_alloc_sample(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        stats = cls.gchooks.stats
+        def f():
+            stats.reset()
+            stats.alloc_sample_interval = 10 * WORD
+            llop.gc__collect(lltype.Void)
+            keep = []
+            for i in range(200):
+                s = lltype.malloc(S)
+                if i % 2 == 0:
+                    keep.append(s)
+            n = stats.alloc_samples
+            llop.gc__collect(lltype.Void)
+            freed = stats.alloc_samples_freed
+            for s in keep:
+                s.x = 42
+            keep = None
+            llop.gc__collect(lltype.Void)
+            stats.alloc_sample_interval = 0
+            return 1000000 * n + 1000 * freed + stats.alloc_samples_freed
+        return f
+
+    def test_gc_alloc_sample(self):
+        run = self.runner("gc_alloc_sample")
+        res = run([])
+        n, res = divmod(res, 1000000)
+        freed_early, freed = divmod(res, 1000)
+        assert n > 10
+        assert 0 < freed_early < n
+        assert freed == n
+
 # ________________________________________________________________
 # tagged pointers
 
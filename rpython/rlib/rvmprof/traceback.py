@@ -15,15 +15,25 @@ def traceback(estimate_number_of_entries):
     """
     if not cintf.IS_SUPPORTED:
         return (None, 0)
-    _cintf = rvmprof._get_vmprof().cintf
     size = estimate_number_of_entries * 2 + 4
-    stack = cintf.get_rvmprof_stack()
     array_p = lltype.malloc(rffi.SIGNEDP.TO, size, flavor='raw')
-    NULL = llmemory.NULL
-    array_length = _cintf.vmprof_get_traceback(stack, NULL, array_p, size)
+    array_length = traceback_into(array_p, size)
     return (array_p, array_length)
 
 
+def traceback_into(array_p, size):
+    """Like traceback(), but write at most 'size' entries into the
+    existing raw array 'array_p', and return the number of entries
+    written.  Doesn't allocate anything, so it can be called from GC hooks.
+    """
+    if not cintf.IS_SUPPORTED:
+        return 0
+    _cintf = rvmprof._get_vmprof().cintf
+    stack = cintf.get_rvmprof_stack()
+    NULL = llmemory.NULL
+    return _cintf.vmprof_get_traceback(stack, NULL, array_p, size)
+
+
 LOC_INTERPRETED    = 0
 LOC_JITTED         = 1
 LOC_JITTED_INLINED = 2
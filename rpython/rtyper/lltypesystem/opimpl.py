@@ -684,6 +684,9 @@ def op_get_member_index(memberoffset):
 def op_gc_writebarrier(addr):
     pass
 
+def op_raw_prefetch(addr):
+    assert lltype.typeOf(addr) == llmemory.Address
+
 def op_gc_bit(hdr, bitmask):
     if hdr.tid & bitmask:
         return random.randrange(1, sys.maxint)